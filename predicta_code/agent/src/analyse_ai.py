@@ -1,93 +1,147 @@
-import requests
-from bs4 import BeautifulSoup
-from openai import OpenAI
+import asyncio
 
 import json
 from urllib.parse import urlparse
 from api_news import get_news_articles
+from analysis_cache import AnalysisCache
+from article_extraction import parse_article_html, stream_article_texts
+from llm_executor import LLMExecutor
+from http_clients import get_session, run
 
 from dotenv import load_dotenv
 import os
 
 load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Shared executor keeps concurrent analyses inside the account's rate limits
+llm = LLMExecutor(api_key=os.getenv("OPENAI_API_KEY"))
+
+# Bump whenever the analysis prompts change so cached results are not reused
+PROMPT_VERSION = "2024-11-analysis-v1"
+analysis_cache = AnalysisCache(prompt_version=PROMPT_VERSION)
 
 def extract_article_text(url):
     """Extract main article text from a URL"""
     try:
-        response = requests.get(url, timeout=10)
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Common article text containers
-        selectors = ['article', '.article-body', '#main-content', 'div.article']
-        for selector in selectors:
-            article = soup.select_one(selector)
-            if article:
-                return ' '.join([p.get_text() for p in article.find_all('p')])
-
-        # Fallback to generic text extraction
-        return ' '.join([p.get_text() for p in soup.find_all('p')])
+        response = get_session().get(url, timeout=10)
+        return parse_article_html(response.text)
     except Exception as e:
         print(f"Error extracting text from {url}: {str(e)}")
         return None
 
+async def analyze_article(url, article_text, country):
+    """Ask the LLM for the investment implications of a single article"""
+    domain = urlparse(url).netloc
+    response = await llm.create(model="gpt-4-1106-preview",  # Use latest model with JSON mode
+    messages=[
+        {
+            "role": "system", 
+            "content": f"""You are an AI financial analyst specializing in {country}. 
+                Analyze news articles for investment implications without any preamble.
+                Provide only the JSON output with your analysis."""
+        },
+        {
+            "role": "user",
+            "content": f"""Analyze this news article from {domain} for investment implications in {country}:
+                
+                {article_text[:15000]}  # Truncate to avoid token limits
+                
+                Output JSON format with these keys:
+                - source (website domain)
+                - key_entities (companies, people, organizations mentioned)
+                - sector_impact (dictionary of affected sectors with impact scores 1-10)
+                - sentiment_score (-5 to 5)
+                - short_term_effects (1-2 sentence summary)
+                - long_term_effects (1-2 sentence summary)
+                - potential_opportunities (array of specific opportunities)
+                - related_risks (array of potential risks)
+                - confidence_score (0-1)
+                """
+        }
+    ],
+    response_format={"type": "json_object"},
+    temperature=0.2)  # More deterministic output
+
+    try:
+        analysis = json.loads(response.choices[0].message.content)
+        analysis['url'] = url  # Add source URL
+        return analysis
+    except json.JSONDecodeError:
+        return None
+
 def analyze_news_urls(urls, country):
     """
     Analyze multiple news URLs for investment opportunities in a specific country
     Returns JSON with analysis of each article and aggregated insights
     """
-    results = []
-
-    for url in urls:
-        article_text = extract_article_text(url)
-        if not article_text:
-            continue
-
-        domain = urlparse(url).netloc
-        response = client.chat.completions.create(model="gpt-4-1106-preview",  # Use latest model with JSON mode
-        messages=[
-            {
-                "role": "system", 
-                "content": f"""You are an AI financial analyst specializing in {country}. 
-                    Analyze news articles for investment implications without any preamble.
-                    Provide only the JSON output with your analysis."""
-            },
-            {
-                "role": "user",
-                "content": f"""Analyze this news article from {domain} for investment implications in {country}:
-                    
-                    {article_text[:15000]}  # Truncate to avoid token limits
-                    
-                    Output JSON format with these keys:
-                    - source (website domain)
-                    - key_entities (companies, people, organizations mentioned)
-                    - sector_impact (dictionary of affected sectors with impact scores 1-10)
-                    - sentiment_score (-5 to 5)
-                    - short_term_effects (1-2 sentence summary)
-                    - long_term_effects (1-2 sentence summary)
-                    - potential_opportunities (array of specific opportunities)
-                    - related_risks (array of potential risks)
-                    - confidence_score (0-1)
-                    """
-            }
-        ],
-        response_format={"type": "json_object"},
-        temperature=0.2)  # More deterministic output
-
-        try:
-            analysis = json.loads(response.choices[0].message.content)
-            analysis['url'] = url  # Add source URL
-            results.append(analysis)
-        except json.JSONDecodeError:
-            continue
+    return run(analyze_news_urls_async(urls, country))
 
-    return generate_aggregated_analysis(results, country)
+async def analyze_news_urls_async(urls, country):
+    """
+    Async pipeline behind analyze_news_urls
 
-def generate_aggregated_analysis(individual_analyses, country):
+    Cached URLs are served without any network work. The remaining articles
+    are extracted concurrently and each one is handed to the LLM as soon as
+    its text arrives, so analysis overlaps with the downloads still running.
+    """
+    analyses = {}
+    cache_keys = {}
+    pending_urls = []
+
+    for url in dict.fromkeys(urls):
+        # Recently seen URLs resolve straight to their cached analysis
+        cache_key = analysis_cache.key_for_url(url, country)
+        analysis = analysis_cache.get(cache_key) if cache_key else None
+        if analysis is None:
+            pending_urls.append(url)
+        else:
+            analyses[url] = analysis
+            cache_keys[url] = cache_key
+
+    async def analyze(url, article_text):
+        cache_key = analysis_cache.key_for_text(url, article_text, country)
+        analysis = analysis_cache.get(cache_key)
+        if analysis is None:
+            try:
+                analysis = await analyze_article(url, article_text, country)
+            except Exception as e:
+                print(f"Error analyzing {url}: {str(e)}")
+                return
+            if analysis is None:
+                return
+            analysis_cache.put(cache_key, analysis)
+        analyses[url] = analysis
+        cache_keys[url] = cache_key
+
+    analysis_tasks = []
+    async for url, article_text in stream_article_texts(pending_urls):
+        if article_text:
+            analysis_tasks.append(asyncio.create_task(analyze(url, article_text)))
+    await asyncio.gather(*analysis_tasks)
+
+    # Keep the caller's URL order regardless of completion order
+    ordered_urls = [url for url in dict.fromkeys(urls) if url in analyses]
+    results = [analyses[url] for url in ordered_urls]
+    return await generate_aggregated_analysis_async(results, country, cache_keys=[cache_keys[url] for url in ordered_urls])
+
+def generate_aggregated_analysis(individual_analyses, country, cache_keys=None):
     """Combine multiple analyses into comprehensive recommendations"""
+    return run(generate_aggregated_analysis_async(individual_analyses, country, cache_keys))
+
+async def generate_aggregated_analysis_async(individual_analyses, country, cache_keys=None):
+    """Async implementation of generate_aggregated_analysis"""
+    # The same set of articles always aggregates to the same recommendations
+    aggregate_key = analysis_cache.aggregate_key(cache_keys, country) if cache_keys else None
+    if aggregate_key:
+        recommendations = analysis_cache.get(aggregate_key)
+        if recommendations is not None:
+            return {
+                "individual_analyses": individual_analyses,
+                "aggregated_recommendations": recommendations
+            }
+
     combined_text = "\n\n".join([json.dumps(a) for a in individual_analyses])
 
-    response = client.chat.completions.create(model="gpt-4-1106-preview",
+    response = await llm.create(model="gpt-4-1106-preview",
     messages=[
         {
             "role": "system",
@@ -114,9 +168,13 @@ def generate_aggregated_analysis(individual_analyses, country):
     response_format={"type": "json_object"},
     temperature=0.3)
 
+    recommendations = json.loads(response.choices[0].message.content)
+    if aggregate_key:
+        analysis_cache.put(aggregate_key, recommendations, kind="aggregate")
+
     return {
         "individual_analyses": individual_analyses,
-        "aggregated_recommendations": json.loads(response.choices[0].message.content)
+        "aggregated_recommendations": recommendations
     }
 
 # Example usage
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Where the cache lives and how large it may grow on disk
+DEFAULT_CACHE_PATH = os.getenv(
+    "ANALYSIS_CACHE_PATH",
+    os.path.join(os.path.dirname(__file__), ".cache", "analysis_cache.sqlite")
+)
+DEFAULT_MAX_BYTES = int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# How long a URL is trusted to map to the same article text without re-extracting it
+DEFAULT_URL_TTL = float(os.getenv("ANALYSIS_CACHE_URL_TTL", str(6 * 60 * 60)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS url_index (
+    url TEXT NOT NULL,
+    country TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    cache_key TEXT,
+    PRIMARY KEY (url, country, prompt_version)
+);
+CREATE TABLE IF NOT EXISTS entries (
+    cache_key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+"""
+URL_INDEX_KEYS = """
+CREATE INDEX IF NOT EXISTS url_index_cache_key ON url_index (cache_key);
+CREATE INDEX IF NOT EXISTS url_index_fetched_at ON url_index (fetched_at);
+"""
+
+
+def hash_text(text):
+    """Stable fingerprint of extracted article text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Persistent, content-addressed cache for LLM article analyses
+
+    Article analyses are keyed by URL, a hash of the extracted text, the
+    country and the prompt version, so a changed article or prompt never
+    serves a stale answer. A URL index remembers which text a URL resolved
+    to, letting repeat requests skip extraction entirely. Aggregated
+    analyses are keyed on the set of article keys they were built from.
+    Least recently used entries are evicted once the store exceeds max_bytes,
+    together with the URL index rows pointing at them; index rows that never
+    got an analysis are dropped once their URL TTL has passed.
+    """
+
+    def __init__(self, prompt_version, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, url_ttl=DEFAULT_URL_TTL):
+        self.prompt_version = prompt_version
+        self.path = path
+        self.max_bytes = max_bytes
+        self.url_ttl = url_ttl
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._conn.executescript(URL_INDEX_KEYS)
+        self._conn.commit()
+
+    def _migrate(self):
+        """Give URL index rows from older stores the article key they point at"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(url_index)")}
+        if "cache_key" in columns:
+            return
+        self._conn.execute("ALTER TABLE url_index ADD COLUMN cache_key TEXT")
+        rows = self._conn.execute("SELECT url, country, prompt_version, text_hash FROM url_index").fetchall()
+        self._conn.executemany(
+            "UPDATE url_index SET cache_key = ? WHERE url = ? AND country = ? AND prompt_version = ?",
+            [
+                (self._digest("article", url, text_hash, country, prompt_version), url, country, prompt_version)
+                for url, country, prompt_version, text_hash in rows
+            ]
+        )
+
+    def _digest(self, *parts):
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def article_key(self, url, text_hash, country):
+        """Cache key for the analysis of one article"""
+        return self._digest("article", url, text_hash, country, self.prompt_version)
+
+    def aggregate_key(self, article_keys, country):
+        """Cache key for an aggregated analysis over a set of article keys"""
+        return self._digest("aggregate", *sorted(set(article_keys)), country, self.prompt_version)
+
+    def key_for_url(self, url, country):
+        """Return the article key for a recently seen URL, or None if it must be re-extracted"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text_hash, fetched_at FROM url_index WHERE url = ? AND country = ? AND prompt_version = ?",
+                (url, country, self.prompt_version)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.url_ttl:
+            return None
+        return self.article_key(url, row[0], country)
+
+    def key_for_text(self, url, text, country):
+        """Record the text a URL resolved to and return its article key"""
+        text_hash = hash_text(text)
+        cache_key = self.article_key(url, text_hash, country)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO url_index (url, country, prompt_version, text_hash, fetched_at, cache_key) VALUES (?, ?, ?, ?, ?, ?)",
+                (url, country, self.prompt_version, text_hash, time.time(), cache_key)
+            )
+            self._conn.commit()
+        return cache_key
+
+    def get(self, cache_key):
+        """Return a cached analysis, or None on a miss"""
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM entries WHERE cache_key = ?", (cache_key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE cache_key = ?", (time.time(), cache_key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, cache_key, value, kind="article"):
+        """Store an analysis and evict old entries if the store grew too large"""
+        payload = json.dumps(value)
+        size = len(payload.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (cache_key, kind, payload, size, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (cache_key, kind, payload, size, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # URLs whose extraction never led to a stored analysis
+        self._conn.execute(
+            "DELETE FROM url_index WHERE fetched_at < ? AND NOT EXISTS "
+            "(SELECT 1 FROM entries WHERE entries.cache_key = url_index.cache_key)",
+            (time.time() - self.url_ttl,)
+        )
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT cache_key, size FROM entries ORDER BY last_access ASC").fetchall()
+        for cache_key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE cache_key = ?", (cache_key,))
+            self._conn.execute("DELETE FROM url_index WHERE cache_key = ?", (cache_key,))
+            total -= size
+
+    def analyses_for_urls(self, urls):
+        """
+        Latest cached analysis per URL under this prompt version, however old
+
+        For offline jobs such as model training: nothing is re-extracted, URL
+        TTLs are ignored and access times are left alone, so reading history
+        does not change what gets evicted.
+        """
+        found = {}
+        with self._lock:
+            for url in dict.fromkeys(urls):
+                row = self._conn.execute(
+                    "SELECT text_hash, country FROM url_index WHERE url = ? AND prompt_version = ? ORDER BY fetched_at DESC LIMIT 1",
+                    (url, self.prompt_version)
+                ).fetchone()
+                if row is None:
+                    continue
+                entry = self._conn.execute(
+                    "SELECT payload FROM entries WHERE cache_key = ?", (self.article_key(url, row[0], row[1]),)
+                ).fetchone()
+                if entry is not None:
+                    found[url] = json.loads(entry[0])
+        return found
+
+    def stats(self):
+        """Entry counts and on-disk payload size by kind"""
+        with self._lock:
+            rows = self._conn.execute("SELECT kind, COUNT(*), COALESCE(SUM(size), 0) FROM entries GROUP BY kind").fetchall()
+            urls = self._conn.execute("SELECT COUNT(*) FROM url_index").fetchone()[0]
+        return {
+            "entries": {kind: count for kind, count, _ in rows},
+            "urls": urls,
+            "bytes": sum(size for _, _, size in rows),
+            "max_bytes": self.max_bytes
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,6 +1,6 @@
-import requests
 from dotenv import load_dotenv
 import os
+from http_clients import get_session
 
 load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
 
@@ -19,30 +19,23 @@ params = {
     'apiKey': api_key
 }
 
-# Make the request
-response = requests.get(url, params=params)
-
 def get_news_articles():
     """
     Fetch news articles from the NewsAPI
     """
     try:
+        # Make the request when articles are asked for, not when the module is imported
+        response = get_session().get(url, params=params, timeout=10)
+
         # Check for a successful request
-        if response.status_code == 200:
-            articles = response.json().get('articles')
-            if articles:
-                
-                for i, article in enumerate(articles, 1):
-                    title = article['title']
-                    source = article['source']['name']
-                    url = article['url']
-
-            else:
-                print("No articles found for the given query.")
-        else:
+        if response.status_code != 200:
             print(f"Failed to fetch news articles. Status Code: {response.status_code}")
+            return None
+
+        articles = response.json().get('articles')
+        if not articles:
+            print("No articles found for the given query.")
 
         return articles
     except Exception as e:
         print(f"An error occurred: {e}")
-        
@@ -0,0 +1,79 @@
+import asyncio
+import os
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
+
+from http_clients import get_async_client
+
+# Concurrency and budget settings for the extraction stage
+PER_HOST_LIMIT = int(os.getenv("EXTRACTION_PER_HOST_LIMIT", "2"))
+REQUEST_TIMEOUT = float(os.getenv("EXTRACTION_REQUEST_TIMEOUT", "10"))
+TOTAL_DEADLINE = float(os.getenv("EXTRACTION_DEADLINE", "30"))
+
+# Common article text containers
+ARTICLE_SELECTORS = ['article', '.article-body', '#main-content', 'div.article']
+
+
+def parse_article_html(html):
+    """Pull the main article text out of an HTML page"""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    for selector in ARTICLE_SELECTORS:
+        article = soup.select_one(selector)
+        if article:
+            return ' '.join([p.get_text() for p in article.find_all('p')])
+
+    # Fallback to generic text extraction
+    return ' '.join([p.get_text() for p in soup.find_all('p')])
+
+
+async def stream_article_texts(
+    urls,
+    client=None,
+    per_host_limit=PER_HOST_LIMIT,
+    request_timeout=REQUEST_TIMEOUT,
+    deadline=TOTAL_DEADLINE
+):
+    """
+    Download and extract articles concurrently, yielding (url, text) as each finishes
+
+    Requests to the same host are capped at per_host_limit at a time. Every
+    request is bounded both by request_timeout and by what is left of the
+    overall deadline; articles still pending when the deadline passes are
+    dropped. Failed extractions yield None as their text.
+    """
+    loop = asyncio.get_running_loop()
+    expires_at = loop.time() + deadline
+    host_limits = {}
+    client = client or get_async_client()
+
+    async def extract(url):
+        host = urlparse(url).netloc
+        semaphore = host_limits.setdefault(host, asyncio.Semaphore(per_host_limit))
+        async with semaphore:
+            remaining = expires_at - loop.time()
+            if remaining <= 0:
+                return url, None
+            try:
+                response = await client.get(url, timeout=min(request_timeout, remaining))
+                # HTML parsing is CPU bound, keep it off the event loop
+                text = await asyncio.to_thread(parse_article_html, response.text)
+                return url, text
+            except Exception as e:
+                print(f"Error extracting text from {url}: {str(e)}")
+                return url, None
+
+    tasks = {asyncio.create_task(extract(url)) for url in dict.fromkeys(urls)}
+    try:
+        while tasks:
+            remaining = expires_at - loop.time()
+            if remaining <= 0:
+                print(f"Extraction deadline reached, dropping {len(tasks)} pending articles")
+                break
+            done, tasks = await asyncio.wait(tasks, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
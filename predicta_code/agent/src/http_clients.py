@@ -0,0 +1,86 @@
+import asyncio
+import os
+import threading
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+# HTTP/2 needs the optional h2 package; fall back to HTTP/1.1 keep-alive without it
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+MAX_CONNECTIONS = int(os.getenv("AGENT_HTTP_MAX_CONNECTIONS", "20"))
+KEEPALIVE_EXPIRY = float(os.getenv("AGENT_HTTP_KEEPALIVE_EXPIRY", "30"))
+
+_lock = threading.Lock()
+_session = None
+_async_client = None
+_loop = None
+
+
+def get_session():
+    """Shared requests session so blocking calls reuse keep-alive connections"""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_CONNECTIONS, pool_maxsize=MAX_CONNECTIONS)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def get_async_client():
+    """Shared async client; only valid on the background loop from get_loop"""
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY
+            ),
+            http2=HTTP2_AVAILABLE,
+            follow_redirects=True,
+            headers={"User-Agent": "Mozilla/5.0 (compatible; PredictaBot/1.0)"}
+        )
+    return _async_client
+
+
+def get_loop():
+    """
+    Long-lived event loop on a daemon thread
+
+    Async clients are bound to the loop they were first used on. Running
+    every pipeline on this one loop, instead of a fresh asyncio.run each
+    time, lets their connection pools outlive a single call.
+    """
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="agent-async", daemon=True).start()
+        return _loop
+
+
+def run(coro, timeout=None):
+    """Run a coroutine on the shared loop from synchronous code and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result(timeout)
+
+
+def close():
+    """Close pooled connections and stop the background loop"""
+    global _session, _async_client, _loop
+    if _async_client is not None and _loop is not None:
+        run(_async_client.aclose())
+        _async_client = None
+    if _loop is not None:
+        _loop.call_soon_threadsafe(_loop.stop)
+        _loop = None
+    if _session is not None:
+        _session.close()
+        _session = None
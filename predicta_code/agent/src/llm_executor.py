@@ -0,0 +1,179 @@
+import asyncio
+import os
+import random
+import time
+
+import openai
+from openai import AsyncOpenAI
+
+# Budgets for the analysis workload; match these to the account's rate limits
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "150000"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "30"))
+# Completion budget assumed when a request does not set max_tokens
+DEFAULT_COMPLETION_TOKENS = 1000
+
+
+class TokenBucket:
+    """Refills continuously at per_minute / 60 units per second up to capacity"""
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        """Wait until amount units are available, then take them; returns seconds waited"""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return waited
+            delay = (amount - self.tokens) / self.rate
+            waited += delay
+            await asyncio.sleep(delay)
+
+    def adjust(self, amount):
+        """Give back over-reserved units, or charge extra ones (negative amount)"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+def estimate_tokens(messages, max_tokens=None):
+    """Rough prompt + completion token estimate, about four characters per token"""
+    prompt_chars = sum(len(str(message.get("content", ""))) for message in messages)
+    return prompt_chars // 4 + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+def is_retryable(error):
+    """Rate limits, server errors and connection problems are worth retrying"""
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def retry_after(error):
+    """Seconds requested by the server's Retry-After header, if any"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMExecutor:
+    """
+    Runs chat completions concurrently within request and token budgets
+
+    At most max_concurrency requests are in flight. Every request first
+    reserves one unit from the requests-per-minute bucket and its estimated
+    token count from the tokens-per-minute bucket; the token reservation is
+    reconciled with the reported usage afterwards. Rate limit and server
+    errors are retried with full-jitter exponential backoff, honouring
+    Retry-After when the server sends it.
+
+    base_url points the executor at any OpenAI-compatible server, which is
+    how it is exercised locally against a fake endpoint.
+    """
+
+    def __init__(
+        self,
+        api_key=None,
+        base_url=None,
+        max_concurrency=MAX_CONCURRENCY,
+        requests_per_minute=REQUESTS_PER_MINUTE,
+        tokens_per_minute=TOKENS_PER_MINUTE,
+        max_retries=MAX_RETRIES,
+        backoff_base=BACKOFF_BASE,
+        backoff_max=BACKOFF_MAX
+    ):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL")
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "throttled_seconds": 0.0, "tokens": 0}
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+
+    def _bind(self):
+        """Async clients and semaphores belong to one event loop, so rebuild them per loop"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            # Retries are handled here so they respect the shared budgets
+            self._client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client, self._semaphore
+
+    def _backoff(self, attempt, error):
+        delay = retry_after(error)
+        if delay is None:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        return delay
+
+    async def create(self, **kwargs):
+        """Rate-limited, retrying equivalent of client.chat.completions.create"""
+        client, semaphore = self._bind()
+        estimate = estimate_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                self.stats["throttled_seconds"] += await self.request_bucket.acquire(1)
+                self.stats["throttled_seconds"] += await self.token_bucket.acquire(estimate)
+                self.stats["requests"] += 1
+                try:
+                    response = await client.chat.completions.create(**kwargs)
+                except Exception as e:
+                    if not is_retryable(e) or attempt == self.max_retries:
+                        self.stats["failures"] += 1
+                        raise
+                    self.stats["retries"] += 1
+                    await asyncio.sleep(self._backoff(attempt, e))
+                    continue
+
+                usage = getattr(response, "usage", None)
+                if usage is not None and usage.total_tokens:
+                    self.token_bucket.adjust(estimate - usage.total_tokens)
+                    self.stats["tokens"] += usage.total_tokens
+                return response
+
+    async def map(self, requests):
+        """Run several completion requests concurrently, returning responses or exceptions in order"""
+        return await asyncio.gather(*(self.create(**request) for request in requests), return_exceptions=True)
+
+
+# Example usage against an OpenAI-compatible server, e.g. OPENAI_BASE_URL=http://localhost:8080/v1
+if __name__ == "__main__":
+
+    async def main():
+        executor = LLMExecutor()
+        requests = [
+            {"model": "gpt-4-1106-preview", "messages": [{"role": "user", "content": f"Say {i}"}], "max_tokens": 5}
+            for i in range(10)
+        ]
+        started = time.perf_counter()
+        responses = await executor.map(requests)
+        print(f"{len(responses)} responses in {time.perf_counter() - started:.2f}s")
+        print(executor.stats)
+
+    asyncio.run(main())
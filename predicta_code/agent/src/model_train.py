@@ -1,57 +1,243 @@
-<<<<<<< HEAD
-import os
-import openai
-from dotenv import load_dotenv
-
-load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
-
-def analyze_news(news_text, country):
-    response = openai.ChatCompletion.create(
-        model="gpt-4",
-        messages=[
-            {"role": "system", "content": f"You are a financial analyst specializing in {country}. Analyze news for investment implications."},
-            {"role": "user", "content": f"Analyze this news for investment opportunities in {country}:\n\n{news_text}"}
-        ],
-        temperature=0.7,
-        max_tokens=500
-    )
-    return response.choices[0].message.content
-=======
-from mistralai import Mistral
-from dotenv import load_dotenv
+"""
+Offline training for the model behind /predictions
+
+Builds features from the server's stored daily price history and the news
+sentiment already sitting in the analysis cache, scores ridge (expected
+move) and logistic (probability of a rise) models by walk-forward
+validation on a process pool, then refits the best settings on all the
+data and saves a versioned artifact that the server loads at startup.
+No LLM or news API is called. Price history is only fetched with
+--update-history, through the server's configured provider, so with
+PREDICTA_HISTORY_PROVIDER=fixture the whole run is offline.
+Run from predicta_code:
+
+    python agent/src/model_train.py [--update-history] [--horizon 5] [--folds 5] [--workers 4]
+"""
+import argparse
 import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+
+import numpy as np
 
-load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../server")
+if SERVER_DIR not in sys.path:
+    sys.path.insert(0, SERVER_DIR)
 
-# Initialize the client
-api_key = os.getenv("MISTRAL_MODEL") # Get this from Mistral's platform
-client = Mistral(api_key=api_key)
-print(client)
-# Example chat request
-response = client.chat.stream(
-    model="mistral-tiny",
-    messages=[{"role": "user", "content": "Hello!"}]
+from src.services.entity_index import DEFAULT_CONFIDENCE, EntityIndex, as_float  # noqa: E402
+from src.services.indicators import IndicatorEngine, rolling_sums  # noqa: E402
+from src.services.news_store import NewsStore  # noqa: E402
+from src.services.price_history import DAY_SECONDS  # noqa: E402
+from src.services.signal_model import (  # noqa: E402
+    DEFAULT_MODEL_DIR,
+    FEATURES,
+    SignalModel,
+    artifact_version,
+    build_features,
+    fit_logistic,
+    fit_ridge,
+    forward_returns,
+    signal_metrics,
+    standardize,
+    walk_forward_splits,
 )
-print(response)
-# model = "mistral-large-latest"
-# print(client)
-# messages = [
-#     {
-#         "role": "user",
-#         "content": "What is the best French cheese?",
-#     },
-# ]
-# # Or using the new message classes
-# # messages = [
-# #     UserMessage(content="What is the best French cheese?"),
-# # ]
-
-# stream_response = client.chat.stream(
-#     model=model,
-#     messages=messages,
-# )
-
-# for chunk in stream_response:
-#     print(chunk.data.choices[0].delta.content)
->>>>>>> 8d0b955ff (ai recommendation working)
+
+DEFAULT_HORIZON = 5
+DEFAULT_FOLDS = 5
+DEFAULT_ALPHAS = (0.1, 1.0, 10.0, 100.0, 1000.0, 10000.0)
+# Trading days of news that feed each day's sentiment, about the week /predictions reads
+SENTIMENT_WINDOW = 5
+MIN_TRAIN_DAYS = 250
+
+
+def news_features(registry, symbols, timestamps, window=SENTIMENT_WINDOW):
+    """
+    Confidence-weighted sentiment and mention counts per (symbol, day)
+
+    An article counts from the first bar whose day ends after it was
+    published, so a day's features only see news available by its close.
+    """
+    sentiment = np.zeros((len(symbols), len(timestamps)))
+    mentions = np.zeros((len(symbols), len(timestamps)))
+    try:
+        from analyse_ai import analysis_cache
+    except ImportError as e:
+        print(f"Warning: analysis cache unavailable, training without news: {str(e)}")
+        return sentiment, mentions, 0
+
+    store = NewsStore()
+    countries = {}
+    for row, symbol in enumerate(symbols):
+        instrument = registry.get(symbol)
+        country = registry.country(instrument.exchange) if instrument else None
+        if country:
+            countries.setdefault(country, []).append(row)
+
+    matched = 0
+    day_ends = np.asarray(timestamps, dtype=np.int64) + DAY_SECONDS
+    for country, rows in countries.items():
+        articles = store.recent(country)
+        analyses = analysis_cache.analyses_for_urls(article.url for article in articles)
+        dated = [{**analyses[article.url], "published_ts": article.published_ts} for article in articles if article.url in analyses]
+        if not dated:
+            continue
+        index = EntityIndex(dated, ambiguous=registry.ambiguous_entities)
+        totals = np.zeros((3, len(rows), len(timestamps)))
+        for position, row in enumerate(rows):
+            for analysis in index.match(registry.entity_names(symbols[row])):
+                day = int(np.searchsorted(day_ends, analysis["published_ts"], side="right"))
+                if day >= len(timestamps):
+                    continue
+                weight = max(as_float(analysis.get("confidence_score"), DEFAULT_CONFIDENCE), 0.0)
+                totals[:, position, day] += (weight * as_float(analysis.get("sentiment_score"), 0.0), weight, 1.0)
+                matched += 1
+        weighted, weights, counts = (rolling_sums(total, window)[0] for total in totals)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sentiment[rows] = np.where(weights > 0, weighted / weights, 0.0)
+        mentions[rows] = counts
+    return sentiment, mentions, matched
+
+
+def build_dataset(update_history=False, horizon=DEFAULT_HORIZON):
+    """Day-major features (days, symbols, FEATURES), targets (days, symbols) and the price matrix"""
+    from src.routes.stock_data import history_updater, price_history, symbol_registry
+
+    if update_history:
+        written = history_updater.update()
+        print(f"Stored {sum(written.values())} new bars for {len(written)} symbols via {history_updater.provider.name}")
+    matrix = price_history.read_matrix(history_updater.symbols)
+    if matrix.shape[1] == 0:
+        raise SystemExit("No price history stored yet; rerun with --update-history")
+
+    series, _ = IndicatorEngine().compute(matrix)
+    sentiment, mentions, matched = news_features(symbol_registry, matrix.symbols, matrix.timestamp)
+    x = build_features(series, matrix.close, sentiment, mentions)
+    y = forward_returns(matrix.close, horizon)
+    return np.ascontiguousarray(x.transpose(1, 0, 2)), np.ascontiguousarray(y.T), matrix, matched
+
+
+def labelled(x, y):
+    """Rows with every feature and the target defined"""
+    mask = np.isfinite(x).all(axis=-1) & np.isfinite(y)
+    return x[mask], y[mask]
+
+
+def fit(x, y, ridge_alpha, logistic_alpha, horizon, version="unsaved", metadata=None):
+    """Fit both heads on labelled day-major data"""
+    train_x, train_y = labelled(x, y)
+    mean, scale = standardize(train_x)
+    z = (train_x - mean) / scale
+    return SignalModel(
+        version=version,
+        features=FEATURES,
+        horizon=horizon,
+        mean=mean,
+        scale=scale,
+        ridge=fit_ridge(z, train_y, ridge_alpha),
+        logistic=fit_logistic(z, (train_y > 0).astype(np.float64), logistic_alpha),
+        metadata=metadata or {}
+    )
+
+
+# Each worker maps the dataset files once instead of unpickling arrays per task
+_dataset = {}
+
+
+def open_dataset(directory):
+    for name in ("x", "y"):
+        _dataset[name] = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+
+def evaluate(task):
+    """Train on one fold's past with one alpha and score its test block"""
+    fold, (train_end, test_start, test_end), alpha, horizon = task
+    x, y = _dataset["x"], _dataset["y"]
+    model = fit(x[:train_end], y[:train_end], alpha, alpha, horizon)
+    test_x, test_y = x[test_start:test_end], y[test_start:test_end]
+    expected, probability = model.predict(test_x.reshape(-1, len(FEATURES)))
+    # Score the same rows training would have used
+    defined = np.isfinite(test_x).all(axis=-1)
+    expected = np.where(defined, expected.reshape(defined.shape), np.nan)
+    probability = probability.reshape(defined.shape)
+    return fold, alpha, signal_metrics(expected, test_y, probability)
+
+
+def walk_forward(x, y, splits, alphas, horizon, workers):
+    """Metrics for every (fold, alpha) pair, computed in parallel"""
+    tasks = [(fold, split, alpha, horizon) for fold, split in enumerate(splits) for alpha in alphas]
+    with tempfile.TemporaryDirectory(prefix="predicta-train-") as directory:
+        np.save(os.path.join(directory, "x.npy"), x)
+        np.save(os.path.join(directory, "y.npy"), y)
+        with ProcessPoolExecutor(max_workers=workers, initializer=open_dataset, initargs=(directory,)) as pool:
+            return list(pool.map(evaluate, tasks))
+
+
+def mean_of(results, alpha, metric):
+    values = [metrics[metric] for _, a, metrics in results if a == alpha and metrics.get(metric) is not None]
+    return float(np.mean(values)) if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the /predictions model offline")
+    parser.add_argument("--update-history", action="store_true", help="fetch missing daily bars before training")
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON, help="trading days ahead to forecast")
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS, help="walk-forward test blocks")
+    parser.add_argument("--alphas", type=float, nargs="+", default=list(DEFAULT_ALPHAS), help="regularization strengths to try")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes for cross-validation")
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR, help="where versioned artifacts are written")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    x, y, matrix, matched = build_dataset(args.update_history, args.horizon)
+    days, symbols = y.shape
+    print(f"{symbols} symbols x {days} days, {matched} news mentions, {len(labelled(x, y)[1])} labelled samples")
+
+    splits = walk_forward_splits(days, args.folds, args.horizon, min(MIN_TRAIN_DAYS, days // 2))
+    if not splits:
+        raise SystemExit("Not enough history for walk-forward validation")
+    results = walk_forward(x, y, splits, args.alphas, args.horizon, args.workers)
+
+    print(f"{'alpha':>10} {'ic':>8} {'hit rate':>9} {'log loss':>9}")
+    summary = {}
+    for alpha in args.alphas:
+        summary[alpha] = {metric: mean_of(results, alpha, metric) for metric in ("ic", "hit_rate", "log_loss")}
+        row = summary[alpha]
+        print(f"{alpha:>10g} " + " ".join(
+            f"{'-' if row[metric] is None else format(row[metric], '.4f'):>{width}}"
+            for metric, width in (("ic", 8), ("hit_rate", 9), ("log_loss", 9))
+        ))
+
+    # The expected move is ranked across symbols, so it is judged on IC; the probability on log loss
+    ridge_alpha = max(args.alphas, key=lambda a: -np.inf if summary[a]["ic"] is None else summary[a]["ic"])
+    logistic_alpha = min(args.alphas, key=lambda a: np.inf if summary[a]["log_loss"] is None else summary[a]["log_loss"])
+    metadata = {
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "symbols": list(matrix.symbols),
+        "first_day": time.strftime("%Y-%m-%d", time.gmtime(int(matrix.timestamp[0]))),
+        "last_day": time.strftime("%Y-%m-%d", time.gmtime(int(matrix.timestamp[-1]))),
+        "news_mentions": matched,
+        "ridge_alpha": ridge_alpha,
+        "logistic_alpha": logistic_alpha,
+        "validation": {
+            "folds": [
+                {"fold": fold, "train_end": splits[fold][0], "test_days": splits[fold][2] - splits[fold][1], **metrics}
+                for fold, alpha, metrics in results if alpha == ridge_alpha
+            ],
+            "ic": summary[ridge_alpha]["ic"],
+            "hit_rate": summary[ridge_alpha]["hit_rate"],
+            "log_loss": summary[logistic_alpha]["log_loss"]
+        }
+    }
+    model = fit(x, y, ridge_alpha, logistic_alpha, args.horizon, metadata=metadata)
+    version = artifact_version({"mean": model.mean, "scale": model.scale, "ridge": model.ridge, "logistic": model.logistic})
+    model = replace(model, version=version)
+    path = model.save(args.model_dir)
+    print(f"ridge alpha {ridge_alpha:g}, logistic alpha {logistic_alpha:g}; saved {version} to {os.path.abspath(path)} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Backtest sweep over the signals behind /predictions
+
+Replays the changes /predictions would have reported on each past day
+against fixture price history, sweeping horizon, neutral threshold,
+smoothing and rebalance frequency on a process pool. The trained model's
+signal is walk-forward: SignalModel is refit on each fold's past and only
+scores that fold's test block. The EMA crossover used without a model,
+news sentiment when the analysis cache has any, and optionally recorded
+/predictions output have nothing to fit and are replayed as they are.
+Prints sweep throughput against a serial run and the best configurations
+by rank IC. Fully offline. Run from the server directory:
+
+    python -m benchmarks.bench_backtest [--symbols 42] [--years 10] [--workers 4] [--predictions saved.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from src.services.backtest import (
+    config_grid,
+    ema_crossover_signal,
+    predictions_signal,
+    run_backtest,
+    sentiment_signal,
+    sweep,
+    walk_forward_model_signal,
+)
+from src.services.indicators import IndicatorEngine
+from src.services.price_history import DAY_SECONDS, FIXTURE_ANCHOR_DAY, FixtureHistoryProvider, PriceMatrix
+from src.services.signal_model import build_features
+from src.services.symbol_registry import SymbolRegistry
+
+HORIZONS = (1, 2, 5, 10, 20)
+THRESHOLDS = (0.0, 0.1, 0.25, 0.5, 1.0)
+SMOOTHINGS = (1, 3, 5, 10)
+REBALANCES = (1, 5, 10)
+SERIAL_SAMPLE = 20
+# Walk-forward settings for the model signal, matching model_train's defaults
+MODEL_HORIZON = 5
+MODEL_FOLDS = 5
+MODEL_MIN_TRAIN = 250
+
+
+def make_matrix(symbols, years):
+    provider = FixtureHistoryProvider(today=FIXTURE_ANCHOR_DAY * DAY_SECONDS)
+    bars = provider.fetch(symbols, (FIXTURE_ANCHOR_DAY - 365 * years) * DAY_SECONDS)
+    columns = {
+        column: np.vstack([getattr(bars[symbol], column) for symbol in symbols])
+        for column in ("open", "high", "low", "close", "volume")
+    }
+    return PriceMatrix(symbols=tuple(symbols), timestamp=bars[symbols[0]].timestamp, **columns)
+
+
+def cached_news(registry, matrix):
+    """Sentiment from the agent's analysis cache, the same features model training uses"""
+    agent_path = os.path.join(os.path.dirname(__file__), "../../agent/src")
+    if agent_path not in sys.path:
+        sys.path.append(agent_path)
+    from model_train import news_features
+    return news_features(registry, matrix.symbols, matrix.timestamp)
+
+
+def load_predictions(path):
+    """Prediction records from a saved /predictions response or list of snapshots"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    records = []
+    for item in data if isinstance(data, list) else [data]:
+        records.extend(item.get("predictions", [item]))
+    return records
+
+
+def fmt(value, spec):
+    return "-" if value is None else format(value, spec)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=0, help="synthetic universe size; 0 uses the NSE registry")
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--predictions", help="JSON of recorded /predictions output to replay as well")
+    parser.add_argument("--alpha", type=float, default=100.0, help="ridge strength for the walk-forward model signal")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--min-calls", type=int, default=500, help="leave thinly traded configs out of the ranking")
+    args = parser.parse_args()
+
+    registry = SymbolRegistry.from_file()
+    symbols = [f"SYM{i}" for i in range(args.symbols)] if args.symbols else list(registry.symbols("NSE"))
+    matrix = make_matrix(symbols, args.years)
+    series, _ = IndicatorEngine().compute(matrix)
+
+    sentiment, mentions, matched = cached_news(registry, matrix)
+    signals = {
+        "ema_crossover": ema_crossover_signal(series),
+        "model": walk_forward_model_signal(
+            build_features(series, matrix.close, sentiment, mentions),
+            matrix.close,
+            MODEL_HORIZON,
+            args.alpha,
+            MODEL_FOLDS,
+            min(MODEL_MIN_TRAIN, matrix.shape[1] // 2)
+        )
+    }
+    if matched:
+        signals["news_sentiment"] = sentiment_signal(sentiment, mentions)
+    if args.predictions:
+        signals["recorded"] = predictions_signal(load_predictions(args.predictions), matrix.symbols, matrix.timestamp)
+
+    configs = config_grid(signals, HORIZONS, THRESHOLDS, SMOOTHINGS, REBALANCES)
+    print(f"{matrix.shape[0]} symbols x {matrix.shape[1]} days, signals: {', '.join(signals)}; {len(configs)} configs")
+
+    # One untimed run pays the lazy imports before the clock starts
+    run_backtest(signals[configs[0].signal], matrix.close, configs[0])
+    sample = configs[::max(1, len(configs) // SERIAL_SAMPLE)]
+    started = time.perf_counter()
+    for config in sample:
+        run_backtest(signals[config.signal], matrix.close, config)
+    serial = (time.perf_counter() - started) / len(sample) * len(configs)
+    print(f"{'one by one (scaled)':>20}: {serial:8.2f} s")
+
+    started = time.perf_counter()
+    results = sweep(signals, matrix.close, configs, workers=args.workers)
+    parallel = time.perf_counter() - started
+    print(f"{f'sweep, {args.workers} workers':>20}: {parallel:8.2f} s  ({len(configs) / parallel:.0f} configs/s)")
+
+    print()
+    print(f"{'signal':>15} {'h':>3} {'thr':>5} {'ema':>4} {'reb':>4} {'hit':>6} {'ic':>7} {'ic_ir':>6} {'turn':>6} {'ann':>7} {'sharpe':>7}")
+    ranked = sorted(
+        (r for r in results if r["calls"] >= args.min_calls),
+        key=lambda r: -np.inf if r["ic"] is None else r["ic"],
+        reverse=True
+    )
+    for r in ranked[:args.top]:
+        print(
+            f"{r['signal']:>15} {r['horizon']:>3} {r['threshold']:>5g} {r['smoothing']:>4} {r['rebalance']:>4} "
+            f"{fmt(r['hit_rate'], '.3f'):>6} {fmt(r['ic'], '.4f'):>7} {fmt(r['ic_ir'], '.3f'):>6} "
+            f"{r['turnover']:>6.3f} {fmt(r['annual_return'], '.2%'):>7} {fmt(r['sharpe'], '.2f'):>7}"
+        )
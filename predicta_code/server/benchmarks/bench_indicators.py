@@ -0,0 +1,85 @@
+"""
+Benchmark for the indicator engine on 1,000 symbols x 10 years of daily bars
+
+Times the full batch over the (symbols, days) matrix, then the incremental
+path that folds in one new bar for every symbol. A per-symbol pandas loop
+over a sample of the universe gives the baseline, scaled to the full size.
+Bars come from the offline fixture provider. Run from the server directory:
+
+    python -m benchmarks.bench_indicators
+"""
+import time
+
+import numpy as np
+
+from src.services.indicators import IndicatorEngine
+from src.services.price_history import DAY_SECONDS, FIXTURE_ANCHOR_DAY, FixtureHistoryProvider, PriceMatrix
+
+SYMBOLS = 1000
+YEARS = 10
+PANDAS_SAMPLE = 50
+INCREMENTAL_BARS = 250
+
+
+def make_matrix(symbols, years):
+    provider = FixtureHistoryProvider(today=FIXTURE_ANCHOR_DAY * DAY_SECONDS)
+    names = [f"SYM{i}" for i in range(symbols)]
+    bars = provider.fetch(names, (FIXTURE_ANCHOR_DAY - 365 * years) * DAY_SECONDS)
+    columns = {
+        column: np.vstack([getattr(bars[name], column) for name in names])
+        for column in ("open", "high", "low", "close", "volume")
+    }
+    return PriceMatrix(symbols=tuple(names), timestamp=bars[names[0]].timestamp, **columns)
+
+
+def pandas_indicators(close, high, low):
+    """The same indicators computed one symbol at a time with pandas"""
+    import pandas as pd
+    c, h, l = pd.Series(close), pd.Series(high), pd.Series(low)
+    result = {
+        "sma_20": c.rolling(20).mean(),
+        "sma_50": c.rolling(50).mean(),
+        "ema_12": c.ewm(span=12, adjust=False, min_periods=12).mean(),
+        "ema_26": c.ewm(span=26, adjust=False, min_periods=26).mean()
+    }
+    macd = result["ema_12"] - result["ema_26"]
+    result["macd_signal"] = macd.ewm(span=9, adjust=False, min_periods=9).mean()
+    delta = c.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+    loss = (-delta).clip(lower=0).ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+    result["rsi"] = 100 - 100 / (1 + gain / loss)
+    result["bollinger_std"] = c.rolling(20).std(ddof=0)
+    previous = c.shift()
+    true_range = pd.concat([h - l, (h - previous).abs(), (l - previous).abs()], axis=1).max(axis=1)
+    result["atr"] = true_range.ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+    result["volatility"] = np.log(c / previous).rolling(20).std() * np.sqrt(252)
+    return result
+
+
+if __name__ == "__main__":
+    matrix = make_matrix(SYMBOLS, YEARS)
+    symbols, days = matrix.shape
+    print(f"{symbols} symbols x {days} days ({symbols * days / 1e6:.1f}M bars)")
+    engine = IndicatorEngine()
+
+    started = time.perf_counter()
+    for row in range(PANDAS_SAMPLE):
+        pandas_indicators(matrix.close[row], matrix.high[row], matrix.low[row])
+    pandas_seconds = (time.perf_counter() - started) * symbols / PANDAS_SAMPLE
+    print(f"{'per-symbol pandas (scaled)':>28}: {pandas_seconds:8.3f} s")
+
+    started = time.perf_counter()
+    series, state = engine.compute(matrix)
+    batch_seconds = time.perf_counter() - started
+    print(f"{'vectorized batch':>28}: {batch_seconds:8.3f} s  ({len(series)} indicators)")
+
+    # Fold extra bars in one at a time, as a daily update would
+    extra = make_matrix(SYMBOLS, 1)
+    started = time.perf_counter()
+    for day in range(INCREMENTAL_BARS):
+        state.push(
+            int(matrix.timestamp[-1]) + (day + 1) * DAY_SECONDS,
+            extra.open[:, day], extra.high[:, day], extra.low[:, day], extra.close[:, day]
+        )
+    per_bar = (time.perf_counter() - started) / INCREMENTAL_BARS
+    print(f"{'incremental, one bar':>28}: {per_bar * 1e3:8.3f} ms for all {symbols} symbols")
@@ -0,0 +1,91 @@
+"""
+Benchmark for model scoring under concurrent /predictions load
+
+Simulates many dashboard requests arriving together, each needing forecasts
+for a full exchange. Compares scoring one symbol at a time, one vectorized
+call per request, and the micro-batching predictor that folds concurrent
+requests into a single call. In the server /predictions reads snapshots,
+so this load pattern only arises from concurrent snapshot refreshes (every
+configured key refreshes together) and ``fresh`` requests; it is an upper
+bound on what batching buys there. Uses a randomly weighted model saved to
+a temporary directory, so no trained artifact is needed. Run from the server
+directory:
+
+    python -m benchmarks.bench_inference [--requests 2000] [--concurrency 200] [--symbols 42]
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+
+import numpy as np
+
+from src.services.inference import BatchingPredictor, Histogram, LATENCY_BOUNDS_MS
+from src.services.signal_model import FEATURES, SignalModel
+
+
+def random_model(rng):
+    width = len(FEATURES)
+    return SignalModel(
+        version="bench",
+        features=FEATURES,
+        horizon=5,
+        mean=rng.normal(size=width),
+        scale=rng.uniform(0.5, 2.0, width),
+        ridge=rng.normal(size=width + 1),
+        logistic=rng.normal(size=width + 1)
+    )
+
+
+async def run(score, requests, concurrency, features):
+    """Issue ``requests`` calls with at most ``concurrency`` in flight; returns seconds and latencies"""
+    latency = Histogram(LATENCY_BOUNDS_MS)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await score(features)
+            latency.observe((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return time.perf_counter() - started, latency
+
+
+async def main(args):
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(args.symbols, len(FEATURES)))
+    with tempfile.TemporaryDirectory() as root:
+        random_model(rng).save(root)
+        predictor = BatchingPredictor(root, window=args.window / 1000)
+        model = predictor.load()
+
+        async def per_symbol(rows):
+            # Each symbol scored on its own, yielding like the old per-symbol await
+            for row in rows:
+                model.predict(row[None, :])
+                await asyncio.sleep(0)
+
+        async def per_request(rows):
+            model.predict(rows)
+            await asyncio.sleep(0)
+
+        print(f"{args.requests} requests x {args.symbols} symbols, {args.concurrency} in flight")
+        print(f"{'path':>14} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+        for label, score in (("per-symbol", per_symbol), ("per-request", per_request), ("micro-batched", predictor.predict)):
+            seconds, latency = await run(score, args.requests, args.concurrency, features)
+            print(f"{label:>14} {args.requests / seconds:>10.0f} {latency.percentile(50):>8.2f} {latency.percentile(99):>8.2f}")
+
+        batches = predictor.stats()
+        print(f"micro-batches: {batches['batch_rows']['count']}, "
+              f"mean {batches['batch_requests']['mean']:.1f} requests / {batches['batch_rows']['mean']:.0f} rows each")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--symbols", type=int, default=42)
+    parser.add_argument("--window", type=float, default=2.0, help="batching window in milliseconds")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,84 @@
+"""
+Benchmark for cold quote loading: per-symbol lookups against batched fetches
+
+The per-symbol path mirrors the old pipeline: one provider call per symbol,
+run concurrently on the shared fetch engine. The batched path goes through
+the quote cache and BatchingQuoteLoader, which folds the misses into one
+provider call. Offline, both use the fixture provider with a simulated
+round-trip latency; pass --live to compare Ticker.info with yf.download.
+Run from the server directory:
+
+    python -m benchmarks.bench_quotes [--live] [--latency 0.25]
+"""
+import argparse
+import asyncio
+import time
+
+from src.routes.stock_data import symbol_registry
+from src.services.fetch_engine import FetchEngine
+from src.services.quote_cache import QuoteCache
+from src.services.quotes import (
+    BatchingQuoteLoader,
+    FixtureQuoteProvider,
+    YFinanceDownloadProvider,
+    YFinanceInfoProvider,
+)
+
+
+class CountingProvider:
+    """Wraps a provider to count upstream calls"""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.name = provider.name
+        self.calls = 0
+
+    def fetch(self, symbols):
+        self.calls += 1
+        return self.provider.fetch(symbols)
+
+
+async def per_symbol(provider, symbols):
+    engine = FetchEngine()
+    try:
+        results = await engine.fetch_all(symbols, lambda symbol: provider.fetch([symbol]).price_of(symbol))
+    finally:
+        engine.shutdown()
+    return sum(1 for result in results.values() if result.ok and result.value is not None)
+
+
+async def batched(provider, symbols):
+    engine = FetchEngine()
+    try:
+        cache = QuoteCache()
+        loader = BatchingQuoteLoader(provider, engine)
+        results = await cache.get_many(symbols, loader)
+    finally:
+        engine.shutdown()
+    return sum(1 for result in results.values() if result.ok and result.value is not None)
+
+
+def timed(fn, provider, symbols):
+    started = time.perf_counter()
+    priced = asyncio.run(fn(provider, symbols))
+    return time.perf_counter() - started, priced
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--live", action="store_true", help="hit Yahoo Finance instead of the fixture")
+    parser.add_argument("--latency", type=float, default=0.25, help="simulated seconds per fixture call")
+    args = parser.parse_args()
+
+    symbols = list(symbol_registry.symbols("NSE"))
+    if args.live:
+        old, new = CountingProvider(YFinanceInfoProvider()), CountingProvider(YFinanceDownloadProvider())
+    else:
+        old = CountingProvider(FixtureQuoteProvider(latency=args.latency))
+        new = CountingProvider(FixtureQuoteProvider(latency=args.latency))
+
+    print(f"{len(symbols)} symbols, {'live' if args.live else f'fixture with {args.latency}s per call'}")
+    print(f"{'path':>12} {'seconds':>10} {'calls':>8} {'priced':>8}")
+    for label, fn, provider in (("per-symbol", per_symbol, old), ("batched", batched, new)):
+        seconds, priced = timed(fn, provider, symbols)
+        print(f"{label:>12} {seconds:>10.3f} {provider.calls:>8} {priced:>8}")
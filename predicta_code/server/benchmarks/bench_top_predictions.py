@@ -0,0 +1,83 @@
+"""
+Benchmark for /top-predictions currency conversion and formatting
+
+Compares the old per-row convert/format loop with the batched column path
+as the universe grows. Run from the server directory:
+
+    python -m benchmarks.bench_top_predictions
+"""
+import random
+import time
+
+from src.routes.stock_data import (
+    build_stock_records,
+    build_top_predictions,
+    convert_currency,
+    format_currency,
+)
+from src.services.instrument_store import InstrumentStore
+
+SIZES = (100, 1000, 10000)
+REPEATS = 5
+CURRENCY = "EUR"
+
+
+def make_universe(size):
+    """Synthetic universe built by cycling the dummy stocks with jittered numbers"""
+    stocks = build_stock_records()
+    records = []
+    for i in range(size):
+        base = stocks[i % len(stocks)]
+        records.append({
+            **base,
+            "symbol": f"{base['symbol'].split('.')[0]}{i}.NR",
+            "currentPrice": round(base["currentPrice"] * random.uniform(0.5, 1.5), 2),
+            "marketCap": base["marketCap"] * random.uniform(0.5, 1.5)
+        })
+    return records
+
+
+def per_row(records, currency):
+    """The original loop: one conversion and three format calls per stock"""
+    predictions = []
+    for stock in records:
+        current_price = convert_currency(stock["currentPrice"], "USD", currency)
+        market_cap = convert_currency(stock["marketCap"], "USD", currency)
+        target_price = current_price * random.uniform(0.9, 1.1)
+        predictions.append({
+            "symbol": stock["symbol"],
+            "currentPrice": current_price,
+            "currentPriceFormatted": format_currency(current_price, currency),
+            "prediction": {
+                "prediction": random.choice(["BULLISH", "BEARISH", "NEUTRAL"]),
+                "confidence": round(random.uniform(0.6, 0.95), 2),
+                "target_price": target_price,
+                "target_price_formatted": format_currency(target_price, currency)
+            },
+            "marketCap": market_cap,
+            "marketCapFormatted": format_currency(market_cap, currency)
+        })
+    predictions.sort(key=lambda x: float(x["prediction"]["confidence"]), reverse=True)
+    return predictions
+
+
+def best_of(fn, *args):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    print(f"{'rows':>8} {'per-row ms':>12} {'batched ms':>12} {'per-row us/row':>15} {'batched us/row':>15}")
+    for size in SIZES:
+        records = make_universe(size)
+        store = InstrumentStore(records)
+        loop_time = best_of(per_row, records, CURRENCY)
+        batch_time = best_of(build_top_predictions, store, CURRENCY)
+        print(
+            f"{size:>8} {loop_time * 1e3:>12.2f} {batch_time * 1e3:>12.2f} "
+            f"{loop_time / size * 1e6:>15.2f} {batch_time / size * 1e6:>15.2f}"
+        )
@@ -0,0 +1,63 @@
+"""
+Import-time profile for the API worker
+
+Imports a module in a fresh interpreter with ``-X importtime`` and reports
+the cumulative cost per module, slowest first. Run from the server directory:
+
+    python -m benchmarks.profile_imports [module] [--top N]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile(module):
+    """Return (self_us, cumulative_us, depth, name) for every module imported"""
+    env = dict(os.environ, PREDICTA_WARMUP="false")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((int(self_us), int(cumulative_us), len(indent) // 2, name))
+    return rows
+
+
+def top_level_costs(rows):
+    """Cumulative cost of each top-level package, the unit worth deferring"""
+    totals = {}
+    for self_us, _, _, name in rows:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("module", nargs="?", default="src.main")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = profile(args.module)
+    total = next((cumulative for _, cumulative, _, name in rows if name == args.module), 0)
+    print(f"Importing {args.module}: {total / 1000:.1f} ms\n")
+
+    print(f"{'package':<32} {'ms':>9} {'share':>7}")
+    for package, cost in top_level_costs(rows)[:args.top]:
+        print(f"{package:<32} {cost / 1000:>9.1f} {cost / total * 100 if total else 0:>6.1f}%")
+
+    print(f"\n{'module (cumulative)':<48} {'ms':>9}")
+    for _, cumulative, _, name in sorted(rows, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"{name:<48} {cumulative / 1000:>9.1f}")
@@ -1,25 +1,49 @@
+from dotenv import load_dotenv
+
+# Load environment variables first: services read their PREDICTA_* settings at import
+load_dotenv()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from .routes import stock_data, news, predictions, chatbot
-from dotenv import load_dotenv
+from .services.clients import clients
+import asyncio
 import os
-import yfinance as yf
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-import requests
-from bs4 import BeautifulSoup
-import json
-import openai
-from openai import OpenAI
-
-# Load environment variables
-load_dotenv()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+# Heavy dependencies are loaded in the background after startup instead of at import
+WARMUP = os.getenv("PREDICTA_WARMUP", "true").lower() == "true"
+
+def warmup():
+    """Import slow dependencies and build upstream clients ahead of the first request"""
+    import yfinance  # noqa: F401
+    predictions.load_ai_model()
+    if os.getenv('OPENAI_API_KEY'):
+        clients.openai
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared upstream clients are opened once and reused by every router
+    await clients.startup()
+    warmup_task = asyncio.create_task(asyncio.to_thread(warmup)) if WARMUP else None
+    # The model artifact is mapped once per worker; its pages are shared across workers
+    predictions.predictor.load()
+    # Keep prediction snapshots warm in the background
+    predictions.snapshot_scheduler.start()
+    stock_data.fx_service.start()
+    stock_data.history_updater.start()
+    news.news_ingestor.start()
+    yield
+    if warmup_task is not None:
+        await asyncio.gather(warmup_task, return_exceptions=True)
+    await news.news_ingestor.stop()
+    await stock_data.history_updater.stop()
+    await stock_data.fx_service.stop()
+    await predictions.snapshot_scheduler.stop()
+    predictions.fetch_engine.shutdown()
+    await clients.aclose()
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -1,28 +1,22 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
-import openai
-from openai import OpenAI
+import json
+import time
 import os
 from dotenv import load_dotenv
+from ..services.response_cache import ResponseCache
+from ..services.conversations import Conversation, ConversationManager, PreparedPrompt
+from ..services.clients import get_openai_client
 
 # Load environment variables
 load_dotenv()
 
 router = APIRouter()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-
-class ChatMessage(BaseModel):
-    message: str
-    context: Optional[dict] = None
-
-@router.post("/chat")
-async def chat(message: ChatMessage):
-    try:
-        # Prepare the system message with context about Predicta
-        system_message = """You are an AI assistant for Predicta, a platform that provides stock market predictions and analysis.
+# System message with context about Predicta
+SYSTEM_MESSAGE = """You are an AI assistant for Predicta, a platform that provides stock market predictions and analysis.
         You can help users with:
         1. Stock market analysis and predictions
         2. News and market sentiment analysis
@@ -30,21 +24,187 @@ async def chat(message: ChatMessage):
         4. Technical analysis and trading strategies
         
         Always provide accurate, helpful, and concise responses. If you're not sure about something, say so."""
-        
+
+# Repeat questions are answered from memory instead of a full GPT-4 round trip
+response_cache = ResponseCache()
+
+SUMMARY_MODEL = os.getenv("PREDICTA_CHAT_SUMMARY_MODEL", "gpt-3.5-turbo")
+
+async def summarize_turns(client, previous_summary: Optional[str], turns: list) -> str:
+    """Fold trimmed turns into the rolling conversation summary, on the request's shared OpenAI client"""
+    transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+    response = await client.chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=[
+            {"role": "system", "content": "Summarize this conversation between a user and the Predicta assistant in at most five sentences. Keep stock symbols, figures and the user's goals."},
+            {"role": "user", "content": f"Earlier summary: {previous_summary or 'none'}\n\nNew messages:\n{transcript}"}
+        ],
+        temperature=0.2,
+        max_tokens=200
+    )
+    return response.choices[0].message.content
+
+# Multi-turn history lives on the server and is trimmed to a token budget
+conversations = ConversationManager(
+    summarize=summarize_turns if os.getenv("PREDICTA_CHAT_SUMMARIZE", "false").lower() == "true" else None
+)
+
+class ChatMessage(BaseModel):
+    message: str
+    context: Optional[dict] = None
+    conversation_id: Optional[str] = None
+
+def user_content(message: ChatMessage) -> str:
+    """User turn as sent upstream, with any client context attached"""
+    if not message.context:
+        return message.message
+    return f"{message.message}\n\nContext: {json.dumps(message.context)}"
+
+def usage_report(prompt: PreparedPrompt, usage, latency: float) -> dict:
+    """Token usage and latency for one chat request"""
+    report = {
+        "estimated_prompt_tokens": prompt.prompt_tokens,
+        "history_tokens": prompt.history_tokens,
+        "dropped_turns": prompt.dropped_turns,
+        "latency_ms": round(latency * 1000, 1)
+    }
+    if usage is not None:
+        details = getattr(usage, "prompt_tokens_details", None)
+        report.update({
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+            "cached_prompt_tokens": getattr(details, "cached_tokens", None) or 0
+        })
+    return report
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Encode one Server-Sent Event"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+def cacheable(message: ChatMessage, conversation: Conversation) -> bool:
+    """Only context-free opening questions share answers across users"""
+    return not message.context and not conversation.turns
+
+def record_turn(conversation: Conversation, message: ChatMessage, reply: str):
+    conversations.append(conversation, "user", user_content(message))
+    conversations.append(conversation, "assistant", reply)
+
+@router.get("/chat/cache")
+async def get_chat_cache_stats():
+    """Get response cache counters and the hashed keys of the most reused entries"""
+    return {
+        **response_cache.stats(),
+        "top_entries": response_cache.top_entries(),
+        "conversations": conversations.stats()
+    }
+
+@router.post("/chat")
+async def chat(message: ChatMessage, client=Depends(get_openai_client)):
+    try:
+        conversation = conversations.get_or_create(message.conversation_id)
+        if cacheable(message, conversation):
+            cached = response_cache.get(message.message, SYSTEM_MESSAGE)
+            if cached:
+                record_turn(conversation, message, cached.response)
+                return {
+                    "response": cached.response,
+                    "cached": cached.match,
+                    "conversation_id": conversation.id
+                }
+
+        prompt = await conversations.prepare(conversation, SYSTEM_MESSAGE, user_content(message), client)
+
         # Create the chat completion
-        response = client.chat.completions.create(
+        started = time.perf_counter()
+        response = await client.chat.completions.create(
             model="gpt-4",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": message.message}
-            ],
+            messages=prompt.messages,
             temperature=0.7,
             max_tokens=500
         )
+        latency = time.perf_counter() - started
+        
+        content = response.choices[0].message.content
+        if cacheable(message, conversation) and content:
+            response_cache.put(message.message, SYSTEM_MESSAGE, content)
+        record_turn(conversation, message, content or "")
         
         return {
-            "response": response.choices[0].message.content
+            "response": content,
+            "conversation_id": conversation.id,
+            "usage": usage_report(prompt, response.usage, latency)
         }
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/chat/stream")
+async def chat_stream(message: ChatMessage, request: Request, client=Depends(get_openai_client)):
+    """Stream the reply as Server-Sent Events, one event per token delta"""
+    conversation = conversations.get_or_create(message.conversation_id)
+    cached = response_cache.get(message.message, SYSTEM_MESSAGE) if cacheable(message, conversation) else None
+    if cached:
+        record_turn(conversation, message, cached.response)
+
+        async def cached_events():
+            yield sse_event({"delta": cached.response})
+            yield sse_event({"cached": cached.match, "conversation_id": conversation.id}, event="done")
+
+        return StreamingResponse(cached_events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    try:
+        prompt = await conversations.prepare(conversation, SYSTEM_MESSAGE, user_content(message), client)
+        started = time.perf_counter()
+        stream = await client.chat.completions.create(
+            model="gpt-4",
+            messages=prompt.messages,
+            temperature=0.7,
+            max_tokens=500,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def events():
+        parts = []
+        usage = None
+        first_token_at = None
+        try:
+            async for chunk in stream:
+                # Stop paying for tokens nobody will read
+                if await request.is_disconnected():
+                    break
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    parts.append(delta)
+                    yield sse_event({"delta": delta})
+            else:
+                reply = "".join(parts)
+                # Only complete replies are worth caching
+                if cacheable(message, conversation) and reply:
+                    response_cache.put(message.message, SYSTEM_MESSAGE, reply)
+                record_turn(conversation, message, reply)
+                report = usage_report(prompt, usage, time.perf_counter() - started)
+                if first_token_at is not None:
+                    report["time_to_first_token_ms"] = round((first_token_at - started) * 1000, 1)
+                yield sse_event({"conversation_id": conversation.id, "usage": report}, event="done")
+        except Exception as e:
+            yield sse_event({"detail": str(e)}, event="error")
+        finally:
+            # Closing the stream aborts the upstream request if it is still running
+            await stream.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
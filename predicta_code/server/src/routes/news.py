@@ -1,14 +1,17 @@
-from fastapi import APIRouter, HTTPException
-from typing import Optional
-import requests
-from datetime import datetime, timedelta
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import Optional, Tuple
+from datetime import datetime, timedelta, timezone
 import json
 import os
+from ..services.news_fetcher import NewsFetcher, QuotaExceeded
+from ..services.news_ingest import NewsIngestor, ingest_keys_from_env
+from ..services.news_store import NewsStore
+from .stock_data import symbol_registry
 
 router = APIRouter()
 
 # You'll need to get an API key from NewsAPI.org
-NEWS_API_KEY = "YOUR_NEWS_API_KEY"  # Replace with your actual API key
+NEWS_API_KEY = os.getenv("NEWS_API_KEY", "YOUR_NEWS_API_KEY")  # Replace with your actual API key
 
 # Load capital cities data
 def load_capital_cities():
@@ -20,77 +23,134 @@ def load_capital_cities():
 
 CAPITAL_CITIES = load_capital_cities()
 
+# Every NewsAPI query goes through one quota-aware fetcher
+news_fetcher = NewsFetcher(api_key=NEWS_API_KEY)
+
+# Map exchanges to their respective countries for better news filtering
+EXCHANGE_COUNTRIES = {
+    "NSE": "ke",  # Kenya
+    "NYSE": "us",  # United States
+    "NASDAQ": "us",  # United States
+    "LSE": "gb",  # United Kingdom
+    "TSE": "jp",  # Japan
+    "SSE": "cn"  # China
+}
+
+def validate_market(exchange: str, country: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """Canonical (exchange, country) for a request; unknown exchanges or countries raise ValueError"""
+    exchange = exchange.upper()
+    if exchange not in EXCHANGE_COUNTRIES and exchange not in symbol_registry.exchanges:
+        raise ValueError(f"Unknown exchange: {exchange}")
+    if country is None or country.lower() == "all":
+        return exchange, None
+    country = country.lower()
+    if country not in CAPITAL_CITIES and country not in EXCHANGE_COUNTRIES.values():
+        raise ValueError(f"Unknown country: {country}")
+    return exchange, country
+
+def resolve_country_code(exchange: str, country: Optional[str] = None) -> str:
+    """Country code news is filed under; a missing country means the same as All"""
+    if country is None or country == "All":
+        return EXCHANGE_COUNTRIES.get(exchange, "us")
+    return country
+
+def build_news_query(exchange: str, country: Optional[str] = None) -> dict:
+    """NewsAPI parameters for an exchange and optional country, without the API key"""
+    all_countries = country is None or country == "All"
+    country_code = resolve_country_code(exchange, country)
+
+    # Get capital city if available
+    capital_city = CAPITAL_CITIES.get(country_code, "")
+
+    # Calculate date range (last 7 days)
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=7)
+
+    # Construct search query based on selections
+    search_terms = [exchange]
+
+    if not all_countries:
+        search_terms.append(country)
+        if capital_city:
+            search_terms.append(capital_city)
+
+    # Add stock market related terms
+    search_terms.extend(["stock market", "trading", "investments"])
+
+    return {
+        "q": " OR ".join(search_terms),
+        "language": "en",
+        "from": start_date.strftime("%Y-%m-%d"),
+        "to": end_date.strftime("%Y-%m-%d"),
+        "sortBy": "publishedAt",
+        "pageSize": 10  # Limit to 10 most relevant articles
+    }
+
+# Articles are ingested incrementally into a local store and served from there
+news_store = NewsStore()
+news_ingestor = NewsIngestor(
+    news_fetcher,
+    news_store,
+    build_query=build_news_query,
+    resolve_country=resolve_country_code,
+    keys=ingest_keys_from_env()
+)
+
+def recent_articles(exchange: str, country: Optional[str] = None, days: int = 7, limit: int = 10):
+    """Newest stored articles for an exchange/country from the last few days"""
+    since = (datetime.now() - timedelta(days=days)).timestamp()
+    return news_store.recent(resolve_country_code(exchange, country), since=since, limit=limit)
+
+@router.get("/news/stats")
+async def get_news_stats():
+    return {
+        **news_fetcher.stats(),
+        "ingestion": news_ingestor.stats()
+    }
+
+def epoch_seconds(value: Optional[datetime]) -> Optional[float]:
+    """Epoch seconds for a query timestamp; naive values are taken as UTC"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
 @router.get("/news")
 async def get_news(
+    response: Response,
     exchange: str,
-    country: Optional[str] = None
+    country: Optional[str] = None,
+    before: Optional[datetime] = None,
+    after: Optional[datetime] = None,
+    source: Optional[str] = None,
+    keyword: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None
 ):
+    """Stored news for an exchange, newest first, with time-window and cursor pagination"""
     try:
-        # Map exchanges to their respective countries for better news filtering
-        exchange_countries = {
-            "NSE": "ke",  # Kenya
-            "NYSE": "us",  # United States
-            "NASDAQ": "us",  # United States
-            "LSE": "gb",  # United Kingdom
-            "TSE": "jp",  # Japan
-            "SSE": "cn"  # China
-        }
-
-        # Get the country code for the selected exchange
-        country_code = country if country != "All" else exchange_countries.get(exchange, "us")
-        
-        # Get capital city if available
-        capital_city = CAPITAL_CITIES.get(country_code, "")
-        
-        # Calculate date range (last 7 days)
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=7)
-
-        # Construct search query based on selections
-        search_terms = [exchange]
-        
-        if country != "All":
-            search_terms.append(country)
-            if capital_city:
-                search_terms.append(capital_city)
-        
-        # Add stock market related terms
-        search_terms.extend(["stock market", "trading", "investments"])
-        
-        # Construct the NewsAPI URL
-        url = f"https://newsapi.org/v2/everything"
-        params = {
-            "q": " OR ".join(search_terms),
-            "language": "en",
-            "from": start_date.strftime("%Y-%m-%d"),
-            "to": end_date.strftime("%Y-%m-%d"),
-            "sortBy": "publishedAt",
-            "pageSize": 10,  # Limit to 10 most relevant articles
-            "apiKey": NEWS_API_KEY
-        }
-
-        # Make the request to NewsAPI
-        response = requests.get(url, params=params)
-        
-        if response.status_code != 200:
-            raise HTTPException(status_code=response.status_code, detail="Failed to fetch news")
-
-        data = response.json()
-        
-        # Format the news articles
-        formatted_news = []
-        for article in data.get("articles", []):
-            formatted_news.append({
-                "title": article.get("title", ""),
-                "description": article.get("description", ""),
-                "url": article.get("url", ""),
-                "publishedAt": article.get("publishedAt", ""),
-                "source": {
-                    "name": article.get("source", {}).get("name", "")
-                }
-            })
-
-        return formatted_news
-
+        exchange, country = validate_market(exchange, country)
+        await news_ingestor.ensure(exchange, country)
+        articles, next_cursor = news_store.page(
+            resolve_country_code(exchange, country),
+            before=epoch_seconds(before),
+            after=epoch_seconds(after) or 0.0,
+            cursor=cursor,
+            source=source,
+            keyword=keyword,
+            limit=limit
+        )
+        error = news_ingestor.errors.get((exchange, country))
+        if not articles and not cursor and isinstance(error, QuotaExceeded):
+            raise error
+        # Pass the cursor for the next page back in a header to keep the list response shape
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return [article.to_dict() for article in articles]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QuotaExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,15 +1,30 @@
-from fastapi import APIRouter, HTTPException
-from typing import Optional, List
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Optional, List, Tuple
 import random
-from datetime import datetime, timedelta
-import yfinance as yf
+import hmac
+from datetime import datetime, timedelta, timezone
 import sys
 import os
 import json
+import numpy as np
 from pydantic import BaseModel
+from ..services.fetch_engine import FetchEngine
+from ..services.quote_cache import QuoteCache
+from ..services.quotes import BatchingQuoteLoader, provider_from_env
+from ..services.entity_index import EntityIndex, SymbolSignal
+from ..services.inference import BatchingPredictor
+from ..services.signal_model import build_features
+from ..services.snapshots import SnapshotScheduler, SnapshotStore
+from .stock_data import indicator_book, symbol_registry
+from .news import news_ingestor, news_store, recent_articles, resolve_country_code, validate_market
 
 router = APIRouter()
 
+# Shared engine so every request draws from the same bounded worker pool
+fetch_engine = FetchEngine()
+quote_cache = QuoteCache()
+
 # Define response models
 class Prediction(BaseModel):
     symbol: str
@@ -22,128 +37,39 @@ class Prediction(BaseModel):
     opportunities: List[str]
     risks: List[str]
 
-# Try to import the AI model, with fallback
-try:
-    # Add the agent directory to the Python path
-    agent_path = os.path.join(os.path.dirname(__file__), '../../../agent/src')
-    if agent_path not in sys.path:
-        sys.path.append(agent_path)
-    
-    # Check for OpenAI API key
-    if not os.getenv("OPENAI_API_KEY"):
-        print("Warning: OPENAI_API_KEY not found in environment variables")
-        AI_MODEL_AVAILABLE = False
-    else:
-        from analyse_ai import analyze_news_urls
-        from api_news import get_news_articles
-        AI_MODEL_AVAILABLE = True
-except ImportError as e:
-    print(f"Warning: AI model not available: {str(e)}")
-    AI_MODEL_AVAILABLE = False
-except Exception as e:
-    print(f"Warning: Error initializing AI model: {str(e)}")
-    AI_MODEL_AVAILABLE = False
-
-# Define stock symbols for each exchange
-STOCK_SYMBOLS = {
-    "NSE": [
-        # Banking Sector
-        "KCB.NR",     # KCB Bank
-        "EQTY.NR",    # Equity Bank
-        "SCBK.NR",    # Standard Chartered Bank
-        "COOP.NR",    # Co-operative Bank
-        "ABSA.NR",    # Absa Bank Kenya
-        "DTB.NR",     # Diamond Trust Bank
-        "HFCK.NR",    # Housing Finance Company
-        "I&M.NR",     # I&M Bank
-        "NCBA.NR",    # NCBA Bank
-        "STANCHART.NR", # Standard Chartered Bank Kenya
-        
-        # Telecommunications
-        "SAFCOM.NR",  # Safaricom
-        "TKL.NR",     # Telkom Kenya
-        
-        # Energy & Utilities
-        "KPLC.NR",    # Kenya Power
-        "KEGN.NR",    # KenGen
-        "KPA.NR",     # Kenya Ports Authority
-        "KENGEN.NR",  # KenGen (Alternative Symbol)
-        
-        # Manufacturing & Consumer Goods
-        "EABL.NR",    # East African Breweries
-        "BAT.NR",     # British American Tobacco
-        "UNGA.NR",    # Unga Group
-        "CARB.NR",    # Carbacid Investments
-        "BAMB.NR",    # Bamburi Cement
-        "ARM.NR",     # ARM Cement
-        
-        # Insurance
-        "JUB.NR",     # Jubilee Holdings
-        "CIC.NR",     # CIC Insurance Group
-        "BRIT.NR",    # Britam Holdings
-        "LIBERTY.NR", # Liberty Holdings
-        
-        # Real Estate & Construction
-        "HASS.NR",    # Hass Petroleum
-        "SASN.NR",    # Sasini
-        "WTK.NR",     # Williamson Tea
-        "TPS.NR",     # TPS Eastern Africa
-        
-        # Media & Communication
-        "NMG.NR",     # Nation Media Group
-        "RVR.NR",     # Rift Valley Railways
-        
-        # Agriculture
-        "KAKUZI.NR",  # Kakuzi
-        "KAPCHORUA.NR", # Kapchorua Tea
-        "REA.NR",     # Rea Vipingo Plantations
-        
-        # Investment & Financial Services
-        "KMRC.NR",    # Kenya Mortgage Refinance Company
-        "KCBG.NR",    # KCB Group
-        "EQTYG.NR",   # Equity Group
-        "SCBKG.NR",   # Standard Chartered Bank Group
-        "NSE.NR",     # Nairobi Securities Exchange
-        "CABL.NR",    # East African Cables
-        "DTK.NR",     # Deacons
-        
-        # Transport & Logistics
-        "KQ.NR",      # Kenya Airways
-        "KPA.NR",     # Kenya Ports Authority
-        
-        # Technology & Innovation
-        "SAFCOM.NR",  # Safaricom (Technology Division)
-        
-        # Healthcare
-        "LAT.NR",     # Limuru Tea
-        "KQ.NR",      # Kenya Airways (Medical Division)
-        
-        # Mining & Resources
-        "ARM.NR",     # ARM Cement (Mining Division)
-        "KAKUZI.NR",  # Kakuzi (Mining Division)
-        
-        # Hospitality & Tourism
-        "TPS.NR",     # TPS Eastern Africa (Hospitality Division)
-        "KQ.NR",      # Kenya Airways (Tourism Division)
-        
-        # Retail & Distribution
-        "DTK.NR",     # Deacons (Retail Division)
-        "CARB.NR",    # Carbacid Investments (Distribution Division)
-        
-        # Industrial & Manufacturing
-        "BAMB.NR",    # Bamburi Cement (Industrial Division)
-        "UNGA.NR",    # Unga Group (Manufacturing Division)
-        
-        # Financial Technology
-        "SAFCOM.NR",  # Safaricom (M-Pesa Division)
-        "KCB.NR",     # KCB Bank (Digital Banking Division)
-        "EQTY.NR"     # Equity Bank (Digital Banking Division)
-    ]
-}
+# Add the agent directory to the Python path
+agent_path = os.path.join(os.path.dirname(__file__), '../../../agent/src')
+if agent_path not in sys.path:
+    sys.path.append(agent_path)
+
+# The AI pipeline pulls in openai, bs4 and httpx, so it is imported on first use
+_ai_model = None
+
+def load_ai_model():
+    """Import the AI model on first use, with fallback; returns None when unavailable"""
+    global _ai_model
+    if _ai_model is not None:
+        return _ai_model or None
+
+    try:
+        # Check for OpenAI API key
+        if not os.getenv("OPENAI_API_KEY"):
+            print("Warning: OPENAI_API_KEY not found in environment variables")
+            _ai_model = False
+        else:
+            from analyse_ai import analyze_news_urls
+            _ai_model = analyze_news_urls
+    except ImportError as e:
+        print(f"Warning: AI model not available: {str(e)}")
+        _ai_model = False
+    except Exception as e:
+        print(f"Warning: Error initializing AI model: {str(e)}")
+        _ai_model = False
+    return _ai_model or None
 
 def get_exchange_symbols(exchange: str) -> list:
     """Get relevant stock symbols for the selected exchange"""
-    return STOCK_SYMBOLS.get(exchange, ["AAPL", "MSFT", "GOOGL"])
+    return list(symbol_registry.symbols(exchange)) or ["AAPL", "MSFT", "GOOGL"]
 
 def get_country_name(code: str) -> str:
     """Convert country code to full name"""
@@ -156,15 +82,66 @@ def get_country_name(code: str) -> str:
     }
     return country_names.get(code, "United States")
 
-def generate_mock_prediction(symbol: str) -> Prediction:
-    """Generate a mock prediction when AI model is not available"""
+# Cache misses for individual symbols are folded into batched provider calls
+quote_provider = provider_from_env()
+load_market_price = BatchingQuoteLoader(quote_provider, fetch_engine)
+
+def technical_summary(values: dict) -> Optional[str]:
+    """One-line reading of the latest indicators, or None if they are not defined yet"""
+    if any(values.get(name) is None for name in ("close", "sma_20", "rsi", "macd_histogram", "volatility")):
+        return None
+    position = "above" if values["close"] >= values["sma_20"] else "below"
+    momentum = "positive" if values["macd_histogram"] >= 0 else "negative"
+    return (
+        f"Price is {position} its 20-day average with {momentum} MACD momentum; "
+        f"RSI {values['rsi']:.0f}, annualised volatility {values['volatility']:.0%}."
+    )
+
+# Trained offline by agent/src/model_train.py and loaded at startup; without an
+# artifact the heuristics below are used
+predictor = BatchingPredictor()
+
+async def model_forecasts(symbols: List[str], signals: Optional[Dict[str, SymbolSignal]] = None) -> Dict[str, Tuple[float, float]]:
+    """Expected move in percent and confidence in its direction per symbol with stored prices; empty without a model"""
+    signals = signals or {}
+    columns = indicator_book.latest_columns(symbols)
+    if predictor.model is None or columns is None:
+        return {}
+    features = build_features(
+        columns,
+        columns["close"],
+        sentiment=np.array([signals[symbol].sentiment if signals.get(symbol) else 0.0 for symbol in symbols]),
+        mentions=np.array([signals[symbol].articles if signals.get(symbol) else 0.0 for symbol in symbols])
+    )
+    # One submission per request; concurrent requests share a single model call
+    scores = await predictor.predict(features)
+    if scores is None:
+        return {}
+    expected, probability = scores
+    return {
+        symbol: (float(change), float(p_up if change >= 0 else 1 - p_up) * 100)
+        for symbol, close, change, p_up in zip(symbols, columns["close"], expected, probability)
+        if not np.isnan(close)
+    }
+
+def generate_mock_prediction(symbol: str, forecast: Optional[Tuple[float, float]] = None) -> Prediction:
+    """Generate a mock prediction when AI model is not available, grounded in stored prices where possible"""
+    technicals = indicator_book.latest(symbol) or {}
+    summary = technical_summary(technicals)
+    price = technicals.get("close") if summary else None
+    if forecast:
+        change, confidence = forecast
+    else:
+        # EMA crossover spread stands in for the expected move until a model has been trained
+        change = (technicals["ema_12"] / technicals["ema_26"] - 1) * 100 if summary and technicals.get("ema_26") else None
+        confidence = None
     return Prediction(
         symbol=symbol,
-        price=round(random.uniform(100, 1000), 2),
-        change=round(random.uniform(-5, 5), 2),
-        confidence=round(random.uniform(70, 95), 1),
-        timestamp=datetime.now().isoformat(),
-        analysis="Market analysis temporarily unavailable.",
+        price=round(price if price is not None else random.uniform(100, 1000), 2),
+        change=round(change if change is not None else random.uniform(-5, 5), 2),
+        confidence=round(confidence if confidence is not None else random.uniform(70, 95), 1),
+        timestamp=datetime.now(timezone.utc).isoformat(),
+        analysis=summary or "Market analysis temporarily unavailable.",
         sector_impact={
             "Technology": random.randint(1, 10),
             "Finance": random.randint(1, 10),
@@ -180,79 +157,190 @@ def generate_mock_prediction(symbol: str) -> Prediction:
         ]
     )
 
-@router.get("/predictions", response_model=List[Prediction])
-async def get_predictions(
+@router.get("/predictions/model")
+async def get_model_info():
+    """Version and validation metrics of the loaded prediction model"""
+    model = predictor.model
+    if model is None:
+        return {"loaded": False}
+    return {
+        "loaded": True,
+        "version": model.version,
+        "horizon": model.horizon,
+        "features": list(model.features),
+        **model.metadata
+    }
+
+# Admin endpoints are disabled unless a token is configured
+ADMIN_TOKEN = os.getenv("PREDICTA_ADMIN_TOKEN")
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Reject callers without the configured admin token"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@router.post("/predictions/model/reload", dependencies=[Depends(require_admin)])
+async def reload_model():
+    """Pick up a newly trained artifact without restarting"""
+    model = await run_in_threadpool(predictor.load)
+    return {"loaded": model is not None, "version": model.version if model else None}
+
+@router.get("/predictions/inference")
+async def get_inference_stats():
+    """Latency and batch-size histograms for model scoring"""
+    return predictor.stats()
+
+@router.get("/predictions/quote-cache")
+async def get_quote_cache_stats():
+    """Get hit, miss and refresh counters for the quote cache"""
+    return {
+        **quote_cache.stats(),
+        "batching": load_market_price.stats(),
+        "abandoned_lookups": fetch_engine.abandoned
+    }
+
+# Entity index per (exchange, country), keyed by the newest stored article it saw
+_news_analyses = {}
+
+async def analyze_recent_news(analyze_news_urls, exchange: str, country: Optional[str], country_name: str) -> EntityIndex:
+    """Analyze recent articles, skipping the pipeline entirely when nothing new was ingested"""
+    key = (exchange, country)
+    latest_seq = news_store.latest_seq(resolve_country_code(exchange, country))
+    previous = _news_analyses.get(key)
+    if previous is not None and previous[0] == latest_seq:
+        return previous[1]
+
+    # Articles seen before resolve from the agent's analysis cache, so only new ones reach the LLM
+    news_urls = [article.url for article in recent_articles(exchange, country)]
+    analysis_results = await run_in_threadpool(analyze_news_urls, news_urls, country_name)
+    # Index the batch once so every symbol resolves with dictionary lookups
+    entity_index = EntityIndex(analysis_results["individual_analyses"], ambiguous=symbol_registry.ambiguous_entities)
+    _news_analyses[key] = (latest_seq, entity_index)
+    return entity_index
+
+async def compute_predictions(exchange: str, country: Optional[str] = None) -> List[dict]:
+    """Run the full news, analysis and quote pipeline for an exchange"""
+    # Map exchanges to their respective countries for better filtering
+    exchange_countries = {
+        "NSE": "ke",  # Kenya
+        "NYSE": "us",  # United States
+        "NASDAQ": "us",  # United States
+        "LSE": "gb",  # United Kingdom
+        "TSE": "jp",  # Japan
+        "SSE": "cn"  # China
+    }
+
+    # Get the country code and name
+    country_code = country if country else exchange_countries.get(exchange, "us")
+    country_name = get_country_name(country_code.upper())
+    
+    # Get stock symbols for the exchange
+    symbols = get_exchange_symbols(exchange)
+    predictions = []
+    # Bring technical indicators up to date with any newly stored bars
+    await run_in_threadpool(indicator_book.refresh)
+
+    ai_model = await run_in_threadpool(load_ai_model)
+    if ai_model:
+        analyze_news_urls = ai_model
+        try:
+            # Get news articles for analysis from the incrementally ingested store
+            await news_ingestor.ensure(exchange, country)
+            entity_index = await analyze_recent_news(analyze_news_urls, exchange, country, country_name)
+            
+            # Get real-time data from Yahoo Finance for all symbols at once
+            quotes = await quote_cache.get_many(symbols, load_market_price)
+
+            # Combine every analysis that mentions a symbol, weighted by confidence
+            signals = {symbol: entity_index.aggregate(symbol_registry.entity_names(symbol)) for symbol in symbols}
+            forecasts = await model_forecasts(symbols, signals)
+            
+            for symbol in symbols:
+                try:
+                    quote = quotes[symbol]
+                    if not quote.ok:
+                        raise RuntimeError(quote.error)
+                    current_price = quote.value
+                    if current_price is None:
+                        current_price = random.uniform(100, 1000)
+                    
+                    signal = signals[symbol]
+                    if signal:
+                        # The trained model weighs the news against the technicals when available
+                        change, confidence = forecasts.get(symbol) or (signal.sentiment * 2, signal.confidence * 100)
+                        predictions.append(Prediction(
+                            symbol=symbol,
+                            price=current_price,
+                            change=round(change, 2),
+                            confidence=round(confidence, 1),
+                            timestamp=datetime.now(timezone.utc).isoformat(),
+                            analysis=signal.analysis,
+                            sector_impact=signal.sector_impact,
+                            opportunities=signal.opportunities,
+                            risks=signal.risks
+                        ))
+                    else:
+                        predictions.append(generate_mock_prediction(symbol, forecasts.get(symbol)))
+                except Exception as e:
+                    print(f"Error processing symbol {symbol}: {str(e)}")
+                    predictions.append(generate_mock_prediction(symbol, forecasts.get(symbol)))
+        except Exception as e:
+            print(f"Error with AI model: {str(e)}")
+            # Fallback to mock predictions if AI model fails
+            forecasts = await model_forecasts(symbols)
+            predictions = [generate_mock_prediction(symbol, forecasts.get(symbol)) for symbol in symbols]
+    else:
+        # Use mock predictions if AI model is not available
+        forecasts = await model_forecasts(symbols)
+        predictions = [generate_mock_prediction(symbol, forecasts.get(symbol)) for symbol in symbols]
+
+    return [prediction.model_dump() for prediction in predictions]
+
+# Snapshots are precomputed in the background so requests only read them
+snapshot_store = SnapshotStore()
+snapshot_scheduler = SnapshotScheduler(
+    snapshot_store,
+    compute_predictions,
+    keys=[validate_market(exchange) for exchange in os.getenv("PREDICTA_SNAPSHOT_EXCHANGES", "NSE").split(",") if exchange]
+)
+
+@router.get("/predictions/snapshot")
+async def get_predictions_snapshot(
     exchange: str,
-    country: Optional[str] = None
+    country: Optional[str] = None,
+    fresh: bool = False
 ):
+    """Get the latest prediction snapshot together with its version and as_of time"""
     try:
-        # Map exchanges to their respective countries for better filtering
-        exchange_countries = {
-            "NSE": "ke",  # Kenya
-            "NYSE": "us",  # United States
-            "NASDAQ": "us",  # United States
-            "LSE": "gb",  # United Kingdom
-            "TSE": "jp",  # Japan
-            "SSE": "cn"  # China
-        }
-
-        # Get the country code and name
-        country_code = country if country else exchange_countries.get(exchange, "us")
-        country_name = get_country_name(country_code.upper())
-        
-        # Get stock symbols for the exchange
-        symbols = get_exchange_symbols(exchange)
-        predictions = []
-
-        if AI_MODEL_AVAILABLE:
-            try:
-                # Get news articles for analysis
-                news_urls = get_news_articles()
-                
-                # Get AI analysis
-                analysis_results = analyze_news_urls(news_urls, country_name)
-                
-                for symbol in symbols:
-                    try:
-                        # Get real-time data from Yahoo Finance
-                        ticker = yf.Ticker(symbol)
-                        info = ticker.info
-                        current_price = info.get('regularMarketPrice', random.uniform(100, 1000))
-                        
-                        # Find relevant analysis for this symbol
-                        symbol_analysis = next(
-                            (analysis for analysis in analysis_results["individual_analyses"] 
-                             if any(symbol.lower() in str(analysis.get("key_entities", [])).lower())),
-                            None
-                        )
-                        
-                        if symbol_analysis:
-                            # Use AI analysis for the prediction
-                            predictions.append(Prediction(
-                                symbol=symbol,
-                                price=current_price,
-                                change=round(symbol_analysis.get("sentiment_score", 0) * 2, 2),
-                                confidence=round(symbol_analysis.get("confidence_score", 0.7) * 100, 1),
-                                timestamp=datetime.now().isoformat(),
-                                analysis=symbol_analysis.get("short_term_effects", "Analysis temporarily unavailable."),
-                                sector_impact=symbol_analysis.get("sector_impact", {}),
-                                opportunities=symbol_analysis.get("potential_opportunities", []),
-                                risks=symbol_analysis.get("related_risks", [])
-                            ))
-                        else:
-                            predictions.append(generate_mock_prediction(symbol))
-                    except Exception as e:
-                        print(f"Error processing symbol {symbol}: {str(e)}")
-                        predictions.append(generate_mock_prediction(symbol))
-            except Exception as e:
-                print(f"Error with AI model: {str(e)}")
-                # Fallback to mock predictions if AI model fails
-                predictions = [generate_mock_prediction(symbol) for symbol in symbols]
-        else:
-            # Use mock predictions if AI model is not available
-            predictions = [generate_mock_prediction(symbol) for symbol in symbols]
+        snapshot = await snapshot_scheduler.get(*validate_market(exchange, country), fresh=fresh)
+        return snapshot.to_dict()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        return predictions
+# The snapshot body is already serialized Prediction JSON, so no response_model re-validates it
+@router.get("/predictions")
+async def get_predictions(
+    exchange: str,
+    country: Optional[str] = None,
+    fresh: bool = False
+):
+    try:
+        # Serve the pre-rendered snapshot; only compute when missing or asked to
+        snapshot = await snapshot_scheduler.get(*validate_market(exchange, country), fresh=fresh)
+        return Response(
+            content=snapshot.body,
+            media_type="application/json",
+            headers={
+                "X-Snapshot-As-Of": snapshot.as_of.isoformat(),
+                "X-Snapshot-Version": str(snapshot.version)
+            }
+        )
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,17 +1,26 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Optional, Dict
-from datetime import datetime
+from datetime import date, datetime, timezone
 import random
 import os
 from dotenv import load_dotenv
+
+# Load environment variables before the services below read their settings
+load_dotenv()
+
 from decimal import Decimal
 from functools import lru_cache
+import numpy as np
+from ..services.instrument_store import InstrumentStore
+from ..services.currency import build_formatters
+from ..services.fx import FxService, provider_from_env
+from ..services.symbol_registry import SymbolRegistry
+from ..services.indicators import IndicatorBook
+from ..services.price_history import DAY_SECONDS, HistoryUpdater, PriceHistoryStore, day_start, history_provider_from_env
 
 router = APIRouter()
 
-# Load environment variables
-load_dotenv()
-
 # Supported currencies with their display names
 SUPPORTED_CURRENCIES = {
     "KES": {
@@ -36,133 +45,252 @@ SUPPORTED_CURRENCIES = {
     }
 }
 
-# Dummy stock data
-DUMMY_STOCKS = [
-    {
-        "symbol": "SAFCOM.NR",
-        "name": "Safaricom",
-        "sector": "Telecommunications",
+# Canonical instruments shared with the predictions pipeline
+symbol_registry = SymbolRegistry.from_file()
+
+# Dummy market data for the listed instruments that have it
+DUMMY_MARKET_DATA = {
+    "SAFCOM.NR": {
         "currentPrice": 156.25,
         "change": 2.5,
         "volume": 1500000,
         "marketCap": 62500000000
     },
-    {
-        "symbol": "KCB.NR",
-        "name": "KCB Bank",
-        "sector": "Banking",
+    "KCB.NR": {
         "currentPrice": 45.80,
         "change": -1.2,
         "volume": 800000,
         "marketCap": 18000000000
     },
-    {
-        "symbol": "EQTY.NR",
-        "name": "Equity Bank",
-        "sector": "Banking",
+    "EQTY.NR": {
         "currentPrice": 42.30,
         "change": 1.8,
         "volume": 950000,
         "marketCap": 16500000000
     },
-    {
-        "symbol": "EABL.NR",
-        "name": "East African Breweries",
-        "sector": "Manufacturing",
+    "EABL.NR": {
         "currentPrice": 185.50,
         "change": 3.2,
         "volume": 600000,
         "marketCap": 14500000000
     },
-    {
-        "symbol": "KPLC.NR",
-        "name": "Kenya Power",
-        "sector": "Energy",
+    "KPLC.NR": {
         "currentPrice": 2.85,
         "change": -0.5,
         "volume": 2500000,
         "marketCap": 3500000000
     }
-]
+}
+
+def build_stock_records(exchange: str = "NSE") -> list:
+    """Join registry identity with dummy market data, one row per canonical symbol"""
+    return [
+        {
+            "symbol": instrument.symbol,
+            "name": instrument.name,
+            "sector": instrument.sector,
+            **DUMMY_MARKET_DATA[instrument.symbol]
+        }
+        for instrument in symbol_registry.instruments(exchange)
+        if instrument.symbol in DUMMY_MARKET_DATA
+    ]
+
+# Indexed, column-oriented view of the universe used by /stocks
+instrument_store = InstrumentStore(build_stock_records())
+
+# Daily bars live on disk; the updater backfills new symbols and appends each day
+price_history = PriceHistoryStore()
+history_updater = HistoryUpdater(
+    price_history,
+    history_provider_from_env(anchors={symbol: data["currentPrice"] for symbol, data in DUMMY_MARKET_DATA.items()}),
+    symbols=[
+        symbol
+        for exchange in os.getenv("PREDICTA_HISTORY_EXCHANGES", "NSE").split(",") if exchange
+        for symbol in symbol_registry.symbols(exchange)
+    ]
+)
+# Latest technical indicators, advanced incrementally as new bars are stored
+indicator_book = IndicatorBook(price_history, history_updater.symbols)
+
+# Rates served until the configured FX provider first loads, or if it cannot be reached
+FALLBACK_RATES = {
+    "USD": 1.0,
+    "KES": 156.25,  # 1 USD = 156.25 KES
+    "EUR": 0.93,    # 1 USD = 0.93 EUR
+    "GBP": 0.79     # 1 USD = 0.79 GBP
+}
+
+# Cross rates are loaded and refreshed in the background once started; formatters are built once
+fx_service = FxService(
+    provider_from_env(),
+    required_currencies=SUPPORTED_CURRENCIES.keys(),
+    fallback_rates=FALLBACK_RATES
+)
+currency_formatters = build_formatters(SUPPORTED_CURRENCIES)
+
+PREDICTION_LABELS = np.array(["BULLISH", "BEARISH", "NEUTRAL"])
 
 def format_currency(amount: float, currency: str) -> str:
     """Format amount according to currency rules"""
-    if currency not in SUPPORTED_CURRENCIES:
+    formatter = currency_formatters.get(currency)
+    if formatter is None:
         return f"{amount:.2f}"
-    
-    currency_info = SUPPORTED_CURRENCIES[currency]
-    formatted_amount = f"{amount:.{currency_info['decimals']}f}"
-    return f"{currency_info['symbol']}{formatted_amount}"
+    return formatter(amount)
 
 def convert_currency(amount: float, from_currency: str, to_currency: str) -> float:
-    """Convert amount between currencies using dummy rates"""
+    """Convert amount between currencies using the current FX rates"""
     if from_currency == to_currency:
         return amount
-        
-    # Dummy conversion rates
-    rates = {
-        "USD": 1.0,
-        "KES": 0.0064,  # 1 USD = 156.25 KES
-        "EUR": 0.93,    # 1 USD = 1.075 EUR
-        "GBP": 0.79     # 1 USD = 1.266 GBP
-    }
     
     try:
-        if from_currency not in rates or to_currency not in rates:
-            raise ValueError(f"Unsupported currency: {from_currency} or {to_currency}")
-            
-        # Convert to USD first, then to target currency
-        usd_amount = amount / rates[from_currency]
-        return usd_amount * rates[to_currency]
-        
+        return amount * fx_service.matrix.rate(from_currency, to_currency)
     except Exception as e:
         print(f"Currency conversion error: {str(e)}")
         return amount
 
+def build_top_predictions(store: InstrumentStore, currency: str) -> list:
+    """Build dummy predictions for every instrument, converting and formatting whole columns at once"""
+    # Convert prices to selected currency against one consistent matrix
+    rates = fx_service.matrix
+    prices = rates.convert(store.columns["currentPrice"], "USD", currency)
+    market_caps = rates.convert(store.columns["marketCap"], "USD", currency)
+    
+    # Generate dummy predictions
+    labels = np.random.choice(PREDICTION_LABELS, store.size)
+    confidences = np.round(np.random.uniform(0.6, 0.95, store.size), 2)
+    target_prices = prices * np.random.uniform(0.9, 1.1, store.size)
+    
+    formatter = currency_formatters[currency]
+    price_text = formatter.format_many(prices)
+    target_text = formatter.format_many(target_prices)
+    market_cap_text = formatter.format_many(market_caps)
+    prices = prices.tolist()
+    market_caps = market_caps.tolist()
+    target_prices = target_prices.tolist()
+    labels = labels.tolist()
+    
+    # Sort by prediction confidence
+    order = np.argsort(-confidences, kind="stable").tolist()
+    confidences = confidences.tolist()
+    
+    predictions = []
+    for row in order:
+        stock = store.records[row]
+        predictions.append({
+            "symbol": stock["symbol"],
+            "name": stock["name"],
+            "currentPrice": prices[row],
+            "currentPriceFormatted": price_text[row],
+            "prediction": {
+                "prediction": labels[row],
+                "confidence": confidences[row],
+                "target_price": target_prices[row],
+                "analysis": "Market analysis based on historical data and current trends.",
+                "target_price_formatted": target_text[row]
+            },
+            "sector": stock["sector"],
+            "volume": stock["volume"],
+            "marketCap": market_caps[row],
+            "marketCapFormatted": market_cap_text[row]
+        })
+    
+    return predictions
+
 @router.get("/currencies")
 async def get_supported_currencies():
     """Get list of supported currencies with their details"""
     return SUPPORTED_CURRENCIES
 
+@router.get("/currencies/rates")
+async def get_currency_rates():
+    """Get the current cross-rate matrix and how stale it is"""
+    return {
+        **fx_service.stats(),
+        "rates": fx_service.matrix.to_dict()
+    }
+
 @router.get("/stocks")
 async def get_stocks(
+    response: Response,
     sort_by: str = "symbol",
     sort_order: str = "asc",
     search: Optional[str] = None,
     sector: Optional[str] = None,
     min_price: Optional[float] = None,
-    max_price: Optional[float] = None
+    max_price: Optional[float] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None
 ):
-    """Get stocks with filtering and sorting"""
+    """Get stocks with filtering, sorting and cursor pagination"""
     try:
-        # Start with all stocks
-        stocks = DUMMY_STOCKS.copy()
-        
-        # Apply filters
-        if search:
-            search = search.lower()
-            stocks = [s for s in stocks if 
-                     search in s["symbol"].lower() or 
-                     search in s["name"].lower()]
-        
-        if sector:
-            stocks = [s for s in stocks if s["sector"].lower() == sector.lower()]
-        
-        if min_price is not None:
-            stocks = [s for s in stocks if s["currentPrice"] >= min_price]
-        
-        if max_price is not None:
-            stocks = [s for s in stocks if s["currentPrice"] <= max_price]
-        
-        # Apply sorting
-        reverse = sort_order.lower() == "desc"
-        stocks.sort(key=lambda x: x[sort_by], reverse=reverse)
+        stocks, next_cursor = instrument_store.query(
+            sort_by=sort_by,
+            sort_order=sort_order,
+            search=search,
+            sector=sector,
+            min_price=min_price,
+            max_price=max_price,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        # Pass the cursor for the next page back in a header to keep the list response shape
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         
         return stocks
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/stocks/history/status")
+async def get_history_status():
+    """Get backfill and daily update counters for the price-history store"""
+    return history_updater.stats()
+
+@router.get("/stocks/{symbol}/history")
+async def get_stock_history(
+    symbol: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    limit: Optional[int] = Query(None, ge=1)
+):
+    """Get stored daily OHLCV bars for a symbol, optionally limited to the most recent ones"""
+    canonical = symbol_registry.resolve(symbol) or symbol
+    if price_history.last_timestamp(canonical) is None:
+        raise HTTPException(status_code=404, detail=f"No price history stored for {symbol}")
+
+    # Served straight from the mapped files; end is inclusive
+    bars = price_history.read(
+        canonical,
+        start=day_start(datetime(start.year, start.month, start.day, tzinfo=timezone.utc)) if start else None,
+        end=day_start(datetime(end.year, end.month, end.day, tzinfo=timezone.utc)) + DAY_SECONDS if end else None
+    )
+    if limit is not None and len(bars) > limit:
+        bars = bars.slice(len(bars) - limit, len(bars))
+    return {
+        "symbol": canonical,
+        "count": len(bars),
+        **bars.to_dict()
+    }
+
+@router.get("/stocks/{symbol}/indicators")
+async def get_stock_indicators(symbol: str):
+    """Get the latest SMA, EMA, RSI, MACD, Bollinger, ATR and volatility values for a symbol"""
+    canonical = symbol_registry.resolve(symbol) or symbol
+    state = await run_in_threadpool(indicator_book.refresh)
+    values = indicator_book.latest(canonical)
+    if values is None:
+        raise HTTPException(status_code=404, detail=f"No indicators available for {symbol}")
+    return {
+        "symbol": canonical,
+        "date": datetime.fromtimestamp(state.timestamp, tz=timezone.utc).date().isoformat(),
+        "indicators": values
+    }
+
 @router.get("/top-predictions")
 async def get_top_predictions(currency: str = "KES"):
     """Get top predictions with dummy data"""
@@ -174,44 +302,7 @@ async def get_top_predictions(currency: str = "KES"):
                 detail=f"Unsupported currency. Supported currencies are: {', '.join(SUPPORTED_CURRENCIES.keys())}"
             )
         
-        # Generate dummy predictions
-        predictions = []
-        for stock in DUMMY_STOCKS:
-            try:
-                # Convert prices to selected currency
-                current_price = convert_currency(stock["currentPrice"], "USD", currency)
-                market_cap = convert_currency(stock["marketCap"], "USD", currency)
-                
-                # Generate dummy prediction
-                prediction = {
-                    "prediction": random.choice(["BULLISH", "BEARISH", "NEUTRAL"]),
-                    "confidence": round(random.uniform(0.6, 0.95), 2),
-                    "target_price": current_price * random.uniform(0.9, 1.1),
-                    "analysis": "Market analysis based on historical data and current trends."
-                }
-                
-                predictions.append({
-                    "symbol": stock["symbol"],
-                    "name": stock["name"],
-                    "currentPrice": current_price,
-                    "currentPriceFormatted": format_currency(current_price, currency),
-                    "prediction": {
-                        **prediction,
-                        "target_price_formatted": format_currency(prediction["target_price"], currency)
-                    },
-                    "sector": stock["sector"],
-                    "volume": stock["volume"],
-                    "marketCap": market_cap,
-                    "marketCapFormatted": format_currency(market_cap, currency)
-                })
-            except Exception as e:
-                print(f"Error processing stock {stock['symbol']}: {str(e)}")
-                continue
-        
-        # Sort by prediction confidence
-        predictions.sort(key=lambda x: float(x["prediction"]["confidence"]), reverse=True)
-        
-        return predictions
+        return build_top_predictions(instrument_store, currency)
         
     except HTTPException as he:
         raise he
@@ -0,0 +1,23 @@
+from . import fetch_engine
+from . import ttl_cache
+from . import quote_cache
+from . import snapshots
+from . import instrument_store
+from . import currency
+from . import fx
+from . import response_cache
+from . import conversations
+from . import clients
+from . import news_fetcher
+from . import news_store
+from . import news_ingest
+from . import entity_index
+from . import symbol_registry
+from . import quotes
+from . import price_history
+from . import indicators
+from . import signal_model
+from . import inference
+from . import backtest
+
+__all__ = ['fetch_engine', 'ttl_cache', 'quote_cache', 'snapshots', 'instrument_store', 'currency', 'fx', 'response_cache', 'conversations', 'clients', 'news_fetcher', 'news_store', 'news_ingest', 'entity_index', 'symbol_registry', 'quotes', 'price_history', 'indicators', 'signal_model', 'inference', 'backtest']
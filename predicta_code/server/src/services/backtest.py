@@ -0,0 +1,245 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from itertools import product
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .indicators import TRADING_DAYS, ewm
+from .price_history import DAY_SECONDS
+from .signal_model import FEATURES, SignalModel, cross_sectional_ic, fit_ridge, forward_returns, standardize, walk_forward_splits
+
+# Sentiment scores run from -5 to 5; /predictions reports twice the score as the expected change
+SENTIMENT_CHANGE = 2.0
+
+
+@dataclass(frozen=True)
+class BacktestConfig:
+    """One way of turning a prediction signal into BULLISH/BEARISH/NEUTRAL calls"""
+    signal: str
+    # Trading days each call is judged over
+    horizon: int = 5
+    # Predicted change (percent) below which a call is NEUTRAL
+    threshold: float = 0.0
+    # EMA span applied to the signal before calling it; 1 leaves it raw
+    smoothing: int = 1
+    # Trading days between calls; positions are held in between
+    rebalance: int = 1
+
+
+def config_grid(
+    signals: Iterable[str],
+    horizons: Iterable[int],
+    thresholds: Iterable[float],
+    smoothings: Iterable[int],
+    rebalances: Iterable[int]
+) -> List[BacktestConfig]:
+    """Every combination, ordered so neighbours differ only in threshold and can share work"""
+    return [
+        BacktestConfig(signal, horizon, threshold, smoothing, rebalance)
+        for signal, horizon, smoothing, rebalance, threshold in product(signals, horizons, smoothings, rebalances, thresholds)
+    ]
+
+
+def ema_crossover_signal(series: Dict[str, np.ndarray]) -> np.ndarray:
+    """The change /predictions reports from technicals alone: EMA12/EMA26 spread in percent"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (series["ema_12"] / series["ema_26"] - 1) * 100
+
+
+def sentiment_signal(sentiment: np.ndarray, mentions: np.ndarray) -> np.ndarray:
+    """The change /predictions reports from news, NaN on days without coverage"""
+    return np.where(mentions > 0, sentiment * SENTIMENT_CHANGE, np.nan)
+
+
+def walk_forward_model_signal(
+    features: np.ndarray,
+    close: np.ndarray,
+    horizon: int,
+    alpha: float,
+    folds: int,
+    min_train: int
+) -> np.ndarray:
+    """
+    Out-of-sample SignalModel forecasts laid out as a (symbols, days) change matrix
+
+    ``features`` is build_features over full indicator series. For each
+    ``walk_forward_splits`` fold the ridge head is refit on labelled days
+    before the fold's ``train_end`` and scores only that fold's test block,
+    so no day is called by a model that saw its outcome. Days before the
+    first block stay NaN. Like /predictions, a symbol with a close is scored
+    even if some features are missing.
+    """
+    signal = np.full(close.shape, np.nan)
+    target = forward_returns(close, horizon)
+    for train_end, test_start, test_end in walk_forward_splits(close.shape[1], folds, horizon, min_train):
+        train_x, train_y = features[:, :train_end], target[:, :train_end]
+        labelled = np.isfinite(train_x).all(axis=-1) & np.isfinite(train_y)
+        if not labelled.any():
+            continue
+        mean, scale = standardize(train_x[labelled])
+        model = SignalModel(
+            version=f"walk-forward-{test_start}",
+            features=FEATURES,
+            horizon=horizon,
+            mean=mean,
+            scale=scale,
+            ridge=fit_ridge((train_x[labelled] - mean) / scale, train_y[labelled], alpha),
+            # Only the ridge head feeds the reported change
+            logistic=np.zeros(len(FEATURES) + 1)
+        )
+        block = features[:, test_start:test_end]
+        expected, _ = model.predict(block.reshape(-1, len(FEATURES)))
+        signal[:, test_start:test_end] = np.where(
+            np.isfinite(close[:, test_start:test_end]), expected.reshape(block.shape[:-1]), np.nan
+        )
+    return signal
+
+
+def parse_timestamp(value: str) -> float:
+    """Epoch seconds for an ISO timestamp; naive values, as older /predictions output has, are UTC"""
+    made = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if made.tzinfo is None:
+        made = made.replace(tzinfo=timezone.utc)
+    return made.timestamp()
+
+
+def predictions_signal(records: Iterable[dict], symbols: Sequence[str], timestamps: np.ndarray) -> np.ndarray:
+    """
+    Recorded /predictions output laid out as a (symbols, days) change matrix
+
+    A prediction lands on the first bar whose day ends after it was made;
+    the latest prediction for a symbol and day wins.
+    """
+    signal = np.full((len(symbols), len(timestamps)), np.nan)
+    rows = {symbol: row for row, symbol in enumerate(symbols)}
+    day_ends = np.asarray(timestamps, dtype=np.int64) + DAY_SECONDS
+    for record in sorted(records, key=lambda record: parse_timestamp(record["timestamp"])):
+        row = rows.get(record.get("symbol"))
+        if row is None or record.get("change") is None:
+            continue
+        made = parse_timestamp(record["timestamp"])
+        day = int(np.searchsorted(day_ends, made, side="right"))
+        if day < len(timestamps):
+            signal[row, day] = float(record["change"])
+    return signal
+
+
+def smooth(signal: np.ndarray, span: int) -> np.ndarray:
+    """EMA of a (symbols, days) signal over ``span`` days; a span of 1 returns it unchanged"""
+    if span <= 1:
+        return signal
+    smoothed, _ = ewm(signal, 2.0 / (span + 1), 1)
+    # The average carries over gaps; a day without a signal still makes no call
+    return np.where(np.isnan(signal), np.nan, smoothed)
+
+
+def run_backtest(signal: np.ndarray, close: np.ndarray, config: BacktestConfig, forward: Optional[np.ndarray] = None) -> dict:
+    """
+    Replay a (symbols, days) signal against closes under one config
+
+    Calls are made every ``rebalance`` days from the signal alone and held
+    until the next call. Reports the hit rate of directional calls, the
+    mean daily rank IC of the signal against the ``horizon``-day return,
+    the daily turnover of an equal-gross long/short book following the
+    calls, and that book's annualised return and Sharpe ratio.
+    """
+    return evaluate(smooth(signal, config.smoothing), close, config, forward)
+
+
+def daily_ic(signal: np.ndarray, forward: np.ndarray, rebalance: int) -> np.ndarray:
+    """Rank IC of the calls made on each rebalance day; independent of the neutral threshold"""
+    call_days = np.arange(0, signal.shape[1], rebalance)
+    return cross_sectional_ic(signal[:, call_days].T, forward[:, call_days].T)
+
+
+def evaluate(
+    signal: np.ndarray,
+    close: np.ndarray,
+    config: BacktestConfig,
+    forward: Optional[np.ndarray] = None,
+    ic: Optional[np.ndarray] = None
+) -> dict:
+    """run_backtest for a signal already smoothed per ``config.smoothing``, reusing ``daily_ic`` if given"""
+    days = close.shape[1]
+    forward = forward_returns(close, config.horizon) if forward is None else forward
+    ic = daily_ic(signal, forward, config.rebalance) if ic is None else ic
+
+    call_days = np.arange(0, days, config.rebalance)
+    calls = signal[:, call_days]
+    with np.errstate(invalid="ignore"):
+        labels = np.where(np.abs(calls) > config.threshold, np.sign(calls), 0.0)
+    labels = np.nan_to_num(labels)
+
+    judged = forward[:, call_days]
+    decided = (labels != 0) & np.isfinite(judged)
+    hits = (np.sign(judged) == labels) & decided
+
+    # Hold each call until the next one, then size to equal gross exposure per day
+    held = labels[:, np.minimum(np.arange(days) // config.rebalance, len(call_days) - 1)]
+    gross = np.abs(held).sum(axis=0)
+    weights = np.divide(held, gross, out=np.zeros_like(held), where=gross > 0)
+    turnover = 0.5 * np.abs(np.diff(weights, axis=1)).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        next_day = np.nan_to_num(np.log(close[:, 1:] / close[:, :-1]))
+    pnl = (weights[:, :-1] * next_day).sum(axis=0)
+    active = gross[:-1] > 0
+    pnl_std = pnl[active].std() if active.sum() > 1 else 0.0
+
+    return {
+        **asdict(config),
+        "calls": int(decided.sum()),
+        "coverage": float(decided.mean()) if decided.size else 0.0,
+        "hit_rate": float(hits.sum() / decided.sum()) if decided.any() else None,
+        "ic": float(np.nanmean(ic)) if np.isfinite(ic).any() else None,
+        "ic_ir": float(np.nanmean(ic) / np.nanstd(ic)) if np.isfinite(ic).sum() > 1 and np.nanstd(ic) > 0 else None,
+        "turnover": float(turnover.mean()) if len(turnover) else 0.0,
+        "annual_return": float(pnl[active].mean() * TRADING_DAYS) if active.any() else None,
+        "sharpe": float(pnl[active].mean() / pnl_std * np.sqrt(TRADING_DAYS)) if pnl_std > 0 else None
+    }
+
+
+# Each sweep worker maps the inputs once and reuses forward returns, smoothed signals
+# and daily ICs across the configs it is given
+_inputs: Dict[str, np.ndarray] = {}
+_forward: Dict[int, np.ndarray] = {}
+_smoothed: Dict[tuple, np.ndarray] = {}
+_ic: Dict[tuple, np.ndarray] = {}
+
+
+def _open_inputs(directory: str):
+    for name in os.listdir(directory):
+        _inputs[os.path.splitext(name)[0]] = np.load(os.path.join(directory, name), mmap_mode="r")
+    _forward.clear()
+    _smoothed.clear()
+    _ic.clear()
+
+
+def _run_config(config: BacktestConfig) -> dict:
+    close = _inputs["close"]
+    if config.horizon not in _forward:
+        _forward[config.horizon] = forward_returns(close, config.horizon)
+    key = (config.signal, config.smoothing)
+    if key not in _smoothed:
+        _smoothed[key] = smooth(_inputs[f"signal_{config.signal}"], config.smoothing)
+    ic_key = (*key, config.horizon, config.rebalance)
+    if ic_key not in _ic:
+        _ic[ic_key] = daily_ic(_smoothed[key], _forward[config.horizon], config.rebalance)
+    return evaluate(_smoothed[key], close, config, _forward[config.horizon], _ic[ic_key])
+
+
+def sweep(signals: Dict[str, np.ndarray], close: np.ndarray, configs: Sequence[BacktestConfig], workers: Optional[int] = None) -> List[dict]:
+    """Run every config on a process pool, results in config order"""
+    unknown = {config.signal for config in configs} - set(signals)
+    if unknown:
+        raise ValueError(f"Unknown signals: {', '.join(sorted(unknown))}")
+    with tempfile.TemporaryDirectory(prefix="predicta-backtest-") as directory:
+        np.save(os.path.join(directory, "close.npy"), close)
+        for name, values in signals.items():
+            np.save(os.path.join(directory, f"signal_{name}.npy"), values)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_open_inputs, initargs=(directory,)) as pool:
+            # Neighbouring configs share most inputs, so chunking them keeps the worker caches warm
+            return list(pool.map(_run_config, configs, chunksize=max(1, len(configs) // (4 * (workers or os.cpu_count() or 1)))))
@@ -0,0 +1,107 @@
+import os
+from typing import TYPE_CHECKING, Optional
+
+import httpx
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+# HTTP/2 needs the optional h2 package; fall back to HTTP/1.1 keep-alive without it
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+MAX_CONNECTIONS = int(os.getenv("PREDICTA_HTTP_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE = int(os.getenv("PREDICTA_HTTP_MAX_KEEPALIVE", "20"))
+KEEPALIVE_EXPIRY = float(os.getenv("PREDICTA_HTTP_KEEPALIVE_EXPIRY", "30"))
+TIMEOUT = float(os.getenv("PREDICTA_HTTP_TIMEOUT", "10"))
+HTTP2_ENABLED = os.getenv("PREDICTA_HTTP2", "true").lower() == "true" and HTTP2_AVAILABLE
+
+
+def pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE,
+        keepalive_expiry=KEEPALIVE_EXPIRY
+    )
+
+
+class ClientRegistry:
+    """
+    Process-wide upstream clients with pooled keep-alive connections
+
+    Clients are created on first use (or eagerly at startup) and shared by
+    every router, so TLS handshakes and socket setup are paid once per
+    connection rather than once per call. ``aclose`` releases the pools on
+    shutdown.
+    """
+
+    def __init__(self):
+        self._http: Optional[httpx.AsyncClient] = None
+        self._sync_http: Optional[httpx.Client] = None
+        self._openai: Optional["AsyncOpenAI"] = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Async client for calls made from request handlers"""
+        if self._http is None:
+            self._http = httpx.AsyncClient(limits=pool_limits(), timeout=TIMEOUT, http2=HTTP2_ENABLED)
+        return self._http
+
+    @property
+    def sync_http(self) -> httpx.Client:
+        """Thread-safe blocking client for calls made from worker threads"""
+        if self._sync_http is None:
+            self._sync_http = httpx.Client(limits=pool_limits(), timeout=TIMEOUT, http2=HTTP2_ENABLED)
+        return self._sync_http
+
+    @property
+    def openai(self) -> "AsyncOpenAI":
+        """Async OpenAI client on its own connection pool"""
+        if self._openai is None:
+            # openai is slow to import, so only load it once a client is needed
+            from openai import AsyncOpenAI
+            self._openai = AsyncOpenAI(
+                api_key=os.getenv('OPENAI_API_KEY'),
+                http_client=httpx.AsyncClient(limits=pool_limits(), timeout=httpx.Timeout(60.0, connect=TIMEOUT), http2=HTTP2_ENABLED)
+            )
+        return self._openai
+
+    async def startup(self):
+        """Create the HTTP clients up front so the first request does not pay for it"""
+        self.http
+        self.sync_http
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        if self._sync_http is not None:
+            self._sync_http.close()
+            self._sync_http = None
+        if self._openai is not None:
+            await self._openai.close()
+            self._openai = None
+
+    def stats(self) -> dict:
+        return {
+            "http2": HTTP2_ENABLED,
+            "max_connections": MAX_CONNECTIONS,
+            "max_keepalive_connections": MAX_KEEPALIVE,
+            "keepalive_expiry": KEEPALIVE_EXPIRY
+        }
+
+
+clients = ClientRegistry()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """FastAPI dependency for the shared async HTTP client"""
+    return clients.http
+
+
+def get_openai_client() -> "AsyncOpenAI":
+    """FastAPI dependency for the shared OpenAI client"""
+    return clients.openai
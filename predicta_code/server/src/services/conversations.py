@@ -0,0 +1,169 @@
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, List, Optional
+
+# tiktoken gives exact counts when installed; otherwise fall back to an estimate
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+DEFAULT_TOKEN_BUDGET = int(os.getenv("PREDICTA_CHAT_TOKEN_BUDGET", "3000"))
+# After trimming, history is cut down to this fraction of the budget so the
+# prompt prefix stays unchanged for the next several turns
+DEFAULT_LOW_WATERMARK = float(os.getenv("PREDICTA_CHAT_LOW_WATERMARK", "0.6"))
+DEFAULT_SESSION_TTL = float(os.getenv("PREDICTA_CHAT_SESSION_TTL", "3600"))
+DEFAULT_MAX_SESSIONS = int(os.getenv("PREDICTA_CHAT_MAX_SESSIONS", "10000"))
+# Per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Called with the upstream client of the request being prepared, the earlier summary and the trimmed turns
+Summarize = Callable[[Any, Optional[str], List[dict]], Awaitable[str]]
+
+
+class TokenCounter:
+    """Counts tokens for a model, exactly with tiktoken or roughly without it"""
+
+    def __init__(self, model: str = "gpt-4"):
+        self._encoding = None
+        if tiktoken is not None:
+            try:
+                self._encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+
+    def count(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text)) + MESSAGE_OVERHEAD_TOKENS
+        return len(text) // 4 + 1 + MESSAGE_OVERHEAD_TOKENS
+
+
+@dataclass
+class Turn:
+    role: str
+    content: str
+    tokens: int
+
+
+@dataclass
+class Conversation:
+    id: str
+    turns: List[Turn] = field(default_factory=list)
+    summary: Optional[str] = None
+    summary_tokens: int = 0
+    history_tokens: int = 0
+    dropped_turns: int = 0
+    updated_at: float = field(default_factory=time.time)
+
+
+@dataclass
+class PreparedPrompt:
+    messages: List[dict]
+    prompt_tokens: int
+    history_tokens: int
+    dropped_turns: int
+
+
+class ConversationManager:
+    """
+    Server-side chat history trimmed to a token budget
+
+    Token counts are computed once per turn as it is appended. When a
+    prompt would exceed the budget, the oldest turns are removed until the
+    history fits under the low watermark; if a summarizer is configured the
+    removed turns are folded into a rolling summary. Trimming in blocks
+    rather than one turn at a time keeps the leading messages identical
+    across consecutive requests, which lets upstream prompt caching hit.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        low_watermark: float = DEFAULT_LOW_WATERMARK,
+        session_ttl: float = DEFAULT_SESSION_TTL,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        summarize: Optional[Summarize] = None,
+        counter: Optional[TokenCounter] = None
+    ):
+        self.token_budget = token_budget
+        self.low_watermark = low_watermark
+        self.session_ttl = session_ttl
+        self.max_sessions = max_sessions
+        self.summarize = summarize
+        self.counter = counter or TokenCounter()
+        self._sessions: "OrderedDict[str, Conversation]" = OrderedDict()
+
+    def get_or_create(self, conversation_id: Optional[str] = None) -> Conversation:
+        now = time.time()
+        conversation = self._sessions.get(conversation_id) if conversation_id else None
+        if conversation is not None and now - conversation.updated_at > self.session_ttl:
+            del self._sessions[conversation_id]
+            conversation = None
+        if conversation is None:
+            conversation = Conversation(id=conversation_id or uuid.uuid4().hex)
+            self._sessions[conversation.id] = conversation
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(conversation.id)
+        conversation.updated_at = now
+        return conversation
+
+    def append(self, conversation: Conversation, role: str, content: str):
+        """Record a turn, counting its tokens once"""
+        tokens = self.counter.count(content)
+        conversation.turns.append(Turn(role=role, content=content, tokens=tokens))
+        conversation.history_tokens += tokens
+        conversation.updated_at = time.time()
+
+    async def _trim(self, conversation: Conversation, fixed_tokens: int, client: Any):
+        target = int(self.token_budget * self.low_watermark) - fixed_tokens
+        dropped = []
+        while conversation.turns and conversation.history_tokens + conversation.summary_tokens > target:
+            turn = conversation.turns.pop(0)
+            conversation.history_tokens -= turn.tokens
+            dropped.append(turn)
+        if not dropped:
+            return
+        conversation.dropped_turns += len(dropped)
+        if self.summarize is not None:
+            try:
+                summary = await self.summarize(
+                    client,
+                    conversation.summary,
+                    [{"role": turn.role, "content": turn.content} for turn in dropped]
+                )
+                conversation.summary = summary
+                conversation.summary_tokens = self.counter.count(summary)
+            except Exception as e:
+                print(f"Conversation summary failed, history truncated instead: {str(e)}")
+
+    async def prepare(self, conversation: Conversation, system_prompt: str, message: str, client: Any = None) -> PreparedPrompt:
+        """Messages for the next request: system prompt, summary, recent history, new message; ``client`` is passed to the summarizer"""
+        fixed_tokens = self.counter.count(system_prompt) + self.counter.count(message)
+        if fixed_tokens + conversation.summary_tokens + conversation.history_tokens > self.token_budget:
+            await self._trim(conversation, fixed_tokens, client)
+
+        messages = [{"role": "system", "content": system_prompt}]
+        if conversation.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation: {conversation.summary}"})
+        messages.extend({"role": turn.role, "content": turn.content} for turn in conversation.turns)
+        messages.append({"role": "user", "content": message})
+
+        return PreparedPrompt(
+            messages=messages,
+            prompt_tokens=fixed_tokens + conversation.summary_tokens + conversation.history_tokens,
+            history_tokens=conversation.summary_tokens + conversation.history_tokens,
+            dropped_turns=conversation.dropped_turns
+        )
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "token_budget": self.token_budget,
+            "summarization": self.summarize is not None,
+            "exact_token_counts": tiktoken is not None
+        }
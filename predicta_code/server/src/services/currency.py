@@ -0,0 +1,69 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+class RateMatrix:
+    """
+    Precomputed N x N cross-rate matrix
+
+    Built from rates quoted as units of each currency per US dollar.
+    ``matrix[i, j]`` converts an amount in currency ``i`` into currency ``j``,
+    so converting a whole column is a single multiply.
+    """
+
+    def __init__(self, rates_per_usd: Dict[str, float], as_of: Optional[datetime] = None):
+        # When the rates were published; None for undated rates such as hard-coded fallbacks
+        self.as_of = as_of
+        self.currencies = tuple(rates_per_usd)
+        self.index = {currency: i for i, currency in enumerate(self.currencies)}
+        rates = np.array([rates_per_usd[currency] for currency in self.currencies], dtype=np.float64)
+        self.matrix = rates[np.newaxis, :] / rates[:, np.newaxis]
+        self.matrix.setflags(write=False)
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        """Multiplier that converts from_currency into to_currency"""
+        try:
+            return float(self.matrix[self.index[from_currency], self.index[to_currency]])
+        except KeyError:
+            raise ValueError(f"Unsupported currency: {from_currency} or {to_currency}")
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        return {
+            from_currency: {
+                to_currency: float(self.matrix[i, j])
+                for j, to_currency in enumerate(self.currencies)
+            }
+            for i, from_currency in enumerate(self.currencies)
+        }
+
+    def convert(self, amounts: Iterable[float], from_currency: str, to_currency: str) -> np.ndarray:
+        """Convert a whole column of amounts at once"""
+        return np.asarray(amounts, dtype=np.float64) * self.rate(from_currency, to_currency)
+
+
+class CurrencyFormatter:
+    """Formats amounts for one currency with a format string compiled up front"""
+
+    def __init__(self, symbol: str, decimals: int):
+        self.symbol = symbol
+        self.decimals = decimals
+        self._format = f"{symbol}{{:.{decimals}f}}".format
+
+    def __call__(self, amount: float) -> str:
+        return self._format(amount)
+
+    def format_many(self, amounts: Iterable[float]) -> List[str]:
+        fmt = self._format
+        if isinstance(amounts, np.ndarray):
+            amounts = amounts.tolist()
+        return [fmt(amount) for amount in amounts]
+
+
+def build_formatters(currencies: Dict[str, dict]) -> Dict[str, CurrencyFormatter]:
+    """One formatter per supported currency, keyed by currency code"""
+    return {
+        code: CurrencyFormatter(info["symbol"], info["decimals"])
+        for code, info in currencies.items()
+    }
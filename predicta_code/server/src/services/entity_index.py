@@ -0,0 +1,186 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Set
+
+# Trailing words that vary between mentions of the same company
+LEGAL_SUFFIXES = {
+    "plc", "ltd", "limited", "inc", "incorporated", "corp", "corporation",
+    "co", "company", "holdings", "group", "sa", "ag", "llc"
+}
+DEFAULT_CONFIDENCE = 0.7
+
+PARENTHESES_PATTERN = re.compile(r"\(([^)]*)\)")
+NON_WORD_PATTERN = re.compile(r"[^a-z0-9&]+")
+
+
+def normalize_entity(name: str, strip_suffixes: bool = True) -> str:
+    """Lowercase, strip punctuation and, unless told not to, drop trailing legal suffixes"""
+    tokens = NON_WORD_PATTERN.sub(" ", name.lower()).split()
+    while strip_suffixes and len(tokens) > 1 and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def exact_keys(name: str) -> List[str]:
+    """Full normalized forms of a mention, legal suffixes kept"""
+    keys = []
+    # "Safaricom PLC (SAFCOM)" is indexed as both the name and the bracketed ticker
+    for part in [PARENTHESES_PATTERN.sub(" ", name), *PARENTHESES_PATTERN.findall(name)]:
+        key = normalize_entity(part, strip_suffixes=False)
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def fallback_keys(name: str) -> List[str]:
+    """Looser forms that can collide across companies: suffix-stripped names and ticker roots"""
+    keys = []
+    for key in exact_keys(name):
+        # "KCB Group PLC" also matches "KCB Group" and "KCB"
+        tokens = key.split()
+        while len(tokens) > 1 and tokens[-1] in LEGAL_SUFFIXES:
+            tokens.pop()
+            keys.append(" ".join(tokens))
+    # Exchange-suffixed tickers such as "SAFCOM.NR" also match their root
+    if "." in name and " " not in name.strip():
+        keys.append(normalize_entity(name.split(".", 1)[0]))
+    exact = exact_keys(name)
+    return [key for key in dict.fromkeys(keys) if key and key not in exact]
+
+
+def entity_keys(name: str) -> List[str]:
+    """Every normalized form a mention can be looked up by, exact forms first"""
+    return [*exact_keys(name), *fallback_keys(name)]
+
+
+def ambiguous_keys(names_by_symbol: Mapping[str, Iterable[str]]) -> Set[str]:
+    """Keys that more than one symbol's names normalize to, and so identify none of them"""
+    owners: Dict[str, Set[str]] = {}
+    for symbol, names in names_by_symbol.items():
+        for name in names:
+            for key in entity_keys(name):
+                owners.setdefault(key, set()).add(symbol)
+    return {key for key, symbols in owners.items() if len(symbols) > 1}
+
+
+def entity_names(entities: Any) -> Iterator[str]:
+    """Flatten key_entities, which models return as strings, lists or nested dicts"""
+    if isinstance(entities, str):
+        yield entities
+    elif isinstance(entities, dict):
+        if isinstance(entities.get("name"), str):
+            yield entities["name"]
+            for alias in entities.get("aliases", []) or []:
+                if isinstance(alias, str):
+                    yield alias
+        else:
+            for value in entities.values():
+                yield from entity_names(value)
+    elif isinstance(entities, (list, tuple)):
+        for value in entities:
+            yield from entity_names(value)
+
+
+def as_float(value: Any, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+@dataclass
+class SymbolSignal:
+    """Sentiment and context aggregated from every analysis that mentions a symbol"""
+    sentiment: float
+    confidence: float
+    articles: int
+    analysis: str
+    sector_impact: Dict[str, float] = field(default_factory=dict)
+    opportunities: List[str] = field(default_factory=list)
+    risks: List[str] = field(default_factory=list)
+
+
+class EntityIndex:
+    """
+    Inverted index from normalized entity names to the analyses mentioning them
+
+    Built once per analysis batch, so resolving a symbol is a few dictionary
+    lookups instead of a scan over every analysis. One analysis can feed any
+    number of symbols, and a symbol can draw on several analyses.
+
+    Names match on their full normalized form first. Suffix-stripped names
+    and ticker roots only match when they are not in ``ambiguous`` (see
+    ``ambiguous_keys``), so "KCB Group" and the KCB.NR ticker root cannot
+    merge two companies' news.
+    """
+
+    def __init__(self, analyses: Sequence[dict], ambiguous: Iterable[str] = ()):
+        self.analyses = list(analyses)
+        self.ambiguous = frozenset(ambiguous)
+        self._exact: Dict[str, List[int]] = {}
+        self._postings: Dict[str, List[int]] = {}
+        for position, analysis in enumerate(self.analyses):
+            for name in entity_names(analysis.get("key_entities", [])):
+                exact = exact_keys(name)
+                for key in exact:
+                    self._post(self._exact, key, position)
+                for key in [*exact, *fallback_keys(name)]:
+                    if key not in self.ambiguous:
+                        self._post(self._postings, key, position)
+
+    @staticmethod
+    def _post(postings: Dict[str, List[int]], key: str, position: int):
+        entries = postings.setdefault(key, [])
+        if not entries or entries[-1] != position:
+            entries.append(position)
+
+    def __len__(self) -> int:
+        return len(self._postings)
+
+    def match(self, names: Iterable[str]) -> List[dict]:
+        """Analyses mentioning any of the names, in batch order"""
+        positions = set()
+        for name in names:
+            for key in exact_keys(name):
+                positions.update(self._exact.get(key, ()))
+            # Looser forms on either side only count where they point at a single company
+            for key in entity_keys(name):
+                if key not in self.ambiguous:
+                    positions.update(self._postings.get(key, ()))
+        return [self.analyses[position] for position in sorted(positions)]
+
+    def aggregate(self, names: Iterable[str]) -> Optional[SymbolSignal]:
+        """Confidence-weighted view over every analysis matching the names, or None"""
+        matches = self.match(names)
+        if not matches:
+            return None
+
+        confidences = [max(as_float(a.get("confidence_score"), DEFAULT_CONFIDENCE), 0.0) for a in matches]
+        # Zero-confidence batches still average evenly rather than dividing by zero
+        weights = confidences if any(confidences) else [1.0] * len(matches)
+        sentiment = sum(w * as_float(a.get("sentiment_score"), 0.0) for w, a in zip(weights, matches)) / sum(weights)
+
+        sector_totals: Dict[str, float] = {}
+        sector_weights: Dict[str, float] = {}
+        for weight, analysis in zip(weights, matches):
+            impact = analysis.get("sector_impact", {})
+            if not isinstance(impact, dict):
+                continue
+            for sector, score in impact.items():
+                sector_totals[sector] = sector_totals.get(sector, 0.0) + weight * as_float(score, 0.0)
+                sector_weights[sector] = sector_weights.get(sector, 0.0) + weight
+
+        # The most confident analysis supplies the narrative
+        lead = max(zip(weights, matches), key=lambda pair: pair[0])[1]
+        return SymbolSignal(
+            sentiment=sentiment,
+            confidence=sum(confidences) / len(confidences),
+            articles=len(matches),
+            analysis=lead.get("short_term_effects", "Analysis temporarily unavailable."),
+            sector_impact={
+                sector: round(sector_totals[sector] / sector_weights[sector], 2)
+                for sector in sector_totals if sector_weights[sector]
+            },
+            opportunities=list(dict.fromkeys(str(item) for a in matches for item in a.get("potential_opportunities", []) or [])),
+            risks=list(dict.fromkeys(str(item) for a in matches for item in a.get("related_risks", []) or []))
+        )
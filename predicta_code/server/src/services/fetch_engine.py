@@ -0,0 +1,121 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# Defaults can be tuned per deployment without touching the code
+DEFAULT_MAX_IN_FLIGHT = int(os.getenv("PREDICTA_FETCH_MAX_IN_FLIGHT", "16"))
+DEFAULT_TIMEOUT = float(os.getenv("PREDICTA_FETCH_TIMEOUT", "8"))
+# Timed-out lookups still running on a thread; past this many, new lookups fail fast
+DEFAULT_MAX_ABANDONED = int(os.getenv("PREDICTA_FETCH_MAX_ABANDONED", "8"))
+
+
+@dataclass
+class FetchResult:
+    key: str
+    value: Any = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class FetchEngine:
+    """Run blocking lookups in parallel on a bounded worker pool
+
+    Each key is resolved by calling ``fetch(key)`` on a worker thread, so the
+    event loop stays free while upstream calls (yfinance, HTTP, ...) block.
+    At most ``max_in_flight`` lookups run at once and every lookup gets its
+    own timeout; a slow or failing key never sinks the rest of the batch.
+
+    A blocking call cannot be interrupted, so a timed-out lookup keeps its
+    thread until upstream returns. The pool has ``max_abandoned`` spare
+    threads for those; once more than that are stuck, new lookups fail at
+    once instead of queueing behind them. A ``max_abandoned`` of 0 tolerates
+    none beyond the in-flight slots.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_abandoned: int = DEFAULT_MAX_ABANDONED
+    ):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.max_abandoned = max(0, max_abandoned)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_in_flight + self.max_abandoned,
+            thread_name_prefix="predicta-fetch"
+        )
+        # Abandoned calls finish on worker threads, hence the lock
+        self._abandoned = 0
+        self._abandoned_lock = threading.Lock()
+        # Shared by every caller so the in-flight cap holds across requests
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def fetch_one(
+        self,
+        key: str,
+        fetch: Callable[[str], Any],
+        timeout: Optional[float] = None
+    ) -> FetchResult:
+        """Resolve a single key on the worker pool, never raising"""
+        timeout = self.timeout if timeout is None else timeout
+        async with self._semaphore:
+            # Spare threads cover up to max_abandoned stuck lookups; past that a new one would queue
+            if self.abandoned > self.max_abandoned:
+                return FetchResult(key=key, error=f"upstream saturated: {self.abandoned} timed-out lookups still running")
+            try:
+                future = self._executor.submit(fetch, key)
+            except RuntimeError as e:
+                return FetchResult(key=key, error=str(e))
+            try:
+                value = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+                return FetchResult(key=key, value=value)
+            except asyncio.TimeoutError:
+                self._abandon(future)
+                return FetchResult(key=key, error=f"timed out after {timeout}s")
+            except asyncio.CancelledError:
+                self._abandon(future)
+                raise
+            except Exception as e:
+                return FetchResult(key=key, error=str(e))
+
+    @property
+    def abandoned(self) -> int:
+        """Timed-out lookups whose threads are still busy"""
+        return self._abandoned
+
+    def _abandon(self, future: Future):
+        # A lookup that never started gives its slot back straight away
+        if future.cancel() or future.done():
+            return
+        with self._abandoned_lock:
+            self._abandoned += 1
+        future.add_done_callback(self._release)
+
+    def _release(self, _future: Future):
+        with self._abandoned_lock:
+            self._abandoned -= 1
+
+    async def fetch_all(
+        self,
+        keys: Iterable[str],
+        fetch: Callable[[str], Any],
+        timeout: Optional[float] = None
+    ) -> Dict[str, FetchResult]:
+        """Resolve every key concurrently and return partial results keyed by input"""
+        # Duplicate keys only need to be fetched once
+        unique_keys = list(dict.fromkeys(keys))
+        results = await asyncio.gather(*(self.fetch_one(key, fetch, timeout) for key in unique_keys))
+        return {result.key: result for result in results}
+
+    def shutdown(self):
+        """Release the worker threads without waiting for stuck lookups"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
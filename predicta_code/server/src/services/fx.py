@@ -0,0 +1,202 @@
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+import httpx
+
+from .clients import clients
+from .currency import RateMatrix
+
+DEFAULT_RATES_FILE = os.path.join(os.path.dirname(__file__), '../../data/fx_rates.json')
+DEFAULT_REFRESH_INTERVAL = float(os.getenv("PREDICTA_FX_REFRESH_INTERVAL", "3600"))
+
+
+def parse_rates(data: dict) -> Dict[str, float]:
+    """Validate a {"base": "USD", "rates": {...}} payload and return the rates"""
+    if data.get("base", "USD") != "USD":
+        raise ValueError(f"Rates must be quoted against USD, got {data.get('base')}")
+    rates = {code: float(rate) for code, rate in data.get("rates", {}).items()}
+    if not rates or any(rate <= 0 for rate in rates.values()):
+        raise ValueError("Rates must be a non-empty mapping of positive numbers")
+    rates["USD"] = 1.0
+    return rates
+
+
+def parse_as_of(data: dict) -> Optional[datetime]:
+    """Publication time of a rates payload from its "as_of"/"date" or epoch "timestamp" field, if any"""
+    if data.get("timestamp") is not None:
+        return datetime.fromtimestamp(float(data["timestamp"]), timezone.utc)
+    value = data.get("as_of") or data.get("date")
+    if not value:
+        return None
+    as_of = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    # Dates without a zone are taken as UTC
+    return as_of if as_of.tzinfo else as_of.replace(tzinfo=timezone.utc)
+
+
+Rates = Tuple[Dict[str, float], Optional[datetime]]
+
+
+class RateProvider:
+    """Source of FX rates quoted as units of each currency per US dollar, with their publication time"""
+    name = "base"
+
+    def fetch(self) -> Rates:
+        raise NotImplementedError
+
+
+class FileRateProvider(RateProvider):
+    """Reads rates from a local JSON file"""
+    name = "file"
+
+    def __init__(self, path: str = DEFAULT_RATES_FILE):
+        self.path = path
+
+    def fetch(self) -> Rates:
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        # An undated file is as current as its last write
+        as_of = parse_as_of(data) or datetime.fromtimestamp(os.path.getmtime(self.path), timezone.utc)
+        return parse_rates(data), as_of
+
+
+class HttpRateProvider(RateProvider):
+    """Fetches rates from an HTTP endpoint returning the same JSON shape as the rates file"""
+    name = "http"
+
+    def __init__(self, url: str, timeout: float = 10, client: Optional[httpx.Client] = None):
+        self.url = url
+        self.timeout = timeout
+        self.client = client
+
+    def fetch(self) -> Rates:
+        # Refreshes run on a worker thread, so use the shared blocking pool
+        client = self.client or clients.sync_http
+        response = client.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        return parse_rates(data), parse_as_of(data)
+
+
+def provider_from_env() -> RateProvider:
+    """Pick the rate provider configured through PREDICTA_FX_PROVIDER"""
+    provider = os.getenv("PREDICTA_FX_PROVIDER", "file")
+    if provider == "http":
+        url = os.getenv("PREDICTA_FX_URL")
+        if url:
+            return HttpRateProvider(url)
+        print("Warning: PREDICTA_FX_PROVIDER=http needs PREDICTA_FX_URL; reading rates from the file instead")
+    return FileRateProvider(os.getenv("PREDICTA_FX_FILE", DEFAULT_RATES_FILE))
+
+
+class FxService:
+    """
+    Holds the current cross-rate matrix and refreshes it in the background
+
+    The matrix is immutable and replaced wholesale on every refresh, so
+    readers just dereference ``matrix`` without taking a lock. A failed
+    refresh keeps serving the previous matrix and shows up as growing
+    staleness. Hard-coded fallback rates have no age at all: until a
+    provider load succeeds, staleness and ``as_of`` are reported as None.
+
+    Nothing is fetched on construction. The first load runs when the
+    service is started, off the event loop; fallback rates are served until
+    it completes.
+    """
+
+    def __init__(
+        self,
+        provider: RateProvider,
+        required_currencies: Iterable[str] = (),
+        interval: float = DEFAULT_REFRESH_INTERVAL,
+        fallback_rates: Optional[Dict[str, float]] = None
+    ):
+        self.provider = provider
+        self.required_currencies = tuple(required_currencies)
+        self.interval = interval
+        self.refreshes = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._updated_at: Optional[float] = None
+        # Without fallback rates there is no matrix until the first load
+        self.matrix: Optional[RateMatrix] = RateMatrix(fallback_rates) if fallback_rates is not None else None
+        self.using_fallback = fallback_rates is not None
+
+    def _load(self) -> RateMatrix:
+        rates, as_of = self.provider.fetch()
+        missing = [code for code in self.required_currencies if code not in rates]
+        if missing:
+            raise ValueError(f"Rates missing for: {', '.join(missing)}")
+        # Providers without a publication time are stamped when fetched
+        return RateMatrix(rates, as_of=as_of or datetime.now(timezone.utc))
+
+    def refresh(self) -> RateMatrix:
+        """Fetch new rates and swap in a new matrix; keeps the old one on failure"""
+        try:
+            matrix = self._load()
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            raise
+        self.matrix = matrix
+        self._updated_at = time.monotonic()
+        self.using_fallback = False
+        self.refreshes += 1
+        self.last_error = None
+        return matrix
+
+    def load(self) -> Optional[RateMatrix]:
+        """First provider load; keeps serving the fallback rates if it fails"""
+        try:
+            return self.refresh()
+        except Exception as e:
+            if self.matrix is None:
+                raise
+            print(f"Warning: FX provider {self.provider.name} unavailable, using fallback rates: {str(e)}")
+            return None
+
+    def staleness_seconds(self) -> Optional[float]:
+        """Seconds since the last successful provider load, or None if there has been none"""
+        if self._updated_at is None:
+            return None
+        return time.monotonic() - self._updated_at
+
+    def stats(self) -> dict:
+        staleness = self.staleness_seconds()
+        return {
+            "provider": self.provider.name,
+            "using_fallback": self.using_fallback,
+            "as_of": self.matrix.as_of.isoformat() if self.matrix and self.matrix.as_of else None,
+            "staleness_seconds": round(staleness, 3) if staleness is not None else None,
+            "refresh_interval": self.interval,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_error": self.last_error
+        }
+
+    async def _run(self):
+        try:
+            await asyncio.to_thread(self.load)
+        except Exception as e:
+            print(f"FX load failed: {str(e)}")
+        while self.interval > 0:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                print(f"FX refresh failed: {str(e)}")
+
+    def start(self):
+        """Load rates in the background, then refresh them periodically; an interval of zero or less loads them once"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
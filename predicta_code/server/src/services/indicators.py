@@ -0,0 +1,358 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .price_history import Bars, PriceMatrix
+
+TRADING_DAYS = 252
+
+
+@dataclass(frozen=True)
+class IndicatorConfig:
+    """Window lengths for every indicator the engine produces"""
+    sma: Tuple[int, ...] = (20, 50)
+    ema: Tuple[int, ...] = (12, 26)
+    rsi: int = 14
+    macd: Tuple[int, int, int] = (12, 26, 9)
+    bollinger: int = 20
+    bollinger_width: float = 2.0
+    atr: int = 14
+    volatility: int = 20
+
+
+def _nan_column(rows: int) -> np.ndarray:
+    return np.full(rows, np.nan)
+
+
+def rolling_sums(x: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Trailing-window sum, sum of squares and count of valid values along axis 1"""
+    valid = ~np.isnan(x)
+    filled = np.where(valid, x, 0.0)
+    rows = x.shape[0]
+
+    def windowed(values: np.ndarray) -> np.ndarray:
+        cumulative = np.concatenate([np.zeros((rows, 1)), np.cumsum(values, axis=1)], axis=1)
+        out = np.zeros_like(x, dtype=np.float64)
+        width = min(n, x.shape[1])
+        # Windows that start before the first column just cover the prefix
+        out[:, :width] = cumulative[:, 1:width + 1]
+        out[:, n:] = cumulative[:, n + 1:] - cumulative[:, 1:-n]
+        return out
+
+    return windowed(filled), windowed(filled * filled), windowed(valid.astype(np.float64))
+
+
+def rolling_mean(x: np.ndarray, n: int) -> np.ndarray:
+    """Trailing mean over ``n`` columns, NaN until the window holds ``n`` valid values"""
+    sums, _, counts = rolling_sums(x, n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts >= n, sums / n, np.nan)
+
+
+def rolling_std(x: np.ndarray, n: int, ddof: int = 0) -> np.ndarray:
+    """Trailing standard deviation over ``n`` columns, NaN until the window is full"""
+    sums, squares, counts = rolling_sums(x, n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        variance = (squares - sums * sums / n) / (n - ddof)
+    return np.where(counts >= n, np.sqrt(np.clip(variance, 0.0, None)), np.nan)
+
+
+def ewm(x: np.ndarray, alpha: float, min_periods: int) -> Tuple[np.ndarray, "EwmState"]:
+    """
+    Exponentially weighted mean along axis 1, seeded with the first valid value
+
+    The loop runs over days only; each step updates every symbol at once.
+    Missing values leave the average unchanged and do not decay it, so a
+    symbol's untraded days do not count as time passing. This matches pandas
+    ``ewm(alpha=alpha, adjust=False, ignore_na=True, min_periods=min_periods)``;
+    with ``ignore_na=False`` pandas would decay across gaps instead. Returns
+    the series and the final state, so later bars can be folded in one at a
+    time.
+    """
+    state = EwmState(alpha, min_periods, x.shape[0])
+    out = np.empty_like(x, dtype=np.float64)
+    for day in range(x.shape[1]):
+        out[:, day] = state.push(x[:, day])
+    return out, state
+
+
+class EwmState:
+    """Running exponentially weighted mean for every symbol; O(1) per bar"""
+
+    def __init__(self, alpha: float, min_periods: int, rows: int):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = _nan_column(rows)
+        self.count = np.zeros(rows, dtype=np.int64)
+
+    def push(self, column: np.ndarray) -> np.ndarray:
+        valid = ~np.isnan(column)
+        seeded = np.isnan(self.value)
+        self.value = np.where(
+            valid,
+            np.where(seeded, column, self.value + self.alpha * (column - self.value)),
+            self.value
+        )
+        self.count += valid
+        return np.where(self.count >= self.min_periods, self.value, np.nan)
+
+
+class WindowState:
+    """Ring buffer with running sums over the last ``n`` bars of every symbol; O(1) per bar"""
+
+    def __init__(self, n: int, rows: int):
+        self.n = n
+        self.buffer = np.full((rows, n), np.nan)
+        self.position = 0
+        self.sum = np.zeros(rows)
+        self.squares = np.zeros(rows)
+        self.count = np.zeros(rows, dtype=np.int64)
+
+    def push(self, column: np.ndarray):
+        old = self.buffer[:, self.position]
+        old_valid = ~np.isnan(old)
+        new_valid = ~np.isnan(column)
+        self.sum += np.where(new_valid, column, 0.0) - np.where(old_valid, old, 0.0)
+        self.squares += np.where(new_valid, column * column, 0.0) - np.where(old_valid, old * old, 0.0)
+        self.count += new_valid.astype(np.int64) - old_valid.astype(np.int64)
+        self.buffer[:, self.position] = column
+        self.position = (self.position + 1) % self.n
+
+    def mean(self) -> np.ndarray:
+        return np.where(self.count >= self.n, self.sum / self.n, np.nan)
+
+    def std(self, ddof: int = 0) -> np.ndarray:
+        variance = (self.squares - self.sum * self.sum / self.n) / (self.n - ddof)
+        return np.where(self.count >= self.n, np.sqrt(np.clip(variance, 0.0, None)), np.nan)
+
+    @classmethod
+    def from_tail(cls, x: np.ndarray, n: int) -> "WindowState":
+        window = cls(n, x.shape[0])
+        for day in range(max(x.shape[1] - n, 0), x.shape[1]):
+            window.push(x[:, day])
+        return window
+
+
+def true_range(high: np.ndarray, low: np.ndarray, previous_close: np.ndarray) -> np.ndarray:
+    """Largest of the bar's range and its gaps from the previous close, ignoring missing gaps"""
+    return np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+
+
+def shifted(x: np.ndarray) -> np.ndarray:
+    """Previous column along axis 1, NaN for the first"""
+    return np.concatenate([np.full((x.shape[0], 1), np.nan), x[:, :-1]], axis=1)
+
+
+def relative_strength(gain: np.ndarray, loss: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + gain / loss)
+    # No losses in the window means maximal strength, not a division error
+    return np.where((loss == 0) & ~np.isnan(gain), 100.0, rsi)
+
+
+class IndicatorState:
+    """
+    Latest indicator values for every symbol, advanced one bar at a time
+
+    Holds only running sums, ring buffers and smoothed averages, so pushing
+    a new bar does a fixed amount of vectorized work per indicator however
+    long the history is.
+    """
+
+    def __init__(self, symbols: Sequence[str], config: IndicatorConfig):
+        rows = len(symbols)
+        self.symbols = tuple(symbols)
+        self.config = config
+        self.timestamp: Optional[int] = None
+        self.previous_close = _nan_column(rows)
+        self.sma = {n: WindowState(n, rows) for n in config.sma}
+        self.ema = {n: EwmState(2.0 / (n + 1), n, rows) for n in set(config.ema) | set(config.macd[:2])}
+        self.macd_signal = EwmState(2.0 / (config.macd[2] + 1), config.macd[2], rows)
+        self.rsi_gain = EwmState(1.0 / config.rsi, config.rsi, rows)
+        self.rsi_loss = EwmState(1.0 / config.rsi, config.rsi, rows)
+        self.bollinger = WindowState(config.bollinger, rows)
+        self.atr = EwmState(1.0 / config.atr, config.atr, rows)
+        self.returns = WindowState(config.volatility, rows)
+        self.latest: Dict[str, np.ndarray] = {}
+
+    def push(self, timestamp: int, open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, np.ndarray]:
+        """Fold in one bar for every symbol and return the updated latest values"""
+        config = self.config
+        latest = {}
+        for n, window in self.sma.items():
+            window.push(close)
+            latest[f"sma_{n}"] = window.mean()
+        emas = {n: state.push(close) for n, state in self.ema.items()}
+        for n in config.ema:
+            latest[f"ema_{n}"] = emas[n]
+
+        fast, slow, _ = config.macd
+        macd = emas[fast] - emas[slow]
+        signal = self.macd_signal.push(macd)
+        latest.update(macd=macd, macd_signal=signal, macd_histogram=macd - signal)
+
+        change = close - self.previous_close
+        gain = self.rsi_gain.push(np.where(np.isnan(change), np.nan, np.clip(change, 0.0, None)))
+        loss = self.rsi_loss.push(np.where(np.isnan(change), np.nan, np.clip(-change, 0.0, None)))
+        latest["rsi"] = relative_strength(gain, loss)
+
+        self.bollinger.push(close)
+        middle = self.bollinger.mean()
+        width = config.bollinger_width * self.bollinger.std()
+        latest.update(bollinger_middle=middle, bollinger_upper=middle + width, bollinger_lower=middle - width)
+
+        latest["atr"] = self.atr.push(true_range(high, low, self.previous_close))
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.returns.push(np.log(close / self.previous_close))
+        latest["volatility"] = self.returns.std(ddof=1) * np.sqrt(TRADING_DAYS)
+
+        self.previous_close = close.astype(np.float64)
+        self.timestamp = int(timestamp)
+        self.latest = latest
+        return latest
+
+
+class IndicatorEngine:
+    """Computes indicators for a whole (symbols, days) price matrix at once"""
+
+    def __init__(self, config: Optional[IndicatorConfig] = None):
+        self.config = config or IndicatorConfig()
+
+    def compute(self, matrix: PriceMatrix) -> Tuple[Dict[str, np.ndarray], IndicatorState]:
+        """
+        Full indicator series, each shaped like the matrix, and a state ready for new bars
+
+        Window indicators use cumulative sums; smoothed ones loop over days
+        with every symbol updated in one vector operation.
+        """
+        config = self.config
+        close, high, low = matrix.close, matrix.high, matrix.low
+        rows = close.shape[0]
+        state = IndicatorState(matrix.symbols, config)
+        series: Dict[str, np.ndarray] = {}
+
+        for n in config.sma:
+            series[f"sma_{n}"] = rolling_mean(close, n)
+            state.sma[n] = WindowState.from_tail(close, n)
+
+        emas = {}
+        for n in state.ema:
+            emas[n], state.ema[n] = ewm(close, 2.0 / (n + 1), n)
+        for n in config.ema:
+            series[f"ema_{n}"] = emas[n]
+
+        fast, slow, signal_window = config.macd
+        macd = emas[fast] - emas[slow]
+        signal, state.macd_signal = ewm(macd, 2.0 / (signal_window + 1), signal_window)
+        series.update(macd=macd, macd_signal=signal, macd_histogram=macd - signal)
+
+        previous_close = shifted(close)
+        change = close - previous_close
+        gain, state.rsi_gain = ewm(np.where(np.isnan(change), np.nan, np.clip(change, 0.0, None)), 1.0 / config.rsi, config.rsi)
+        loss, state.rsi_loss = ewm(np.where(np.isnan(change), np.nan, np.clip(-change, 0.0, None)), 1.0 / config.rsi, config.rsi)
+        series["rsi"] = relative_strength(gain, loss)
+
+        middle = rolling_mean(close, config.bollinger)
+        width = config.bollinger_width * rolling_std(close, config.bollinger)
+        series.update(bollinger_middle=middle, bollinger_upper=middle + width, bollinger_lower=middle - width)
+        state.bollinger = WindowState.from_tail(close, config.bollinger)
+
+        series["atr"], state.atr = ewm(true_range(high, low, previous_close), 1.0 / config.atr, config.atr)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            returns = np.log(close / previous_close)
+        series["volatility"] = rolling_std(returns, config.volatility, ddof=1) * np.sqrt(TRADING_DAYS)
+        state.returns = WindowState.from_tail(returns, config.volatility)
+
+        if close.shape[1]:
+            state.previous_close = close[:, -1].astype(np.float64)
+            state.timestamp = int(matrix.timestamp[-1])
+            state.latest = {name: values[:, -1] for name, values in series.items()}
+        else:
+            state.previous_close = _nan_column(rows)
+        return series, state
+
+
+class IndicatorBook:
+    """
+    Latest indicators for a fixed universe, kept in step with a PriceHistoryStore
+
+    The first refresh computes the full history once. Later refreshes track
+    how many rows of each symbol they have consumed: rows that all fall
+    after the last pushed day are pushed bar by bar, so a daily update costs
+    O(1) per indicator. A row dated on or before that day (a backfilled
+    symbol, or one whose bar for a day landed after another symbol's) cannot
+    be folded in out of order, so the history is recomputed instead.
+    """
+
+    def __init__(self, store, symbols: Sequence[str], engine: Optional[IndicatorEngine] = None):
+        self.store = store
+        self.symbols = tuple(symbols)
+        self.engine = engine or IndicatorEngine()
+        self.state: Optional[IndicatorState] = None
+        # Refreshes run on worker threads and must not push the same bar twice
+        self._lock = threading.Lock()
+        self._rows = {symbol: row for row, symbol in enumerate(self.symbols)}
+        self._consumed = np.zeros(len(self.symbols), dtype=np.int64)
+        self.recomputes = 0
+
+    def refresh(self) -> Optional[IndicatorState]:
+        with self._lock:
+            # Each read is a fixed-length view, so the counts below match exactly what is used
+            series = [self.store.read(symbol) for symbol in self.symbols]
+            counts = np.array([len(bars) for bars in series], dtype=np.int64)
+            if self.state is None or self.state.timestamp is None or self._backfilled(series):
+                matrix = PriceMatrix.from_bars(self.symbols, series)
+                if matrix.shape[1]:
+                    _, self.state = self.engine.compute(matrix)
+                    self.recomputes += 1
+                    self._consumed = counts
+                return self.state
+
+            new = [bars.slice(int(consumed), len(bars)) for bars, consumed in zip(series, self._consumed)]
+            matrix = PriceMatrix.from_bars(self.symbols, new)
+            for day in range(matrix.shape[1]):
+                self.state.push(
+                    matrix.timestamp[day],
+                    matrix.open[:, day], matrix.high[:, day], matrix.low[:, day], matrix.close[:, day]
+                )
+            self._consumed = counts
+            return self.state
+
+    def _backfilled(self, series: Sequence[Bars]) -> bool:
+        """Whether any symbol gained a row dated on or before the last pushed day"""
+        return any(
+            len(bars) > consumed and bars.timestamp[consumed] <= self.state.timestamp
+            for bars, consumed in zip(series, self._consumed)
+        )
+
+    def latest(self, symbol: str) -> Optional[Dict[str, Optional[float]]]:
+        """Latest indicator values for one symbol, None where not yet defined"""
+        row = self._rows.get(symbol)
+        if row is None or self.state is None or not self.state.latest:
+            return None
+        values = {
+            name: None if np.isnan(column[row]) else round(float(column[row]), 4)
+            for name, column in self.state.latest.items()
+        }
+        values["close"] = None if np.isnan(self.state.previous_close[row]) else float(self.state.previous_close[row])
+        return values
+
+    def latest_columns(self, symbols: Sequence[str]) -> Optional[Dict[str, np.ndarray]]:
+        """Unrounded latest indicators and close for many symbols, NaN where unknown"""
+        if self.state is None or not self.state.latest:
+            return None
+        rows = np.array([self._rows.get(symbol, -1) for symbol in symbols], dtype=np.int64)
+        known = rows >= 0
+
+        def take(column: np.ndarray) -> np.ndarray:
+            values = np.full(len(rows), np.nan)
+            values[known] = column[rows[known]]
+            return values
+
+        columns = {name: take(column) for name, column in self.state.latest.items()}
+        columns["close"] = take(self.state.previous_close)
+        return columns
@@ -0,0 +1,157 @@
+import asyncio
+import os
+import time
+from bisect import bisect_left
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .signal_model import DEFAULT_MODEL_DIR, SignalModel, load_latest
+
+# Longest a request waits for others to share its model call
+DEFAULT_BATCH_WINDOW = float(os.getenv("PREDICTA_INFERENCE_WINDOW", "0.005"))
+# Rows that flush a batch early, before the window closes
+DEFAULT_MAX_BATCH = int(os.getenv("PREDICTA_INFERENCE_MAX_BATCH", "4096"))
+LATENCY_BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+BATCH_BOUNDS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+
+class Histogram:
+    """Fixed-bucket histogram; percentiles are interpolated within a bucket"""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for position, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[position - 1] if position else 0.0
+                # The overflow bucket ends at the largest value seen
+                upper = self.bounds[position] if position < len(self.bounds) else self.max
+                return lower + (min(upper, self.max) - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "max": self.max if self.count else None,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "buckets": [
+                {"le": bound, "count": count}
+                for bound, count in zip([*self.bounds, "inf"], self.counts)
+            ]
+        }
+
+
+Scores = Tuple[np.ndarray, np.ndarray]
+
+
+class BatchingPredictor:
+    """
+    Scores feature rows from concurrent requests with one vectorized model call
+
+    The artifact is loaded once and its weights stay memory-mapped, so every
+    uvicorn worker on a host reads the same page-cache copy. The first
+    request to submit rows opens a window of at most ``window`` seconds;
+    rows submitted meanwhile are stacked and scored together, and each
+    caller gets back its own slice. A batch reaching ``max_batch`` rows is
+    scored at once instead of waiting out the window.
+
+    /predictions is served from snapshots, so scoring runs once per snapshot
+    refresh rather than once per request. Rows only share a call when
+    refreshes reach scoring within the same window: the scheduler's
+    configured keys, which refresh together, and on-demand or ``fresh``
+    refreshes that happen to coincide. Per-request batching mostly matters
+    for callers that score outside the snapshot path.
+    """
+
+    def __init__(self, root: str = DEFAULT_MODEL_DIR, window: float = DEFAULT_BATCH_WINDOW, max_batch: int = DEFAULT_MAX_BATCH):
+        self.root = root
+        self.window = window
+        self.max_batch = max_batch
+        self.model: Optional[SignalModel] = None
+        self._pending: List[Tuple[np.ndarray, asyncio.Future, float]] = []
+        self._rows = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self.latency_ms = Histogram(LATENCY_BOUNDS_MS)
+        self.batch_rows = Histogram(BATCH_BOUNDS)
+        self.batch_requests = Histogram(BATCH_BOUNDS)
+        self.failures = 0
+
+    def load(self) -> Optional[SignalModel]:
+        """(Re)load the latest artifact, keeping the current model if none can be loaded"""
+        model = load_latest(self.root)
+        if model is not None or self.model is None:
+            self.model = model
+        return self.model
+
+    async def predict(self, features: np.ndarray) -> Optional[Scores]:
+        """Expected returns and rise probabilities for each row, or None when no model is loaded"""
+        if self.model is None:
+            return None
+        rows = np.atleast_2d(np.asarray(features, dtype=np.float64))
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((rows, future, time.perf_counter()))
+        self._rows += len(rows)
+        if self._rows >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending, self._rows = self._pending, [], 0
+        if not pending:
+            return
+        # Scoring is a couple of small matrix products, cheaper than a thread hop
+        try:
+            expected, probability = self.model.predict(np.concatenate([rows for rows, _, _ in pending]))
+        except Exception as e:
+            self.failures += 1
+            for _, future, _ in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        finished = time.perf_counter()
+        self.batch_rows.observe(len(expected))
+        self.batch_requests.observe(len(pending))
+        offset = 0
+        for rows, future, submitted in pending:
+            if not future.done():
+                future.set_result((expected[offset:offset + len(rows)], probability[offset:offset + len(rows)]))
+            offset += len(rows)
+            self.latency_ms.observe((finished - submitted) * 1000)
+
+    def stats(self) -> dict:
+        return {
+            "model": self.model.version if self.model else None,
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "failures": self.failures,
+            "latency_ms": self.latency_ms.to_dict(),
+            "batch_rows": self.batch_rows.to_dict(),
+            "batch_requests": self.batch_requests.to_dict()
+        }
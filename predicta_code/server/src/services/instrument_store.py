@@ -0,0 +1,162 @@
+import base64
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+SORTABLE_COLUMNS = ("symbol", "name", "sector", "currentPrice", "change", "volume", "marketCap")
+NUMERIC_COLUMNS = ("currentPrice", "change", "volume", "marketCap")
+TEXT_COLUMNS = ("symbol", "name", "sector")
+# Grams up to this length are indexed, so short searches are direct lookups
+MAX_GRAM = 3
+
+
+def _grams(text: str, size: int) -> set:
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def encode_cursor(sort_by: str, sort_order: str, rank: int) -> str:
+    raw = json.dumps({"s": sort_by, "o": sort_order, "r": rank}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str, int]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return data["s"], data["o"], int(data["r"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+class InstrumentStore:
+    """
+    Immutable, column-oriented view of the instrument universe
+
+    Built once per universe load. Every query narrows a boolean row mask
+    using precomputed indexes (sector hash, sorted price array, n-gram text
+    index) and then orders the survivors with a presorted permutation, so
+    no request sorts or scans the records themselves.
+    """
+
+    def __init__(self, records: Iterable[dict]):
+        self.records = tuple(dict(record) for record in records)
+        self.size = len(self.records)
+
+        self.columns: Dict[str, np.ndarray] = {}
+        for column in NUMERIC_COLUMNS:
+            self.columns[column] = np.array([record[column] for record in self.records], dtype=np.float64)
+        for column in TEXT_COLUMNS:
+            self.columns[column] = np.array([record[column] for record in self.records], dtype=object)
+
+        # Sector hash index
+        sector_rows: Dict[str, List[int]] = {}
+        for row, sector in enumerate(self.columns["sector"]):
+            sector_rows.setdefault(sector.lower(), []).append(row)
+        self.sector_index = {sector: np.array(rows, dtype=np.int64) for sector, rows in sector_rows.items()}
+
+        # Sorted price array for range queries
+        self.price_order = np.argsort(self.columns["currentPrice"], kind="stable")
+        self.sorted_prices = self.columns["currentPrice"][self.price_order]
+
+        # N-gram index over symbol and name for substring search
+        gram_rows: Dict[str, set] = {}
+        self._search_text = []
+        for row, record in enumerate(self.records):
+            texts = (record["symbol"].lower(), record["name"].lower())
+            self._search_text.append(texts)
+            for text in texts:
+                for size in range(1, MAX_GRAM + 1):
+                    for gram in _grams(text, size):
+                        gram_rows.setdefault(gram, set()).add(row)
+        self.gram_index = {gram: np.fromiter(sorted(rows), dtype=np.int64) for gram, rows in gram_rows.items()}
+
+        # Presorted permutation and its inverse (rank) for every sortable column
+        self.permutations: Dict[str, np.ndarray] = {}
+        self.ranks: Dict[str, np.ndarray] = {}
+        for column in SORTABLE_COLUMNS:
+            values = self.columns[column]
+            if column in TEXT_COLUMNS:
+                order = np.array(sorted(range(self.size), key=lambda row: values[row]), dtype=np.int64)
+            else:
+                order = np.argsort(values, kind="stable")
+            rank = np.empty(self.size, dtype=np.int64)
+            rank[order] = np.arange(self.size)
+            self.permutations[column] = order
+            self.ranks[column] = rank
+
+    def _rows_mask(self, rows: np.ndarray) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        mask[rows] = True
+        return mask
+
+    def _search_mask(self, search: str) -> np.ndarray:
+        search = search.lower()
+        if len(search) <= MAX_GRAM:
+            rows = self.gram_index.get(search)
+            return self._rows_mask(rows) if rows is not None else np.zeros(self.size, dtype=bool)
+
+        # Candidates must contain every trigram of the query; confirm with a substring test
+        candidates = None
+        for gram in _grams(search, MAX_GRAM):
+            rows = self.gram_index.get(gram)
+            if rows is None:
+                return np.zeros(self.size, dtype=bool)
+            candidates = rows if candidates is None else np.intersect1d(candidates, rows, assume_unique=True)
+        matches = [row for row in candidates if any(search in text for text in self._search_text[row])]
+        return self._rows_mask(np.array(matches, dtype=np.int64))
+
+    def _price_mask(self, min_price: Optional[float], max_price: Optional[float]) -> np.ndarray:
+        start = 0 if min_price is None else np.searchsorted(self.sorted_prices, min_price, side="left")
+        end = self.size if max_price is None else np.searchsorted(self.sorted_prices, max_price, side="right")
+        return self._rows_mask(self.price_order[start:end])
+
+    def query(
+        self,
+        sort_by: str = "symbol",
+        sort_order: str = "asc",
+        search: Optional[str] = None,
+        sector: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Filter, sort and page the universe; returns the page and the next cursor"""
+        if sort_by not in SORTABLE_COLUMNS:
+            raise ValueError(f"Unsupported sort_by. Supported columns are: {', '.join(SORTABLE_COLUMNS)}")
+        sort_order = sort_order.lower()
+        if sort_order not in ("asc", "desc"):
+            raise ValueError("sort_order must be 'asc' or 'desc'")
+
+        mask = np.ones(self.size, dtype=bool)
+        if sector:
+            rows = self.sector_index.get(sector.lower())
+            if rows is None:
+                return [], None
+            mask &= self._rows_mask(rows)
+        if min_price is not None or max_price is not None:
+            mask &= self._price_mask(min_price, max_price)
+        if search:
+            mask &= self._search_mask(search)
+
+        order = self.permutations[sort_by]
+        if sort_order == "desc":
+            order = order[::-1]
+        ordered = order[mask[order]]
+
+        # Keyset pagination on the row's position in the presorted permutation
+        rank = self.ranks[sort_by]
+        if cursor:
+            cursor_sort_by, cursor_order, cursor_rank = decode_cursor(cursor)
+            if (cursor_sort_by, cursor_order) != (sort_by, sort_order):
+                raise ValueError("Cursor does not match the requested sort")
+            after = rank[ordered] > cursor_rank if sort_order == "asc" else rank[ordered] < cursor_rank
+            ordered = ordered[after]
+
+        next_cursor = None
+        if limit is not None and len(ordered) > limit:
+            ordered = ordered[:limit]
+            next_cursor = encode_cursor(sort_by, sort_order, int(rank[ordered[-1]]))
+
+        return [dict(self.records[row]) for row in ordered], next_cursor
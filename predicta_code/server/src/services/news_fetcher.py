@@ -0,0 +1,179 @@
+import json
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+import httpx
+
+from .clients import clients
+from .fetch_engine import FetchResult
+from .ttl_cache import AsyncTTLCache
+
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+# How long an identical query is answered from the cache instead of upstream
+DEFAULT_TTL = float(os.getenv("PREDICTA_NEWS_TTL", "600"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("PREDICTA_NEWS_CACHE_SIZE", "256"))
+# NewsAPI developer plan: 100 requests per rolling day
+DEFAULT_DAILY_QUOTA = int(os.getenv("PREDICTA_NEWS_DAILY_QUOTA", "100"))
+DEFAULT_PER_MINUTE = int(os.getenv("PREDICTA_NEWS_PER_MINUTE", "10"))
+# Share of the daily quota that background polling may not touch
+DEFAULT_RESERVE = float(os.getenv("PREDICTA_NEWS_QUOTA_RESERVE", "0.3"))
+QUOTA_MESSAGE = "NewsAPI request budget exhausted"
+
+
+class QuotaExceeded(Exception):
+    """Raised when an upstream call would break the NewsAPI plan limits"""
+
+
+def normalize_params(params: dict) -> str:
+    """Canonical cache key for a NewsAPI query, independent of term order and case"""
+    normalized = {}
+    for name, value in params.items():
+        if name == "apiKey" or value is None:
+            continue
+        if name == "q":
+            terms = {term.strip().lower() for term in str(value).split(" OR ") if term.strip()}
+            value = " OR ".join(sorted(terms))
+        normalized[name] = str(value)
+    return json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+
+
+def format_article(article: dict) -> dict:
+    """Trim a NewsAPI article to the fields the API returns"""
+    return {
+        "title": article.get("title", ""),
+        "description": article.get("description", ""),
+        "url": article.get("url", ""),
+        "publishedAt": article.get("publishedAt", ""),
+        "source": {
+            "name": (article.get("source") or {}).get("name", "")
+        }
+    }
+
+
+class QuotaTracker:
+    """Rolling daily and per-minute request budgets for an upstream plan"""
+
+    def __init__(self, daily_limit: int = DEFAULT_DAILY_QUOTA, per_minute: int = DEFAULT_PER_MINUTE, reserve: float = DEFAULT_RESERVE):
+        self.daily_limit = daily_limit
+        self.per_minute = per_minute
+        self.reserve = reserve
+        self._calls: Deque[float] = deque()
+        self.rejected = 0
+
+    def _prune(self, now: float):
+        while self._calls and now - self._calls[0] > 86400:
+            self._calls.popleft()
+
+    def remaining(self) -> int:
+        self._prune(time.time())
+        return self.daily_limit - len(self._calls)
+
+    def acquire(self, background: bool = False):
+        """Record one upstream call, or raise QuotaExceeded if it is not affordable"""
+        now = time.time()
+        self._prune(now)
+        limit = self.daily_limit * (1 - self.reserve) if background else self.daily_limit
+        recent = sum(1 for call in reversed(self._calls) if now - call <= 60)
+        if len(self._calls) >= limit or recent >= self.per_minute:
+            self.rejected += 1
+            raise QuotaExceeded(QUOTA_MESSAGE)
+        self._calls.append(now)
+
+    def stats(self) -> dict:
+        return {
+            "daily_limit": self.daily_limit,
+            "used_last_24h": self.daily_limit - self.remaining(),
+            "remaining": self.remaining(),
+            "per_minute": self.per_minute,
+            "rejected": self.rejected
+        }
+
+
+class NewsFetcher:
+    """
+    Single entry point for NewsAPI queries
+
+    Pages are cached per normalized parameter set for ``ttl`` seconds and
+    only served while fresh, since ingestion relies on seeing new articles.
+    Concurrent identical queries share one upstream call. Once an entry
+    expires, its ETag / Last-Modified are replayed so an unchanged page
+    costs a 304. Every upstream call is charged against the plan quota.
+    Background refresh of popular queries is the ingestor's job: it keeps
+    polling the keys requests register until they go idle.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        quota: Optional[QuotaTracker] = None,
+        http: Optional[httpx.AsyncClient] = None
+    ):
+        self.api_key = api_key
+        # No stale window: an expired page is fetched again before it is served
+        self.cache = AsyncTTLCache(ttl=ttl, stale_ttl=ttl, max_entries=max_entries)
+        self.quota = quota or QuotaTracker()
+        self._http = http
+        # ETag / Last-Modified per key, dropped once the key leaves the cache
+        self._validators: Dict[str, Dict[str, str]] = {}
+        self.not_modified = 0
+
+    async def _request(self, key: str, params: dict, background: bool) -> FetchResult:
+        try:
+            self.quota.acquire(background=background)
+        except QuotaExceeded as e:
+            return FetchResult(key=key, error=str(e))
+
+        headers = {}
+        cached = self.cache.peek(key)
+        validators = self._validators.get(key, {}) if cached is not None else {}
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last-modified" in validators:
+            headers["If-Modified-Since"] = validators["last-modified"]
+
+        http = self._http or clients.http
+        response = await http.get(NEWS_API_URL, params={**params, "apiKey": self.api_key}, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            self.not_modified += 1
+            return FetchResult(key=key, value=cached)
+        if response.status_code != 200:
+            return FetchResult(key=key, error=f"NewsAPI returned {response.status_code}")
+
+        self._validators[key] = {
+            name: response.headers[name]
+            for name in ("etag", "last-modified")
+            if name in response.headers
+        }
+        return FetchResult(key=key, value=[format_article(article) for article in response.json().get("articles", [])])
+
+    async def poll(self, params: dict, background: bool = True) -> List[dict]:
+        """One page of articles, charged to the background share of the quota by default"""
+        key = normalize_params(params)
+        params = {name: value for name, value in params.items() if name != "apiKey"}
+
+        async def load(key: str) -> FetchResult:
+            return await self._request(key, params, background)
+
+        result = await self.cache.get(key, load)
+        self._prune()
+        if result.ok:
+            return result.value
+        if result.error == QUOTA_MESSAGE:
+            raise QuotaExceeded(result.error)
+        raise RuntimeError(result.error)
+
+    def _prune(self):
+        """Forget validators for keys the cache has evicted"""
+        for key in [key for key in self._validators if self.cache.age(key) is None]:
+            del self._validators[key]
+
+    def stats(self) -> dict:
+        return {
+            "cache": self.cache.stats(),
+            "quota": self.quota.stats(),
+            "not_modified": self.not_modified
+        }
@@ -0,0 +1,208 @@
+import asyncio
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .news_fetcher import NewsFetcher
+from .news_store import NewsStore, StoredArticle
+
+DEFAULT_INTERVAL = float(os.getenv("PREDICTA_NEWS_INGEST_INTERVAL", "900"))
+# NewsAPI's largest page
+DEFAULT_PAGE_SIZE = int(os.getenv("PREDICTA_NEWS_INGEST_PAGE_SIZE", "100"))
+# Pages fetched per poll at most; whatever is left is picked up by the next poll
+DEFAULT_MAX_PAGES = int(os.getenv("PREDICTA_NEWS_INGEST_MAX_PAGES", "5"))
+# Queries registered by requests stop being polled once nobody asked for them this long
+DEFAULT_IDLE_TTL = float(os.getenv("PREDICTA_NEWS_INGEST_IDLE_TTL", str(6 * 60 * 60)))
+DEFAULT_MAX_KEYS = int(os.getenv("PREDICTA_NEWS_INGEST_MAX_KEYS", "16"))
+
+IngestKey = Tuple[str, Optional[str]]
+
+
+def ingest_keys_from_env(default: str = "NSE") -> List[IngestKey]:
+    """Parse PREDICTA_NEWS_INGEST, e.g. "NSE,NYSE:us", into (exchange, country) pairs"""
+    keys = []
+    for item in os.getenv("PREDICTA_NEWS_INGEST", default).split(","):
+        item = item.strip()
+        if not item:
+            continue
+        exchange, _, country = item.partition(":")
+        keys.append((exchange, country or None))
+    return keys
+
+
+class NewsIngestor:
+    """
+    Polls NewsAPI incrementally and feeds new articles into a NewsStore
+
+    Each (exchange, country) query remembers the newest ``publishedAt`` up to
+    which it has ingested everything and only asks NewsAPI for articles from
+    that point on, paging until a short page. A poll that runs out of pages
+    or quota first keeps the watermark where it was and remembers the oldest
+    article it did get; the next poll fills the gap below it before moving on.
+
+    Configured keys are always polled. Keys registered by requests are polled
+    until they go ``idle_ttl`` seconds without being asked for, and at most
+    ``max_keys`` of them are kept. Callers are expected to validate keys.
+    """
+
+    def __init__(
+        self,
+        fetcher: NewsFetcher,
+        store: NewsStore,
+        build_query: Callable[[str, Optional[str]], dict],
+        resolve_country: Callable[[str, Optional[str]], str],
+        keys: Iterable[IngestKey] = (),
+        interval: float = DEFAULT_INTERVAL,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_pages: int = DEFAULT_MAX_PAGES,
+        idle_ttl: float = DEFAULT_IDLE_TTL,
+        max_keys: int = DEFAULT_MAX_KEYS
+    ):
+        self.fetcher = fetcher
+        self.store = store
+        self.build_query = build_query
+        self.resolve_country = resolve_country
+        self.configured: Set[IngestKey] = set(keys)
+        self.interval = interval
+        self.page_size = page_size
+        self.max_pages = max(1, max_pages)
+        self.idle_ttl = idle_ttl
+        self.max_keys = max_keys
+        # Last request time per on-demand key
+        self._requested: Dict[IngestKey, float] = {}
+        self._polled: Set[IngestKey] = set()
+        self._inflight: Dict[IngestKey, asyncio.Task] = {}
+        # Per query: (newest publishedAt fetched, oldest publishedAt fetched) while a gap is open
+        self._gaps: Dict[str, Tuple[str, str]] = {}
+        # Most recent failure per query, cleared by the next successful poll
+        self.errors: Dict[IngestKey, Exception] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"polls": 0, "pages": 0, "failures": 0, "ingested": 0, "incomplete": 0, "expired": 0}
+
+    @property
+    def keys(self) -> Set[IngestKey]:
+        return self.configured | set(self._requested)
+
+    @staticmethod
+    def query_name(exchange: str, country: Optional[str]) -> str:
+        return f"{exchange}:{country or 'All'}"
+
+    async def _poll(self, exchange: str, country: Optional[str], background: bool) -> List[StoredArticle]:
+        query = self.query_name(exchange, country)
+        params = {**self.build_query(exchange, country), "pageSize": self.page_size}
+        watermark = self.store.watermark(query)
+        if watermark:
+            params["from"] = watermark
+        gap = self._gaps.get(query)
+        if gap:
+            params["to"] = gap[1]
+
+        self._stats["polls"] += 1
+        added: List[StoredArticle] = []
+        published: List[str] = []
+        complete = False
+        try:
+            for page in range(1, self.max_pages + 1):
+                articles = await self.fetcher.poll({**params, "page": page}, background=background)
+                self._stats["pages"] += 1
+                added.extend(self.store.add_many(articles, country=self.resolve_country(exchange, country), exchange=exchange))
+                published.extend(article["publishedAt"] for article in articles if article.get("publishedAt"))
+                if len(articles) < self.page_size:
+                    complete = True
+                    break
+        finally:
+            self._stats["ingested"] += len(added)
+            self._advance(query, published, complete, gap)
+        return added
+
+    def _advance(self, query: str, published: List[str], complete: bool, gap: Optional[Tuple[str, str]]):
+        """Move the watermark only past articles known to be fully ingested"""
+        newest = max(published, default=None)
+        head = gap[0] if gap else newest
+        if complete:
+            self._gaps.pop(query, None)
+            if head:
+                self.store.set_watermark(query, head)
+            return
+        self._stats["incomplete"] += 1
+        if published:
+            # Results come newest first, so everything between the watermark and the oldest one is still missing
+            self._gaps[query] = (head, min(published))
+
+    async def ingest(self, exchange: str, country: Optional[str] = None, background: bool = True) -> List[StoredArticle]:
+        """Pull articles newer than the query's watermark; concurrent calls share one poll"""
+        key = (exchange, country)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._poll(exchange, country, background))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        try:
+            added = await asyncio.shield(task)
+        except Exception as e:
+            self.errors[key] = e
+            raise
+        finally:
+            self._polled.add(key)
+        self.errors.pop(key, None)
+        return added
+
+    async def ensure(self, exchange: str, country: Optional[str] = None):
+        """Register a validated query and ingest it once before it is first served; later polls run in the background"""
+        key = (exchange, country)
+        if key not in self.configured:
+            self._requested[key] = time.monotonic()
+            self._expire()
+        if key in self._polled:
+            return
+        try:
+            await self.ingest(exchange, country, background=False)
+        except Exception as e:
+            # Whatever the store already holds is still worth serving
+            self._stats["failures"] += 1
+            print(f"News ingestion for {self.query_name(exchange, country)} failed: {str(e)}")
+
+    def _expire(self):
+        """Stop polling on-demand keys that went idle, then the least recently asked beyond max_keys"""
+        cutoff = time.monotonic() - self.idle_ttl
+        ranked = sorted(self._requested.items(), key=lambda item: item[1], reverse=True)
+        for position, (key, requested) in enumerate(ranked):
+            if requested < cutoff or position >= self.max_keys:
+                del self._requested[key]
+                self._polled.discard(key)
+                self.errors.pop(key, None)
+                self._gaps.pop(self.query_name(*key), None)
+                self._stats["expired"] += 1
+
+    async def ingest_all(self):
+        self._expire()
+        keys = list(self.keys)
+        results = await asyncio.gather(*(self.ingest(*key) for key in keys), return_exceptions=True)
+        for key, result in zip(keys, results):
+            if isinstance(result, Exception):
+                self._stats["failures"] += 1
+                print(f"News ingestion for {self.query_name(*key)} failed: {str(result)}")
+
+    async def _run(self):
+        while True:
+            await self.ingest_all()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Begin periodic polling; an interval of zero or less disables it"""
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "queries": sorted(self.query_name(*key) for key in self.keys),
+            "open_gaps": sorted(self._gaps),
+            "store": self.store.stats()
+        }
@@ -0,0 +1,308 @@
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+DEFAULT_STORE_PATH = os.getenv(
+    "PREDICTA_NEWS_STORE",
+    os.path.join(os.path.dirname(__file__), "../../.cache/news/articles.jsonl")
+)
+# Fingerprints this many bits apart or closer are treated as the same story
+DEFAULT_MAX_DISTANCE = int(os.getenv("PREDICTA_NEWS_SIMHASH_DISTANCE", "3"))
+
+# Width of one time-index bucket; a day keeps buckets small and their count modest
+BUCKET_SECONDS = 86400
+
+FINGERPRINT_BITS = 64
+# Four 16-bit bands: by pigeonhole, any pair within 3 bits agrees on at least one band
+FINGERPRINT_BANDS = 4
+BAND_BITS = FINGERPRINT_BITS // FINGERPRINT_BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash of the word tokens in a text"""
+    weights = [0] * FINGERPRINT_BITS
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        value = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def parse_published_at(value: str) -> float:
+    """Epoch seconds for a NewsAPI publishedAt value; unparseable values sort first"""
+    try:
+        published = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return 0.0
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return published.timestamp()
+
+
+def encode_cursor(published_ts: float, seq: int) -> str:
+    raw = json.dumps({"t": published_ts, "q": seq}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return float(data["t"]), int(data["q"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+class TimeIndex:
+    """
+    (published_ts, seq) entries split into fixed-width time buckets
+
+    Bucket starts are kept in a sorted list, so locating the bucket for any
+    position is a bisect, and inserts only shift entries within one bucket.
+    Walking newest-first from an arbitrary point therefore costs O(log n) to
+    start, however deep the page is.
+    """
+
+    def __init__(self, bucket_seconds: int = BUCKET_SECONDS):
+        self.bucket_seconds = bucket_seconds
+        self._starts: List[int] = []
+        self._buckets: Dict[int, List[Tuple[float, int]]] = {}
+        self.size = 0
+
+    def insert(self, published_ts: float, seq: int):
+        start = int(published_ts // self.bucket_seconds) * self.bucket_seconds
+        bucket = self._buckets.get(start)
+        if bucket is None:
+            bucket = self._buckets[start] = []
+            insort(self._starts, start)
+        insort(bucket, (published_ts, seq))
+        self.size += 1
+
+    def descending(self, before: Optional[Tuple[float, int]] = None, after: float = 0.0) -> Iterator[Tuple[float, int]]:
+        """Entries strictly older than ``before`` and at or after ``after``, newest first"""
+        if before is None:
+            position = len(self._starts) - 1
+        else:
+            position = bisect_right(self._starts, int(before[0] // self.bucket_seconds) * self.bucket_seconds) - 1
+        while position >= 0:
+            start = self._starts[position]
+            if start + self.bucket_seconds <= after:
+                return
+            bucket = self._buckets[start]
+            end = bisect_left(bucket, before) if before is not None else len(bucket)
+            for index in range(end - 1, -1, -1):
+                entry = bucket[index]
+                if entry[0] < after:
+                    return
+                yield entry
+            position -= 1
+
+
+@dataclass(frozen=True)
+class StoredArticle:
+    """One deduplicated article as kept in the local news store"""
+    seq: int
+    url: str
+    title: str
+    description: str
+    publishedAt: str
+    source: str
+    country: str
+    exchange: str
+    fingerprint: int
+    published_ts: float
+
+    def to_dict(self) -> dict:
+        """The article in the shape /news has always returned"""
+        return {
+            "title": self.title,
+            "description": self.description,
+            "url": self.url,
+            "publishedAt": self.publishedAt,
+            "source": {
+                "name": self.source
+            }
+        }
+
+
+class NewsStore:
+    """
+    Append-only article log with in-memory dedup and time indexes
+
+    Each accepted article is written as one JSON line and never rewritten, so
+    the file can be replayed on startup to rebuild every index. Duplicates are
+    rejected by exact URL and by SimHash of title and description, which
+    catches the same wire story syndicated under different URLs.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_STORE_PATH, max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.path = path
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._articles: List[StoredArticle] = []
+        self._urls: Set[str] = set()
+        self._bands: List[Dict[int, List[int]]] = [{} for _ in range(FINGERPRINT_BANDS)]
+        # Per-country time indexes for windowed and paginated reads
+        self._by_country: Dict[str, TimeIndex] = {}
+        self._latest_seq: Dict[str, int] = {}
+        self._watermarks: Dict[str, str] = {}
+        self.duplicates = {"url": 0, "fingerprint": 0}
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._replay()
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write is skipped
+                    continue
+                if record.get("type") == "watermark":
+                    self._watermarks[record["query"]] = record["publishedAt"]
+                else:
+                    self._index(StoredArticle(**{**record["article"], "seq": len(self._articles)}))
+
+    def _append_log(self, records: Iterable[dict]):
+        if not self.path:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def _bands_of(self, fingerprint: int) -> List[int]:
+        return [fingerprint >> (band * BAND_BITS) & BAND_MASK for band in range(FINGERPRINT_BANDS)]
+
+    def _near_duplicate(self, fingerprint: int) -> bool:
+        for band, value in enumerate(self._bands_of(fingerprint)):
+            for seq in self._bands[band].get(value, ()):
+                if bin(self._articles[seq].fingerprint ^ fingerprint).count("1") <= self.max_distance:
+                    return True
+        return False
+
+    def _index(self, article: StoredArticle):
+        self._articles.append(article)
+        self._urls.add(article.url)
+        for band, value in enumerate(self._bands_of(article.fingerprint)):
+            self._bands[band].setdefault(value, []).append(article.seq)
+        index = self._by_country.get(article.country)
+        if index is None:
+            index = self._by_country[article.country] = TimeIndex()
+        index.insert(article.published_ts, article.seq)
+        self._latest_seq[article.country] = article.seq
+
+    def add_many(self, articles: Iterable[dict], country: str, exchange: str) -> List[StoredArticle]:
+        """Store the articles not seen before and return them, oldest first"""
+        added = []
+        with self._lock:
+            for article in sorted(articles, key=lambda a: a.get("publishedAt") or ""):
+                url = article.get("url") or ""
+                if not url or url in self._urls:
+                    self.duplicates["url"] += 1
+                    continue
+                title = article.get("title") or ""
+                description = article.get("description") or ""
+                fingerprint = simhash(f"{title} {description}")
+                if self._near_duplicate(fingerprint):
+                    self.duplicates["fingerprint"] += 1
+                    continue
+                stored = StoredArticle(
+                    seq=len(self._articles),
+                    url=url,
+                    title=title,
+                    description=description,
+                    publishedAt=article.get("publishedAt") or "",
+                    source=(article.get("source") or {}).get("name", ""),
+                    country=country,
+                    exchange=exchange,
+                    fingerprint=fingerprint,
+                    published_ts=parse_published_at(article.get("publishedAt"))
+                )
+                self._index(stored)
+                added.append(stored)
+            self._append_log({"type": "article", "article": {k: v for k, v in asdict(a).items() if k != "seq"}} for a in added)
+        return added
+
+    def watermark(self, query: str) -> Optional[str]:
+        """Newest publishedAt ingested for a query, if any"""
+        return self._watermarks.get(query)
+
+    def set_watermark(self, query: str, published_at: str):
+        with self._lock:
+            if published_at and published_at > self._watermarks.get(query, ""):
+                self._watermarks[query] = published_at
+                self._append_log([{"type": "watermark", "query": query, "publishedAt": published_at}])
+
+    def latest_seq(self, country: str) -> int:
+        """Sequence number of the newest article stored for a country, or -1"""
+        return self._latest_seq.get(country, -1)
+
+    def recent(self, country: str, since: float = 0.0, limit: Optional[int] = None) -> List[StoredArticle]:
+        """Articles for a country published at or after ``since``, newest first"""
+        articles, _ = self.page(country, after=since, limit=limit)
+        return articles
+
+    def page(
+        self,
+        country: str,
+        before: Optional[float] = None,
+        after: float = 0.0,
+        cursor: Optional[str] = None,
+        source: Optional[str] = None,
+        keyword: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[List[StoredArticle], Optional[str]]:
+        """
+        One newest-first page of a country's articles and the cursor for the next
+
+        ``before`` is exclusive and ``after`` inclusive, both epoch seconds. The
+        cursor resumes strictly after the last article of the previous page.
+        Raises ValueError for a malformed cursor.
+        """
+        start = decode_cursor(cursor) if cursor else None
+        index = self._by_country.get(country)
+        if index is None:
+            return [], None
+
+        if before is not None and (start is None or (before, -1) < start):
+            start = (before, -1)
+
+        matches: List[Callable[[StoredArticle], bool]] = []
+        if source:
+            source = source.lower()
+            matches.append(lambda article: article.source.lower() == source)
+        if keyword:
+            keyword = keyword.lower()
+            matches.append(lambda article: keyword in f"{article.title} {article.description}".lower())
+
+        articles = []
+        for published_ts, seq in index.descending(before=start, after=after):
+            article = self._articles[seq]
+            if all(match(article) for match in matches):
+                if limit is not None and len(articles) == limit:
+                    last = articles[-1]
+                    return articles, encode_cursor(last.published_ts, last.seq)
+                articles.append(article)
+        return articles, None
+
+    def stats(self) -> dict:
+        return {
+            "articles": len(self._articles),
+            "countries": {country: index.size for country, index in self._by_country.items()},
+            "duplicates": dict(self.duplicates),
+            "watermarks": dict(self._watermarks),
+            "path": os.path.abspath(self.path) if self.path else None
+        }
@@ -0,0 +1,398 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+DEFAULT_HISTORY_DIR = os.getenv(
+    "PREDICTA_HISTORY_DIR",
+    os.path.join(os.path.dirname(__file__), "../../.cache/history")
+)
+DEFAULT_BACKFILL_YEARS = int(os.getenv("PREDICTA_HISTORY_YEARS", "10"))
+DEFAULT_UPDATE_INTERVAL = float(os.getenv("PREDICTA_HISTORY_INTERVAL", "86400"))
+
+DAY_SECONDS = 86400
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+# On-disk dtype per column; timestamps are epoch seconds of the bar's UTC day
+COLUMN_DTYPES = {"timestamp": np.int64, **{column: np.float64 for column in PRICE_COLUMNS}}
+# Day (since the epoch) on which fixture prices equal their anchor: 2024-11-01, the quotes fixture date
+FIXTURE_ANCHOR_DAY = 20028
+
+
+@dataclass(frozen=True)
+class Bars:
+    """Daily OHLCV bars for one symbol as parallel columns"""
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    @classmethod
+    def empty(cls) -> "Bars":
+        return cls(**{column: np.empty(0, dtype=dtype) for column, dtype in COLUMN_DTYPES.items()})
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def slice(self, start: int, stop: int) -> "Bars":
+        return Bars(**{column: getattr(self, column)[start:stop] for column in COLUMN_DTYPES})
+
+    def to_dict(self) -> dict:
+        """Columnar JSON: one list per field, dates as ISO strings"""
+        return {
+            "dates": self.timestamp.astype("datetime64[s]").astype("datetime64[D]").astype(str).tolist(),
+            **{column: getattr(self, column).tolist() for column in PRICE_COLUMNS}
+        }
+
+
+@dataclass(frozen=True)
+class PriceMatrix:
+    """Bars for many symbols on a shared day axis: one (symbols, days) array per field"""
+    symbols: tuple
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    @property
+    def shape(self) -> tuple:
+        return self.close.shape
+
+    @classmethod
+    def from_bars(cls, symbols: Sequence[str], series: Sequence[Bars]) -> "PriceMatrix":
+        """Align per-symbol bars on the union of their days; NaN where a symbol has no bar"""
+        timestamps = np.unique(np.concatenate([bars.timestamp for bars in series])) if series else np.empty(0, dtype=np.int64)
+        columns = {column: np.full((len(symbols), len(timestamps)), np.nan) for column in PRICE_COLUMNS}
+        for row, bars in enumerate(series):
+            if len(bars) == 0:
+                continue
+            positions = np.searchsorted(timestamps, bars.timestamp)
+            for column in PRICE_COLUMNS:
+                columns[column][row, positions] = getattr(bars, column)
+        return cls(symbols=tuple(symbols), timestamp=timestamps.astype(np.int64), **columns)
+
+
+def day_start(moment: datetime) -> int:
+    """Epoch seconds of the UTC day containing ``moment``"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp()) // DAY_SECONDS * DAY_SECONDS
+
+
+class PriceHistoryStore:
+    """
+    Per-symbol daily bars in append-only, memory-mapped column files
+
+    Each symbol gets a directory holding one raw binary file per column and
+    a small ``index.json`` with the row count and date range. Appends write
+    new rows to the end of every column, then publish the new row count, so
+    readers never see a half-written bar. Reads map the files and slice
+    them, so a range read copies nothing until the data is serialized.
+    """
+
+    def __init__(self, root: str = DEFAULT_HISTORY_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._maps: Dict[str, Bars] = {}
+
+    def _dir(self, symbol: str) -> str:
+        return os.path.join(self.root, quote(symbol, safe=""))
+
+    def _read_index(self, symbol: str) -> dict:
+        try:
+            with open(os.path.join(self._dir(symbol), "index.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"rows": 0}
+
+    def _write_index(self, symbol: str, index: dict):
+        path = os.path.join(self._dir(symbol), "index.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(path + ".tmp", path)
+
+    def _map(self, symbol: str) -> Bars:
+        bars = self._maps.get(symbol)
+        if bars is not None:
+            return bars
+        rows = self._read_index(symbol)["rows"]
+        if rows == 0:
+            return Bars.empty()
+        directory = self._dir(symbol)
+        bars = Bars(**{
+            column: np.memmap(os.path.join(directory, f"{column}.bin"), dtype=dtype, mode="r", shape=(rows,))
+            for column, dtype in COLUMN_DTYPES.items()
+        })
+        self._maps[symbol] = bars
+        return bars
+
+    def symbols(self) -> List[str]:
+        return sorted(
+            unquote(name)
+            for name in os.listdir(self.root)
+            if os.path.exists(os.path.join(self.root, name, "index.json"))
+        )
+
+    def last_timestamp(self, symbol: str) -> Optional[int]:
+        index = self._read_index(symbol)
+        return index.get("last") if index["rows"] else None
+
+    def append(self, symbol: str, bars: Bars) -> int:
+        """Append bars newer than the last stored one; returns how many were written"""
+        if len(bars) == 0:
+            return 0
+        with self._lock:
+            index = self._read_index(symbol)
+            order = np.argsort(bars.timestamp, kind="stable")
+            timestamps = bars.timestamp[order].astype(np.int64)
+            keep = np.ones(len(timestamps), dtype=bool)
+            # Drop bars already on disk and duplicate days within the batch
+            if index["rows"]:
+                keep &= timestamps > index["last"]
+            keep[1:] &= timestamps[1:] != timestamps[:-1]
+            if not keep.any():
+                return 0
+
+            directory = self._dir(symbol)
+            os.makedirs(directory, exist_ok=True)
+            rows = order[keep]
+            for column, dtype in COLUMN_DTYPES.items():
+                values = np.ascontiguousarray(getattr(bars, column)[rows], dtype=dtype)
+                with open(os.path.join(directory, f"{column}.bin"), "ab") as f:
+                    # Truncate anything past the published row count left by an interrupted append
+                    f.truncate(index["rows"] * np.dtype(dtype).itemsize)
+                    f.write(values.tobytes())
+            written = int(keep.sum())
+            self._write_index(symbol, {
+                "rows": index["rows"] + written,
+                "first": index.get("first", int(timestamps[keep][0])),
+                "last": int(timestamps[keep][-1])
+            })
+            self._maps.pop(symbol, None)
+            return written
+
+    def read(self, symbol: str, start: Optional[int] = None, end: Optional[int] = None) -> Bars:
+        """Bars with start <= timestamp < end, as zero-copy views of the mapped files"""
+        bars = self._map(symbol)
+        if len(bars) == 0:
+            return bars
+        lo = 0 if start is None else int(np.searchsorted(bars.timestamp, start, side="left"))
+        hi = len(bars) if end is None else int(np.searchsorted(bars.timestamp, end, side="left"))
+        return bars.slice(lo, hi)
+
+    def read_matrix(self, symbols: Sequence[str], start: Optional[int] = None, end: Optional[int] = None) -> "PriceMatrix":
+        """Bars for many symbols aligned on the union of their days; NaN where a symbol has no bar"""
+        return PriceMatrix.from_bars(symbols, [self.read(symbol, start=start, end=end) for symbol in symbols])
+
+    def stats(self) -> dict:
+        symbols = self.symbols()
+        return {
+            "symbols": len(symbols),
+            "rows": sum(self._read_index(symbol)["rows"] for symbol in symbols),
+            "path": os.path.abspath(self.root)
+        }
+
+
+class HistoryProvider:
+    """Source of daily bars; ``fetch`` blocks and runs on a worker thread"""
+
+    name = "base"
+
+    def fetch(self, symbols: Sequence[str], start: int) -> Dict[str, Bars]:
+        raise NotImplementedError
+
+
+class YFinanceHistoryProvider(HistoryProvider):
+    """Daily bars for many symbols from one ``yf.download`` call"""
+
+    name = "download"
+
+    def fetch(self, symbols: Sequence[str], start: int) -> Dict[str, Bars]:
+        import yfinance as yf
+        frame = yf.download(
+            tickers=list(symbols),
+            start=datetime.fromtimestamp(start, tz=timezone.utc).strftime("%Y-%m-%d"),
+            interval="1d",
+            group_by="ticker",
+            auto_adjust=False,
+            progress=False,
+            threads=True
+        )
+        results = {}
+        if frame.empty:
+            return results
+        for symbol in symbols:
+            try:
+                history = frame[symbol] if frame.columns.nlevels > 1 else frame
+            except KeyError:
+                continue
+            history = history.dropna(subset=["Close"])
+            if history.empty:
+                continue
+            results[symbol] = Bars(
+                timestamp=(history.index.tz_localize(None).values.astype("datetime64[s]").astype(np.int64) // DAY_SECONDS * DAY_SECONDS),
+                open=history["Open"].to_numpy(np.float64),
+                high=history["High"].to_numpy(np.float64),
+                low=history["Low"].to_numpy(np.float64),
+                close=history["Close"].to_numpy(np.float64),
+                volume=history["Volume"].to_numpy(np.float64)
+            )
+        return results
+
+
+class FixtureHistoryProvider(HistoryProvider):
+    """
+    Deterministic synthetic bars for offline development, tests and benchmarks
+
+    Each symbol gets a seeded geometric random walk over weekdays, so the
+    same symbol and date range always produce the same bars.
+    """
+
+    name = "fixture"
+
+    def __init__(self, anchors: Optional[Dict[str, float]] = None, today: Optional[int] = None):
+        self.anchors = anchors or {}
+        self.today = today
+
+    def fetch(self, symbols: Sequence[str], start: int) -> Dict[str, Bars]:
+        end = self.today if self.today is not None else day_start(datetime.now(timezone.utc))
+        days = np.arange(start // DAY_SECONDS, end // DAY_SECONDS + 1, dtype=np.int64)
+        # 1970-01-01 was a Thursday, so (day + 3) % 7 gives Monday = 0
+        days = days[(days + 3) % 7 < 5]
+        results = {}
+        for symbol in symbols:
+            results[symbol] = self.walk(symbol, days)
+        return results
+
+    def walk(self, symbol: str, days: np.ndarray) -> Bars:
+        seed = int.from_bytes(hashlib.blake2b(symbol.encode("utf-8"), digest_size=8).digest(), "big")
+        # Every series is drawn per absolute day from its own stream, so any two
+        # requested ranges agree where they overlap and appends join up seamlessly
+        span = max(int(days[-1]) if len(days) else 0, FIXTURE_ANCHOR_DAY) + 1
+
+        def draws(stream: int, sample):
+            return sample(np.random.default_rng([seed, stream]))
+
+        log_price = np.cumsum(draws(0, lambda rng: rng.normal(0.0003, 0.018, span)))
+        # Prices are pinned to the anchor on the fixture's reference day
+        close = self.anchors.get(symbol, 100.0) * np.exp(log_price[days] - log_price[FIXTURE_ANCHOR_DAY])
+        open_ = close * (1 + draws(1, lambda rng: rng.normal(0.0, 0.005, span))[days])
+        spread = np.abs(draws(2, lambda rng: rng.normal(0.0, 0.01, span)))[days]
+        volume = np.round(draws(3, lambda rng: rng.lognormal(12.0, 0.6, span))[days])
+        return Bars(
+            timestamp=days * DAY_SECONDS,
+            open=open_,
+            high=np.maximum(open_, close) * (1 + spread),
+            low=np.minimum(open_, close) * (1 - spread),
+            close=close,
+            volume=volume
+        )
+
+
+def history_provider_from_env(anchors: Optional[Dict[str, float]] = None) -> HistoryProvider:
+    """Build the provider selected by PREDICTA_HISTORY_PROVIDER (download or fixture)"""
+    if os.getenv("PREDICTA_HISTORY_PROVIDER", "download").lower() == "fixture":
+        return FixtureHistoryProvider(anchors=anchors)
+    return YFinanceHistoryProvider()
+
+
+class HistoryUpdater:
+    """
+    Backfills missing symbols once, then appends new daily bars on a schedule
+
+    Symbols are grouped by the day their update starts from, so a daily run
+    over a fully backfilled universe is a single provider call. Only bars
+    for UTC days that have ended are stored: stored rows are never rewritten,
+    so today's still-open bar would otherwise stay partial forever. It is
+    picked up on the first update after midnight UTC.
+    """
+
+    def __init__(
+        self,
+        store: PriceHistoryStore,
+        provider: HistoryProvider,
+        symbols: Iterable[str],
+        backfill_years: int = DEFAULT_BACKFILL_YEARS,
+        interval: float = DEFAULT_UPDATE_INTERVAL
+    ):
+        self.store = store
+        self.provider = provider
+        self.symbols = list(symbols)
+        self.backfill_years = backfill_years
+        self.interval = interval
+        self.updates = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_run: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def update(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Fetch and append whatever each symbol is missing; returns rows written per symbol"""
+        now = datetime.now(timezone.utc)
+        today = day_start(now)
+        backfill_from = day_start(now - timedelta(days=365 * self.backfill_years))
+        groups: Dict[int, List[str]] = {}
+        for symbol in symbols or self.symbols:
+            last = self.store.last_timestamp(symbol)
+            start = backfill_from if last is None else last + DAY_SECONDS
+            # Nothing has closed since the last stored bar
+            if start < today:
+                groups.setdefault(start, []).append(symbol)
+
+        written = {}
+        for start, group in groups.items():
+            try:
+                fetched = self.provider.fetch(group, start)
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                print(f"History update failed for {len(group)} symbols: {str(e)}")
+                continue
+            for symbol, bars in fetched.items():
+                closed = int(np.searchsorted(bars.timestamp, today))
+                written[symbol] = self.store.append(symbol, bars.slice(0, closed))
+        self.updates += 1
+        self.last_run = time.time()
+        return written
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.update)
+            except Exception as e:
+                print(f"History update failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Begin periodic updates; an interval of zero or less disables them"""
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "provider": self.provider.name,
+            "symbols": len(self.symbols),
+            "updates": self.updates,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_run": self.last_run,
+            "store": self.store.stats()
+        }
@@ -0,0 +1,19 @@
+import os
+
+from .ttl_cache import AsyncTTLCache
+
+DEFAULT_TTL = float(os.getenv("PREDICTA_QUOTE_TTL", "60"))
+DEFAULT_STALE_TTL = float(os.getenv("PREDICTA_QUOTE_STALE_TTL", "600"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("PREDICTA_QUOTE_CACHE_SIZE", "1024"))
+
+
+class QuoteCache(AsyncTTLCache):
+    """Shared cache in front of yfinance quote lookups"""
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        stale_ttl: float = DEFAULT_STALE_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        super().__init__(ttl=ttl, stale_ttl=stale_ttl, max_entries=max_entries)
@@ -0,0 +1,254 @@
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cached_property
+from typing import Dict, Optional, Sequence, Set
+
+import numpy as np
+
+from .fetch_engine import FetchEngine, FetchResult
+
+DEFAULT_FIXTURE_PATH = os.getenv(
+    "PREDICTA_QUOTE_FIXTURE",
+    os.path.join(os.path.dirname(__file__), "../../data/quotes_fixture.json")
+)
+# Misses arriving within this window are folded into one upstream call
+DEFAULT_BATCH_WINDOW = float(os.getenv("PREDICTA_QUOTE_BATCH_WINDOW", "0.01"))
+DEFAULT_MAX_BATCH = int(os.getenv("PREDICTA_QUOTE_MAX_BATCH", "200"))
+DEFAULT_BATCH_TIMEOUT = float(os.getenv("PREDICTA_QUOTE_BATCH_TIMEOUT", "20"))
+
+
+@dataclass(frozen=True)
+class QuoteBatch:
+    """Latest quotes for many symbols as parallel columns; missing values are NaN"""
+    symbols: tuple
+    price: np.ndarray
+    previous_close: np.ndarray
+    volume: np.ndarray
+    as_of: float
+
+    @classmethod
+    def from_rows(cls, rows: Dict[str, dict], symbols: Sequence[str], as_of: Optional[float] = None) -> "QuoteBatch":
+        """Build columns for ``symbols`` from per-symbol dicts, NaN where absent"""
+        def column(field: str) -> np.ndarray:
+            return np.array(
+                [np.nan if rows.get(symbol, {}).get(field) is None else float(rows[symbol][field]) for symbol in symbols],
+                dtype=np.float64
+            )
+
+        return cls(
+            symbols=tuple(symbols),
+            price=column("price"),
+            previous_close=column("previousClose"),
+            volume=column("volume"),
+            as_of=time.time() if as_of is None else as_of
+        )
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @cached_property
+    def positions(self) -> Dict[str, int]:
+        return {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    def price_of(self, symbol: str) -> Optional[float]:
+        """Latest price for a symbol, or None if the batch has none"""
+        position = self.positions.get(symbol)
+        if position is None or np.isnan(self.price[position]):
+            return None
+        return float(self.price[position])
+
+
+class QuoteProvider:
+    """Source of latest quotes; ``fetch`` blocks and runs on a worker thread"""
+
+    name = "base"
+
+    def fetch(self, symbols: Sequence[str]) -> QuoteBatch:
+        raise NotImplementedError
+
+
+class YFinanceDownloadProvider(QuoteProvider):
+    """Every symbol in one ``yf.download`` of the last few daily bars"""
+
+    name = "download"
+
+    def __init__(self, period: str = "5d", interval: str = "1d"):
+        self.period = period
+        self.interval = interval
+
+    def fetch(self, symbols: Sequence[str]) -> QuoteBatch:
+        import yfinance as yf
+        frame = yf.download(
+            tickers=list(symbols),
+            period=self.period,
+            interval=self.interval,
+            group_by="column",
+            auto_adjust=False,
+            progress=False,
+            threads=True
+        )
+        rows = {}
+        if not frame.empty:
+            closes = frame["Close"]
+            volumes = frame["Volume"]
+            # A single ticker can come back as a Series rather than a one-column frame
+            if closes.ndim == 1:
+                closes = closes.to_frame(symbols[0])
+                volumes = volumes.to_frame(symbols[0])
+            for symbol in symbols:
+                if symbol not in closes:
+                    continue
+                history = closes[symbol].dropna()
+                if history.empty:
+                    continue
+                rows[symbol] = {
+                    "price": history.iloc[-1],
+                    "previousClose": history.iloc[-2] if len(history) > 1 else None,
+                    "volume": volumes[symbol].dropna().iloc[-1] if not volumes[symbol].dropna().empty else None
+                }
+        return QuoteBatch.from_rows(rows, symbols)
+
+
+class YFinanceInfoProvider(QuoteProvider):
+    """The original path: one full ``Ticker.info`` scrape per symbol"""
+
+    name = "info"
+
+    def fetch(self, symbols: Sequence[str]) -> QuoteBatch:
+        import yfinance as yf
+        rows = {}
+        for symbol in symbols:
+            try:
+                info = yf.Ticker(symbol).info
+            except Exception as e:
+                print(f"Quote lookup failed for {symbol}: {str(e)}")
+                continue
+            rows[symbol] = {
+                "price": info.get("regularMarketPrice"),
+                "previousClose": info.get("regularMarketPreviousClose"),
+                "volume": info.get("regularMarketVolume")
+            }
+        return QuoteBatch.from_rows(rows, symbols)
+
+
+class FixtureQuoteProvider(QuoteProvider):
+    """Quotes from a local JSON file, for offline development and benchmarks"""
+
+    name = "fixture"
+
+    def __init__(self, path: str = DEFAULT_FIXTURE_PATH, latency: float = 0.0):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.rows: Dict[str, dict] = data.get("quotes", data)
+        # Fixture quotes are as old as the file says, not as old as the fetch
+        as_of = data.get("as_of") if "quotes" in data else None
+        self.as_of = datetime.fromisoformat(as_of.replace("Z", "+00:00")).timestamp() if as_of else None
+        # Simulated round-trip time per fetch call
+        self.latency = latency
+
+    def fetch(self, symbols: Sequence[str]) -> QuoteBatch:
+        if self.latency:
+            time.sleep(self.latency)
+        return QuoteBatch.from_rows(self.rows, symbols, as_of=self.as_of)
+
+
+def provider_from_env() -> QuoteProvider:
+    """Build the provider selected by PREDICTA_QUOTE_PROVIDER (download, info or fixture)"""
+    kind = os.getenv("PREDICTA_QUOTE_PROVIDER", "download").lower()
+    if kind == "fixture":
+        return FixtureQuoteProvider()
+    if kind == "info":
+        return YFinanceInfoProvider()
+    return YFinanceDownloadProvider()
+
+
+class BatchingQuoteLoader:
+    """
+    Per-symbol loader that turns concurrent misses into batched provider calls
+
+    The quote cache asks for one symbol at a time. Requests arriving within
+    ``window`` seconds of each other are collected and resolved by a single
+    ``provider.fetch`` on the shared fetch engine, so a cold cache costs one
+    upstream round trip instead of one per symbol.
+    """
+
+    def __init__(
+        self,
+        provider: QuoteProvider,
+        engine: FetchEngine,
+        window: float = DEFAULT_BATCH_WINDOW,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        timeout: float = DEFAULT_BATCH_TIMEOUT
+    ):
+        self.provider = provider
+        self.engine = engine
+        self.window = window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._batch_tasks: Set[asyncio.Task] = set()
+        self._stats = {"batches": 0, "symbols": 0, "failures": 0, "largest_batch": 0}
+
+    async def __call__(self, symbol: str) -> FetchResult:
+        future = self._pending.get(symbol)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[symbol] = future
+        if len(self._pending) >= self.max_batch:
+            self._flush(self._take())
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+        return await asyncio.shield(future)
+
+    def _take(self) -> Dict[str, asyncio.Future]:
+        pending, self._pending = self._pending, {}
+        return pending
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window)
+        self._flush_task = None
+        if self._pending:
+            self._flush(self._take())
+
+    def _flush(self, pending: Dict[str, asyncio.Future]):
+        task = asyncio.create_task(self._resolve(pending))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _resolve(self, pending: Dict[str, asyncio.Future]):
+        symbols = list(pending)
+        self._stats["batches"] += 1
+        self._stats["symbols"] += len(symbols)
+        self._stats["largest_batch"] = max(self._stats["largest_batch"], len(symbols))
+        try:
+            result = await self.engine.fetch_one(
+                f"{self.provider.name}:{len(symbols)}",
+                lambda _: self.provider.fetch(symbols),
+                timeout=self.timeout
+            )
+            if not result.ok:
+                self._stats["failures"] += 1
+            for symbol, future in pending.items():
+                if future.done():
+                    continue
+                if result.ok:
+                    future.set_result(FetchResult(key=symbol, value=result.value.price_of(symbol)))
+                else:
+                    future.set_result(FetchResult(key=symbol, error=result.error))
+        finally:
+            # A cancelled batch must not leave its waiters hanging
+            for future in pending.values():
+                if not future.done():
+                    future.cancel()
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "provider": self.provider.name,
+            "average_batch": round(self._stats["symbols"] / self._stats["batches"], 2) if self._stats["batches"] else 0.0
+        }
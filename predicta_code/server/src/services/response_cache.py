@@ -0,0 +1,232 @@
+import hashlib
+import os
+import re
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+import numpy as np
+
+DEFAULT_TTL = float(os.getenv("PREDICTA_CHAT_CACHE_TTL", "3600"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("PREDICTA_CHAT_CACHE_SIZE", "1024"))
+# Estimated Jaccard similarity of word shingles needed to reuse a cached answer. Off (0) by
+# default: near-identical questions can still need different answers; 0.9 is a sensible opt-in
+DEFAULT_SIMILARITY = float(os.getenv("PREDICTA_CHAT_CACHE_SIMILARITY", "0"))
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+# Words per shingle
+SHINGLE_SIZE = 2
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+# Upper-case tickers as typed, e.g. KQ or KCB.NR
+_TICKER = re.compile(r"\b[A-Z][A-Z0-9&]{1,5}(?:\.[A-Z]{1,3})?\b")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+# Normalized words that flip a question's meaning; contractions lose their apostrophe
+NEGATIONS = {
+    "not", "no", "never", "nor", "without", "cannot", "cant", "t",
+    "don", "doesn", "didn", "isn", "aren", "wasn", "weren", "won", "shouldn", "wouldn", "couldn"
+}
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    message = _PUNCTUATION.sub(" ", message.lower())
+    return _WHITESPACE.sub(" ", message).strip()
+
+
+def guard_terms(message: str, normalized: str) -> FrozenSet[str]:
+    """Tickers, numbers and negations, which must match exactly before a similar reply is reused"""
+    words = normalized.split()
+    return frozenset([
+        *(ticker.lower() for ticker in _TICKER.findall(message)),
+        *_NUMBER.findall(message),
+        *(word for word in words if word in NEGATIONS)
+    ])
+
+
+def hash_prompt(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+class MinHasher:
+    """MinHash signatures over word shingles, computed with NumPy"""
+
+    def __init__(self, num_permutations: int = NUM_PERMUTATIONS, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, MAX_HASH, size=num_permutations, dtype=np.uint64)
+        self.b = rng.randint(0, MAX_HASH, size=num_permutations, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        words = text.split()
+        shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        # Universal hashing (a * x + b) mod p, one row per permutation
+        permuted = (np.outer(self.a, hashes) + self.b[:, np.newaxis]) % MERSENNE_PRIME
+        return (permuted & MAX_HASH).min(axis=1)
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    prompt_hash: str
+    normalized: str
+    response: str
+    created_at: float
+    signature: Optional[np.ndarray] = None
+    guards: FrozenSet[str] = frozenset()
+    bands: Tuple[tuple, ...] = ()
+    hits: int = 0
+    last_hit: Optional[float] = None
+
+
+@dataclass
+class CacheHit:
+    response: str
+    match: str
+    similarity: float = 1.0
+
+
+class ResponseCache:
+    """
+    Two-stage cache for chat replies
+
+    Stage one is an exact lookup on the normalized message plus a hash of
+    the system prompt. Stage two, when a similarity threshold is set, looks
+    for a near-duplicate question through a MinHash LSH index over word
+    shingles and reuses its reply if the estimated similarity clears the
+    threshold and both questions name the same tickers, numbers and
+    negations. Entries
+    expire after ``ttl`` seconds and the least recently used are evicted
+    beyond ``max_entries``.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES, similarity: float = DEFAULT_SIMILARITY):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.hasher = MinHasher() if similarity > 0 else None
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._buckets: Dict[tuple, Set[str]] = {}
+        self._stats = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def _key(self, prompt_hash: str, normalized: str) -> str:
+        return hashlib.sha256(f"{prompt_hash}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def _bands(self, prompt_hash: str, signature: np.ndarray) -> Tuple[tuple, ...]:
+        return tuple(
+            (prompt_hash, band, signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes())
+            for band in range(BANDS)
+        )
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for band in entry.bands:
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+
+    def _expired(self, entry: CacheEntry, now: float) -> bool:
+        return now - entry.created_at > self.ttl
+
+    def _hit(self, entry: CacheEntry, now: float):
+        entry.hits += 1
+        entry.last_hit = now
+        self._entries.move_to_end(entry.key)
+
+    def get(self, message: str, system_prompt: str) -> Optional[CacheHit]:
+        """Return a cached reply for this question, or None on a miss"""
+        now = time.time()
+        prompt_hash = hash_prompt(system_prompt)
+        normalized = normalize_message(message)
+
+        key = self._key(prompt_hash, normalized)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if self._expired(entry, now):
+                self._remove(key)
+                self._stats["expirations"] += 1
+            else:
+                self._hit(entry, now)
+                self._stats["exact_hits"] += 1
+                return CacheHit(response=entry.response, match="exact")
+
+        if self.hasher is not None and normalized:
+            signature = self.hasher.signature(normalized)
+            guards = guard_terms(message, normalized)
+            candidates = set()
+            for band in self._bands(prompt_hash, signature):
+                candidates.update(self._buckets.get(band, ()))
+
+            best, best_score = None, 0.0
+            for candidate_key in candidates:
+                candidate = self._entries.get(candidate_key)
+                if candidate is None or self._expired(candidate, now) or candidate.guards != guards:
+                    continue
+                score = float(np.mean(candidate.signature == signature))
+                if score > best_score:
+                    best, best_score = candidate, score
+
+            if best is not None and best_score >= self.similarity:
+                self._hit(best, now)
+                self._stats["similar_hits"] += 1
+                return CacheHit(response=best.response, match="similar", similarity=round(best_score, 4))
+
+        self._stats["misses"] += 1
+        return None
+
+    def put(self, message: str, system_prompt: str, response: str):
+        """Cache the reply to a question"""
+        prompt_hash = hash_prompt(system_prompt)
+        normalized = normalize_message(message)
+        key = self._key(prompt_hash, normalized)
+        self._remove(key)
+
+        entry = CacheEntry(key=key, prompt_hash=prompt_hash, normalized=normalized, response=response, created_at=time.time())
+        if self.hasher is not None and normalized:
+            entry.signature = self.hasher.signature(normalized)
+            entry.guards = guard_terms(message, normalized)
+            entry.bands = self._bands(prompt_hash, entry.signature)
+            for band in entry.bands:
+                self._buckets.setdefault(band, set()).add(key)
+        self._entries[key] = entry
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+
+    def top_entries(self, limit: int = 20) -> List[dict]:
+        """Most frequently hit entries by hashed key; message and reply text never leave the cache"""
+        entries = sorted(self._entries.values(), key=lambda entry: entry.hits, reverse=True)[:limit]
+        return [
+            {
+                "key": entry.key[:16],
+                "hits": entry.hits,
+                "age_seconds": round(time.time() - entry.created_at, 1),
+                "last_hit": entry.last_hit
+            }
+            for entry in entries
+        ]
+
+    def stats(self) -> dict:
+        lookups = self._stats["exact_hits"] + self._stats["similar_hits"] + self._stats["misses"]
+        hits = self._stats["exact_hits"] + self._stats["similar_hits"]
+        return {
+            **self._stats,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "ttl": self.ttl,
+            "similarity_threshold": self.similarity
+        }
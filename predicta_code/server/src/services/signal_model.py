@@ -0,0 +1,273 @@
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_MODEL_DIR = os.getenv(
+    "PREDICTA_MODEL_DIR",
+    os.path.join(os.path.dirname(__file__), "../../.cache/models")
+)
+# Bump when the on-disk layout changes; older artifacts are then ignored
+ARTIFACT_FORMAT = 1
+LATEST_POINTER = "LATEST"
+ARRAYS = ("mean", "scale", "ridge", "logistic")
+
+# Model inputs, in column order; every one is scale-free so symbols share one model
+FEATURES = (
+    "close_vs_sma_20",
+    "close_vs_sma_50",
+    "ema_spread",
+    "macd_histogram",
+    "rsi",
+    "bollinger_position",
+    "atr_ratio",
+    "volatility",
+    "news_sentiment",
+    "news_mentions"
+)
+# News sentiment scores run from -5 to 5
+SENTIMENT_SCALE = 5.0
+
+
+def build_features(
+    indicators: Mapping[str, np.ndarray],
+    close: np.ndarray,
+    sentiment: Optional[np.ndarray] = None,
+    mentions: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Feature tensor shaped like ``close`` plus a trailing FEATURES axis
+
+    Works on full (symbols, days) indicator series for training and on the
+    latest column per symbol for inference. Missing technicals stay NaN;
+    missing news counts as neutral.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    values = {name: np.asarray(column, dtype=np.float64) for name, column in indicators.items()}
+    sentiment = np.zeros_like(close) if sentiment is None else np.nan_to_num(np.asarray(sentiment, dtype=np.float64))
+    mentions = np.zeros_like(close) if mentions is None else np.nan_to_num(np.asarray(mentions, dtype=np.float64))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        band = values["bollinger_upper"] - values["bollinger_lower"]
+        columns = [
+            close / values["sma_20"] - 1,
+            close / values["sma_50"] - 1,
+            values["ema_12"] / values["ema_26"] - 1,
+            values["macd_histogram"] / close,
+            (values["rsi"] - 50) / 50,
+            np.where(band > 0, (close - values["bollinger_middle"]) / band, 0.0),
+            values["atr"] / close,
+            values["volatility"],
+            np.clip(sentiment / SENTIMENT_SCALE, -1.0, 1.0),
+            np.log1p(np.clip(mentions, 0.0, None))
+        ]
+    return np.stack(columns, axis=-1)
+
+
+def forward_returns(close: np.ndarray, horizon: int) -> np.ndarray:
+    """Log return in percent from each day's close to the close ``horizon`` bars later"""
+    result = np.full(close.shape, np.nan)
+    if close.shape[-1] > horizon:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result[..., :-horizon] = np.log(close[..., horizon:] / close[..., :-horizon]) * 100
+    return result
+
+
+def standardize(x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Column means and scales; constant columns get a scale of one"""
+    mean = x.mean(axis=0)
+    scale = x.std(axis=0)
+    return mean, np.where(scale > 0, scale, 1.0)
+
+
+def fit_ridge(z: np.ndarray, y: np.ndarray, alpha: float) -> np.ndarray:
+    """Ridge coefficients on standardized inputs, intercept last and unpenalized"""
+    offset = y.mean()
+    gram = z.T @ z + alpha * np.eye(z.shape[1])
+    coef = np.linalg.solve(gram, z.T @ (y - offset))
+    return np.append(coef, offset - z.mean(axis=0) @ coef)
+
+
+def sigmoid(x: np.ndarray) -> np.ndarray:
+    return 0.5 * (1 + np.tanh(0.5 * x))
+
+
+def fit_logistic(z: np.ndarray, y: np.ndarray, alpha: float, iterations: int = 25, tolerance: float = 1e-8) -> np.ndarray:
+    """L2-penalized logistic regression by Newton's method, intercept last and unpenalized"""
+    design = np.hstack([z, np.ones((len(z), 1))])
+    penalty = np.full(design.shape[1], alpha)
+    penalty[-1] = 0.0
+    weights = np.zeros(design.shape[1])
+    for _ in range(iterations):
+        p = sigmoid(design @ weights)
+        gradient = design.T @ (p - y) + penalty * weights
+        hessian = (design * (p * (1 - p))[:, None]).T @ design + np.diag(penalty) + 1e-9 * np.eye(design.shape[1])
+        step = np.linalg.solve(hessian, gradient)
+        weights -= step
+        if np.max(np.abs(step)) < tolerance:
+            break
+    return weights
+
+
+def rank_rows(x: np.ndarray) -> np.ndarray:
+    """1-based ranks along axis 1 with ties sharing their average rank; NaN stays NaN"""
+    rows, width = x.shape
+    order = np.argsort(x, axis=1)
+    ordered = np.take_along_axis(x, order, axis=1)
+    # Number each run of equal values, then give every member the run's mean position
+    starts = np.ones(x.shape, dtype=bool)
+    starts[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    runs = np.cumsum(starts, axis=1) + np.arange(rows)[:, None] * (width + 1)
+    positions = np.broadcast_to(np.arange(1, width + 1, dtype=np.float64), x.shape)
+    totals = np.bincount(runs.ravel(), weights=positions.ravel(), minlength=rows * (width + 1))
+    counts = np.bincount(runs.ravel(), minlength=rows * (width + 1))
+    ranks = np.empty(x.shape)
+    np.put_along_axis(ranks, order, totals[runs] / counts[runs], axis=1)
+    ranks[np.isnan(x)] = np.nan
+    return ranks
+
+
+def cross_sectional_ic(predicted: np.ndarray, realized: np.ndarray, min_names: int = 3) -> np.ndarray:
+    """Per-day Spearman correlation across symbols for (days, symbols) arrays; NaN on thin days"""
+    valid = np.isfinite(predicted) & np.isfinite(realized)
+    counts = valid.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Ranks of valid pairs only, centred on their per-day mean
+        ranks = []
+        for values in (predicted, realized):
+            rank = rank_rows(np.where(valid, values, np.nan))
+            ranks.append(np.where(valid, rank - ((counts + 1) / 2)[:, None], 0.0))
+        a, b = ranks
+        ic = (a * b).sum(axis=1) / np.sqrt((a * a).sum(axis=1) * (b * b).sum(axis=1))
+    ic[counts < min_names] = np.nan
+    return ic
+
+
+def signal_metrics(predicted: np.ndarray, realized: np.ndarray, probability: Optional[np.ndarray] = None) -> dict:
+    """Hit rate, mean daily IC and (with probabilities) log loss for (days, symbols) arrays"""
+    valid = np.isfinite(predicted) & np.isfinite(realized)
+    metrics = {"samples": int(valid.sum())}
+    if not metrics["samples"]:
+        return {**metrics, "hit_rate": None, "ic": None, "log_loss": None}
+    metrics["hit_rate"] = float(np.mean(np.sign(predicted[valid]) == np.sign(realized[valid])))
+    ic = cross_sectional_ic(predicted, realized)
+    metrics["ic"] = float(np.nanmean(ic)) if np.isfinite(ic).any() else None
+    if probability is not None:
+        p = np.clip(probability[valid], 1e-6, 1 - 1e-6)
+        up = realized[valid] > 0
+        metrics["log_loss"] = float(-np.mean(np.where(up, np.log(p), np.log(1 - p))))
+    return metrics
+
+
+def walk_forward_splits(days: int, folds: int, horizon: int, min_train: int) -> List[Tuple[int, int, int]]:
+    """
+    ``(train_end, test_start, test_end)`` day ranges for expanding-window validation
+
+    Test blocks tile the days after ``min_train``; each trains on everything
+    up to ``horizon`` days before its block, so no training target overlaps
+    a test day.
+    """
+    if days - min_train < folds or folds < 1:
+        return []
+    edges = np.linspace(min_train, days, folds + 1).astype(int)
+    return [
+        (int(start) - horizon, int(start), int(stop))
+        for start, stop in zip(edges[:-1], edges[1:])
+        if start - horizon > 0 and stop > start
+    ]
+
+
+@dataclass(frozen=True)
+class SignalModel:
+    """
+    Linear forecaster over FEATURES: expected return in percent and probability of a rise
+
+    A ridge regression gives the expected ``horizon``-day move and a logistic
+    regression the probability that it is positive. Both share one
+    standardization; weights carry their intercept as the last element.
+    """
+    version: str
+    features: tuple
+    horizon: int
+    mean: np.ndarray
+    scale: np.ndarray
+    ridge: np.ndarray
+    logistic: np.ndarray
+    metadata: dict = field(default_factory=dict)
+
+    def transform(self, x: np.ndarray) -> np.ndarray:
+        """Standardize features; missing values fall back to the training mean"""
+        return np.nan_to_num((np.asarray(x, dtype=np.float64) - self.mean) / self.scale)
+
+    def predict(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Expected return and probability of a rise for every row of ``x``"""
+        z = self.transform(x)
+        expected = z @ self.ridge[:-1] + self.ridge[-1]
+        probability = sigmoid(z @ self.logistic[:-1] + self.logistic[-1])
+        return expected, probability
+
+    def save(self, root: str = DEFAULT_MODEL_DIR) -> str:
+        """Write the artifact to ``root/<version>`` and point LATEST at it"""
+        directory = os.path.join(root, self.version)
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(getattr(self, name), dtype=np.float64))
+        manifest = {
+            "format": ARTIFACT_FORMAT,
+            "version": self.version,
+            "features": list(self.features),
+            "horizon": self.horizon,
+            "metadata": self.metadata
+        }
+        with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        # The pointer moves last, so readers only ever see a complete artifact
+        pointer = os.path.join(root, LATEST_POINTER)
+        with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+            f.write(self.version)
+        os.replace(pointer + ".tmp", pointer)
+        return directory
+
+    @classmethod
+    def load(cls, directory: str) -> "SignalModel":
+        """Load an artifact directory; weights are memory-mapped rather than copied"""
+        with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != ARTIFACT_FORMAT:
+            raise ValueError(f"Unsupported model artifact format {manifest.get('format')} in {directory}")
+        if tuple(manifest["features"]) != FEATURES:
+            raise ValueError(f"Model artifact {manifest['version']} was trained on different features")
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in ARRAYS}
+        return cls(
+            version=manifest["version"],
+            features=tuple(manifest["features"]),
+            horizon=int(manifest["horizon"]),
+            metadata=manifest.get("metadata", {}),
+            **arrays
+        )
+
+
+def artifact_version(arrays: Dict[str, np.ndarray], trained_at: Optional[float] = None) -> str:
+    """Sortable version id: training time plus a digest of the weights"""
+    digest = hashlib.sha256()
+    for name in sorted(arrays):
+        digest.update(np.ascontiguousarray(arrays[name], dtype=np.float64).tobytes())
+    stamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime(trained_at if trained_at is not None else time.time()))
+    return f"{stamp}-{digest.hexdigest()[:8]}"
+
+
+def load_latest(root: str = DEFAULT_MODEL_DIR) -> Optional[SignalModel]:
+    """The artifact LATEST points at, or None if nothing usable has been trained"""
+    try:
+        with open(os.path.join(root, LATEST_POINTER), "r", encoding="utf-8") as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    try:
+        return SignalModel.load(os.path.join(root, version))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Warning: could not load model artifact {version}: {str(e)}")
+        return None
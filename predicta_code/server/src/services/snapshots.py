@@ -0,0 +1,179 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Deque, Dict, Iterable, Optional, Set, Tuple
+
+DEFAULT_INTERVAL = float(os.getenv("PREDICTA_SNAPSHOT_INTERVAL", "300"))
+DEFAULT_HISTORY = int(os.getenv("PREDICTA_SNAPSHOT_HISTORY", "5"))
+# On-demand keys kept at most, and how long one may go unread before it is dropped
+DEFAULT_MAX_KEYS = int(os.getenv("PREDICTA_SNAPSHOT_MAX_KEYS", "32"))
+DEFAULT_IDLE_TTL = float(os.getenv("PREDICTA_SNAPSHOT_IDLE_TTL", "3600"))
+
+SnapshotKey = Tuple[str, Optional[str]]
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """An immutable, pre-rendered set of predictions for one exchange/country pair"""
+    exchange: str
+    country: Optional[str]
+    version: int
+    as_of: datetime
+    predictions: tuple
+    body: bytes
+
+    def to_dict(self) -> dict:
+        return {
+            "exchange": self.exchange,
+            "country": self.country,
+            "version": self.version,
+            "as_of": self.as_of.isoformat(),
+            "predictions": list(self.predictions)
+        }
+
+
+class SnapshotStore:
+    """Keeps the latest few snapshots per key; readers never see a partial update"""
+
+    def __init__(self, history: int = DEFAULT_HISTORY):
+        self.history = history
+        self._latest: Dict[SnapshotKey, Snapshot] = {}
+        self._versions: Dict[SnapshotKey, Deque[Snapshot]] = {}
+
+    def latest(self, exchange: str, country: Optional[str] = None) -> Optional[Snapshot]:
+        return self._latest.get((exchange, country))
+
+    def versions(self, exchange: str, country: Optional[str] = None) -> list:
+        return list(self._versions.get((exchange, country), ()))
+
+    def publish(self, exchange: str, country: Optional[str], predictions: Iterable[dict]) -> Snapshot:
+        """Freeze a new set of predictions and make it the latest for its key"""
+        key = (exchange, country)
+        previous = self._latest.get(key)
+        predictions = tuple(predictions)
+        snapshot = Snapshot(
+            exchange=exchange,
+            country=country,
+            version=previous.version + 1 if previous else 1,
+            as_of=datetime.now(timezone.utc),
+            predictions=predictions,
+            # Serialize once so serving a snapshot is just handing out bytes
+            body=json.dumps(predictions).encode("utf-8")
+        )
+        self._versions.setdefault(key, deque(maxlen=self.history)).append(snapshot)
+        # Single reference swap, so readers see either the old or the new snapshot
+        self._latest[key] = snapshot
+        return snapshot
+
+    def discard(self, exchange: str, country: Optional[str] = None):
+        self._latest.pop((exchange, country), None)
+        self._versions.pop((exchange, country), None)
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+
+Compute = Callable[[str, Optional[str]], Awaitable[Iterable[dict]]]
+
+
+class SnapshotScheduler:
+    """
+    Recomputes prediction snapshots in the background
+
+    Keys listed in ``keys`` are refreshed together every ``interval`` seconds
+    once started. Any other key is computed on demand and only refreshed when
+    asked to; concurrent refreshes of the same key share a single
+    computation. On-demand snapshots unread for ``idle_ttl`` seconds are
+    dropped, as are the least recently read beyond ``max_keys``.
+    """
+
+    def __init__(
+        self,
+        store: SnapshotStore,
+        compute: Compute,
+        keys: Iterable[SnapshotKey] = (),
+        interval: float = DEFAULT_INTERVAL,
+        max_keys: int = DEFAULT_MAX_KEYS,
+        idle_ttl: float = DEFAULT_IDLE_TTL
+    ):
+        self.store = store
+        self.compute = compute
+        self.keys = list(keys)
+        self.interval = interval
+        self.max_keys = max_keys
+        self.idle_ttl = idle_ttl
+        self._inflight: Dict[SnapshotKey, asyncio.Task] = {}
+        self._loops: Set[asyncio.Task] = set()
+        self._last_read: Dict[SnapshotKey, float] = {}
+        self.evictions = 0
+
+    async def refresh(self, exchange: str, country: Optional[str] = None) -> Snapshot:
+        """Compute and publish a fresh snapshot, joining one already in progress"""
+        key = (exchange, country)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._compute_and_publish(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _compute_and_publish(self, key: SnapshotKey) -> Snapshot:
+        exchange, country = key
+        predictions = await self.compute(exchange, country)
+        return self.store.publish(exchange, country, predictions)
+
+    async def get(self, exchange: str, country: Optional[str] = None, fresh: bool = False) -> Snapshot:
+        """Latest snapshot for a key, computing one if none exists or fresh is requested"""
+        key = (exchange, country)
+        self._last_read[key] = time.monotonic()
+        self._evict_idle()
+        snapshot = self.store.latest(exchange, country)
+        if snapshot is None or fresh:
+            snapshot = await self.refresh(exchange, country)
+        return snapshot
+
+    def _evict_idle(self):
+        on_demand = sorted(
+            (read, key) for key, read in self._last_read.items()
+            if key not in self.keys and key not in self._inflight
+        )
+        cutoff = time.monotonic() - self.idle_ttl
+        excess = len(on_demand) - self.max_keys
+        for position, (read, key) in enumerate(on_demand):
+            if read >= cutoff and position >= excess:
+                break
+            del self._last_read[key]
+            self.store.discard(*key)
+            self.evictions += 1
+
+    async def refresh_all(self):
+        """Refresh every configured key together, so their model scoring can share one batch"""
+        results = await asyncio.gather(*(self.refresh(*key) for key in self.keys), return_exceptions=True)
+        for key, result in zip(self.keys, results):
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+            if isinstance(result, Exception):
+                print(f"Error refreshing prediction snapshot {key}: {str(result)}")
+
+    async def _run(self):
+        while True:
+            await self.refresh_all()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Begin periodic refreshes; an interval of zero or less disables them"""
+        if self.interval <= 0 or self._loops or not self.keys:
+            return
+        self._loops.add(asyncio.create_task(self._run()))
+
+    async def stop(self):
+        tasks = list(self._loops) + list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loops.clear()
+        self._inflight.clear()
@@ -0,0 +1,137 @@
+import json
+import os
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from .entity_index import ambiguous_keys
+
+DEFAULT_SYMBOLS_PATH = os.getenv(
+    "PREDICTA_SYMBOLS_FILE",
+    os.path.join(os.path.dirname(__file__), "../../data/symbols.json")
+)
+
+
+@dataclass(frozen=True)
+class Instrument:
+    """One canonical listing with the names it is known by"""
+    symbol: str
+    exchange: str
+    name: str
+    sector: str
+    aliases: Tuple[str, ...] = ()
+    divisions: Tuple[str, ...] = ()
+
+    def to_dict(self) -> dict:
+        return {
+            "symbol": self.symbol,
+            "exchange": self.exchange,
+            "name": self.name,
+            "sector": self.sector,
+            "aliases": list(self.aliases),
+            "divisions": list(self.divisions)
+        }
+
+
+class SymbolRegistry:
+    """
+    Canonical instruments per exchange, loaded once from a data file
+
+    A ticker listed more than once is merged into a single instrument, its
+    extra sectors kept as division tags, so every consumer sees each listing
+    exactly once. Per-exchange symbol tuples are computed at load time.
+    """
+
+    def __init__(self, exchanges: Dict[str, dict]):
+        self._instruments: Dict[str, Instrument] = {}
+        self._aliases: Dict[str, str] = {}
+        self._symbols: Dict[str, Tuple[str, ...]] = {}
+        self._countries: Dict[str, str] = {}
+        self.duplicates = 0
+
+        for exchange, spec in exchanges.items():
+            if spec.get("country"):
+                self._countries[exchange] = spec["country"]
+            merged: Dict[str, dict] = {}
+            for entry in spec.get("instruments", []):
+                symbol = self._aliases.get(entry["symbol"].upper(), entry["symbol"].upper())
+                existing = merged.get(symbol)
+                if existing is None:
+                    merged[symbol] = {
+                        "name": entry.get("name", symbol),
+                        "sector": entry.get("sector", ""),
+                        "aliases": list(entry.get("aliases", [])),
+                        "divisions": list(entry.get("divisions", []))
+                    }
+                else:
+                    self.duplicates += 1
+                    for division in [entry.get("sector", ""), *entry.get("divisions", [])]:
+                        if division and division != existing["sector"] and division not in existing["divisions"]:
+                            existing["divisions"].append(division)
+                    existing["aliases"].extend(a for a in entry.get("aliases", []) if a not in existing["aliases"])
+                for alias in entry.get("aliases", []):
+                    self._aliases[alias.upper()] = symbol
+
+            for symbol, fields in merged.items():
+                self._instruments[symbol] = Instrument(
+                    symbol=symbol,
+                    exchange=exchange,
+                    name=fields["name"],
+                    sector=fields["sector"],
+                    aliases=tuple(fields["aliases"]),
+                    divisions=tuple(fields["divisions"])
+                )
+                self._aliases[symbol] = symbol
+            self._symbols[exchange] = tuple(merged)
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_SYMBOLS_PATH) -> "SymbolRegistry":
+        """Load the registry, or an empty one if the data file is missing"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            print(f"Warning: symbol registry file not found: {path}")
+            data = {}
+        return cls(data.get("exchanges", {}))
+
+    @property
+    def exchanges(self) -> List[str]:
+        return list(self._symbols)
+
+    def symbols(self, exchange: str) -> Tuple[str, ...]:
+        """Deduplicated canonical tickers for an exchange, in listing order"""
+        return self._symbols.get(exchange, ())
+
+    def instruments(self, exchange: str) -> List[Instrument]:
+        return [self._instruments[symbol] for symbol in self.symbols(exchange)]
+
+    def country(self, exchange: str) -> Optional[str]:
+        return self._countries.get(exchange)
+
+    def resolve(self, ticker: str) -> Optional[str]:
+        """Canonical ticker for a ticker or alias, or None if unknown"""
+        return self._aliases.get(ticker.upper())
+
+    def get(self, symbol: str) -> Optional[Instrument]:
+        canonical = self.resolve(symbol)
+        return self._instruments.get(canonical) if canonical else None
+
+    def entity_names(self, symbol: str) -> List[str]:
+        """Ticker, company name and aliases a symbol can be mentioned by"""
+        instrument = self.get(symbol)
+        if instrument is None:
+            return [symbol]
+        return [instrument.symbol, instrument.name, *instrument.aliases]
+
+    @cached_property
+    def ambiguous_entities(self) -> FrozenSet[str]:
+        """Normalized names shared by more than one instrument, which news matching must not rely on"""
+        return frozenset(ambiguous_keys({symbol: self.entity_names(symbol) for symbol in self._instruments}))
+
+    def stats(self) -> dict:
+        return {
+            "exchanges": {exchange: len(symbols) for exchange, symbols in self._symbols.items()},
+            "aliases": len(self._aliases) - len(self._instruments),
+            "duplicates_merged": self.duplicates
+        }
@@ -0,0 +1,133 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from .fetch_engine import FetchResult
+
+Loader = Callable[[str], Awaitable[FetchResult]]
+
+
+class AsyncTTLCache:
+    """TTL + LRU cache for upstream lookups with stale-while-revalidate
+
+    Entries younger than ``ttl`` are served directly. Entries older than
+    ``ttl`` but younger than ``stale_ttl`` are served as-is while a background
+    refresh runs. Concurrent misses for the same key share one upstream call.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float, max_entries: int):
+        if stale_ttl < ttl:
+            raise ValueError("stale_ttl must be greater than or equal to ttl")
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "refreshes": 0,
+            "refresh_failures": 0,
+            "evictions": 0
+        }
+
+    def _store(self, key: str, value: Any):
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    async def _load(self, key: str, loader: Loader) -> FetchResult:
+        """Call the loader once per key no matter how many callers are waiting"""
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self._stats["coalesced"] += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await loader(key)
+            if result.ok:
+                self._store(key, result.value)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            result = FetchResult(key=key, error=str(e))
+            future.set_result(result)
+            return result
+        finally:
+            # A cancelled loader must not leave coalesced waiters hanging
+            if not future.done():
+                future.cancel()
+            self._inflight.pop(key, None)
+
+    async def get(self, key: str, loader: Loader) -> FetchResult:
+        """Return a cached value, refreshing or loading it as needed"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age < self.stale_ttl:
+                self._entries.move_to_end(key)
+                if age < self.ttl:
+                    self._stats["hits"] += 1
+                else:
+                    self._stats["stale_hits"] += 1
+                    if key not in self._inflight:
+                        task = asyncio.create_task(self.refresh(key, loader))
+                        self._refresh_tasks.add(task)
+                        task.add_done_callback(self._refresh_tasks.discard)
+                return FetchResult(key=key, value=value)
+
+        self._stats["misses"] += 1
+        return await self._load(key, loader)
+
+    async def get_many(self, keys: Iterable[str], loader: Loader) -> Dict[str, FetchResult]:
+        """Resolve several keys concurrently through the cache"""
+        unique_keys = list(dict.fromkeys(keys))
+        results = await asyncio.gather(*(self.get(key, loader) for key in unique_keys))
+        return {result.key: result for result in results}
+
+    async def refresh(self, key: str, loader: Loader) -> FetchResult:
+        """Reload a key now, sharing any load already in flight"""
+        self._stats["refreshes"] += 1
+        result = await self._load(key, loader)
+        if not result.ok:
+            self._stats["refresh_failures"] += 1
+        return result
+
+    def age(self, key: str) -> Optional[float]:
+        """Seconds since the key was stored, or None if it is not cached"""
+        entry = self._entries.get(key)
+        return time.monotonic() - entry[1] if entry else None
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Cached value regardless of age, without touching LRU order or counters"""
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop one entry, or the whole cache when no key is given"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        """Counters and sizing information for monitoring"""
+        lookups = self._stats["hits"] + self._stats["stale_hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "inflight": len(self._inflight),
+            "hit_ratio": round((self._stats["hits"] + self._stats["stale_hits"]) / lookups, 4) if lookups else 0.0,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl
+        }